@@ -22,6 +22,7 @@ pip install requests
 pip install python-dateutil
 pip install pillow
 pip install cryptography
+pip install numpy
 echo.
 echo =========================================
 echo  DEPENDENCIAS INSTALADAS COM SUCESSO!
@@ -36,6 +37,7 @@ echo - requests (requisicoes HTTP)
 echo - python-dateutil (manipulacao de datas)
 echo - pillow (processamento de imagens)
 echo - cryptography (criptografia)
+echo - numpy (analise de desempenho das turmas)
 echo.
 echo PROXIMO PASSO:
 echo   Execute: INICIAR.bat
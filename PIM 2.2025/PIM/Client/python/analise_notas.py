@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+Análise de desempenho por turma, por matéria e da escola inteira.
+
+As notas são carregadas uma vez em colunas (arrays NumPy: ra, materia_id,
+bimestre, np, valor) e médias, distribuições, percentis, taxas de aprovação
+e rankings saem de operações agrupadas sobre essas colunas, sem laços por
+aluno. Usado pelas abas de desempenho (professor/admin) e pela linha de
+comando:
+
+    python analise_notas.py                 (escola inteira, via servidor)
+    python analise_notas.py --turma 1       (apenas a turma 1)
+    python analise_notas.py --dados ../data (arquivos JSON locais)
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+# NumPy é opcional para o restante do cliente; só esta análise depende dele
+try:
+    import numpy as np
+    NUMPY_DISPONIVEL = True
+except ImportError:
+    np = None
+    NUMPY_DISPONIVEL = False
+
+MEDIA_APROVACAO = 7.0
+MEDIA_RECUPERACAO = 5.0
+PERCENTIS = (25, 50, 75, 90)
+
+_TIPO_NOTA = re.compile(r'^B([1-4])_NP([12])$')
+
+
+def _exigir_numpy():
+    if not NUMPY_DISPONIVEL:
+        raise RuntimeError("NumPy não está instalado. Para instalar, execute: pip install numpy")
+
+
+def _numero(valor):
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+
+class TabelaNotas:
+    """
+    Notas em colunas. 'ra' e 'materia' são códigos inteiros (posições em
+    'ras' e 'materias'); 'bimestre' vai de 1 a 4 e 'np' é 1 ou 2.
+    """
+
+    def __init__(self, notas):
+        _exigir_numpy()
+        # Uma passada para decodificar o JSON; vale a primeira nota de cada
+        # (aluno, matéria, tipo), como nas telas do aluno
+        vistos = {}
+        for nota in notas:
+            encontrado = _TIPO_NOTA.match(str(nota.get('tipo_nota', '')))
+            valor = nota.get('valor')
+            if not encontrado or not _numero(valor):
+                continue
+            chave = (str(nota.get('aluno_ra')), str(nota.get('materia_id')), nota.get('tipo_nota'))
+            if chave not in vistos:
+                vistos[chave] = (int(encontrado.group(1)), int(encontrado.group(2)), float(valor))
+
+        ras = [k[0] for k in vistos]
+        materias = [k[1] for k in vistos]
+        self.ras, self.ra = np.unique(np.array(ras, dtype=str), return_inverse=True)
+        self.materias, self.materia = np.unique(np.array(materias, dtype=str), return_inverse=True)
+        detalhes = np.array(list(vistos.values()), dtype=float).reshape(-1, 3)
+        self.bimestre = detalhes[:, 0].astype(np.int64)
+        self.np = detalhes[:, 1].astype(np.int64)
+        self.valor = detalhes[:, 2]
+
+    def __len__(self):
+        return len(self.valor)
+
+    def medias_finais(self):
+        """
+        Média final por (aluno, matéria): média das médias bimestrais em que
+        NP1 e NP2 foram lançadas. Retorna (ra, materia, media) em arrays,
+        só para os pares com ao menos uma média bimestral.
+        """
+        n_mat = max(len(self.materias), 1)
+        n_pares = max(len(self.ras), 1) * n_mat
+        par = self.ra * n_mat + self.materia
+        celula = par * 4 + (self.bimestre - 1)
+
+        # Soma e contagem de NP1/NP2 por (aluno, matéria, bimestre)
+        tamanho = n_pares * 4
+        tem_np1 = np.bincount(celula, weights=(self.np == 1), minlength=tamanho) > 0
+        tem_np2 = np.bincount(celula, weights=(self.np == 2), minlength=tamanho) > 0
+        soma = np.bincount(celula, weights=self.valor, minlength=tamanho)
+        completa = tem_np1 & tem_np2
+        media_bim = np.where(completa, soma / 2, 0.0)
+
+        # Média final: média das médias bimestrais completas de cada par
+        soma_par = media_bim.reshape(n_pares, 4).sum(axis=1)
+        qtd_par = completa.reshape(n_pares, 4).sum(axis=1)
+        validos = np.nonzero(qtd_par)[0]
+        return validos // n_mat, validos % n_mat, soma_par[validos] / qtd_par[validos]
+
+
+def estatisticas(valores):
+    """Resumo de um conjunto de médias finais (array NumPy)"""
+    if len(valores) == 0:
+        return {'n': 0}
+    aprovados = int(np.count_nonzero(valores >= MEDIA_APROVACAO))
+    reprovados = int(np.count_nonzero(valores < MEDIA_RECUPERACAO))
+    return {
+        'n': int(len(valores)),
+        'media': float(valores.mean()),
+        'desvio': float(valores.std()),
+        'minimo': float(valores.min()),
+        'maximo': float(valores.max()),
+        'percentis': {p: float(v) for p, v in zip(PERCENTIS, np.percentile(valores, PERCENTIS))},
+        'distribuicao': {
+            'Aprovado': aprovados,
+            'Recuperação': int(len(valores)) - aprovados - reprovados,
+            'Reprovado': reprovados
+        },
+        'taxa_aprovacao': aprovados / len(valores)
+    }
+
+
+def _agrupar(grupos, valores):
+    """Divide 'valores' por código de grupo: {grupo: array}"""
+    if len(valores) == 0:
+        return {}
+    ordem = np.argsort(grupos, kind='stable')
+    grupos_ordenados = grupos[ordem]
+    cortes = np.nonzero(np.diff(grupos_ordenados))[0] + 1
+    inicios = np.concatenate(([0], cortes))
+    return dict(zip(grupos_ordenados[inicios].tolist(), np.split(valores[ordem], cortes)))
+
+
+def analisar(notas, turmas, materias, turma_id=None, alunos=None):
+    """
+    Analisa as notas da escola ou de uma turma ('turma_id').
+    A turma de cada nota é a turma da matéria (materias.json).
+    Retorna um dicionário com 'geral', 'por_turma', 'por_materia' e
+    'ranking' (alunos pela média das suas médias finais).
+    """
+    tabela = TabelaNotas(notas)
+    ra, mat, medias = tabela.medias_finais()
+
+    info_materia = {str(m.get('id')): m for m in materias}
+    turma_da_materia = np.array(
+        [str(info_materia.get(codigo, {}).get('turma_id', '')) for codigo in tabela.materias] or [''], dtype=str)
+    turma_do_par = turma_da_materia[mat]
+
+    if turma_id is not None:
+        filtro = turma_do_par == str(turma_id)
+        ra, mat, medias, turma_do_par = ra[filtro], mat[filtro], medias[filtro], turma_do_par[filtro]
+
+    nomes_turma = {str(t.get('id')): f"{t.get('serie', '')} {t.get('turma', '')}".strip() for t in turmas}
+    nomes_aluno = {str(a.get('ra')): a.get('nome', '') for a in (alunos or [])}
+
+    # Códigos de turma para agrupamento
+    rotulos_turma, turma_codigos = np.unique(turma_do_par, return_inverse=True)
+
+    por_turma = [
+        {'turma_id': str(rotulos_turma[g]), 'nome': nomes_turma.get(str(rotulos_turma[g])) or 'Sem turma', **estatisticas(v)}
+        for g, v in _agrupar(turma_codigos, medias).items()
+    ]
+    por_materia = []
+    for g, v in _agrupar(mat, medias).items():
+        codigo = str(tabela.materias[g])
+        materia = info_materia.get(codigo, {})
+        por_materia.append({
+            'materia_id': codigo,
+            'nome': materia.get('nome', codigo),
+            'turma_id': materia.get('turma_id'),
+            **estatisticas(v)
+        })
+
+    # Ranking: média das médias finais de cada aluno (bincount por RA)
+    ranking = []
+    if len(medias):
+        soma = np.bincount(ra, weights=medias, minlength=len(tabela.ras))
+        qtd = np.bincount(ra, minlength=len(tabela.ras))
+        com_nota = np.nonzero(qtd)[0]
+        media_aluno = soma[com_nota] / qtd[com_nota]
+        ordem = np.argsort(-media_aluno, kind='stable')
+        for posicao, i in enumerate(ordem, start=1):
+            codigo = tabela.ras[com_nota[i]]
+            ranking.append({
+                'posicao': posicao,
+                'ra': str(codigo),
+                'nome': nomes_aluno.get(str(codigo), ''),
+                'media': float(media_aluno[i]),
+                'materias': int(qtd[com_nota[i]])
+            })
+
+    return {
+        'turma_id': turma_id,
+        'geral': estatisticas(medias),
+        'por_turma': sorted(por_turma, key=lambda t: t['nome']),
+        'por_materia': sorted(por_materia, key=lambda m: m['nome']),
+        'ranking': ranking
+    }
+
+
+def _linha_estatisticas(nome, est):
+    if not est.get('n'):
+        return f"{nome[:28]:<28} | sem médias finais\n"
+    p = est['percentis']
+    return (f"{nome[:28]:<28} | n={est['n']:>3} | média {est['media']:5.2f} ± {est['desvio']:4.2f}"
+            f" | p25 {p[25]:5.2f} p50 {p[50]:5.2f} p90 {p[90]:5.2f}"
+            f" | aprov. {est['taxa_aprovacao'] * 100:5.1f}%\n")
+
+
+def relatorio_texto(analise, top=10):
+    """Relatório em texto (fonte monoespaçada) de uma análise"""
+    titulo = "TURMA " + str(analise['turma_id']) if analise['turma_id'] is not None else "ESCOLA"
+    texto = f"📊 ANÁLISE DE DESEMPENHO - {titulo}\n" + "=" * 60 + "\n\n"
+
+    geral = analise['geral']
+    if not geral.get('n'):
+        return texto + "❌ Nenhuma média final disponível para análise.\n"
+
+    texto += "🎯 GERAL (médias finais por aluno e matéria):\n"
+    texto += f"  Médias: {geral['n']} | Média: {geral['media']:.2f} | Desvio: {geral['desvio']:.2f}\n"
+    texto += f"  Mínima: {geral['minimo']:.2f} | Máxima: {geral['maximo']:.2f}\n"
+    texto += "  Percentis: " + " | ".join(f"p{p}: {v:.2f}" for p, v in geral['percentis'].items()) + "\n"
+    texto += "  Distribuição: " + " | ".join(f"{s}: {n}" for s, n in geral['distribuicao'].items()) + "\n"
+    texto += f"  Taxa de aprovação: {geral['taxa_aprovacao'] * 100:.1f}%\n"
+
+    if analise['turma_id'] is None:
+        texto += "\n🏫 POR TURMA:\n" + "-" * 60 + "\n"
+        for t in analise['por_turma']:
+            texto += _linha_estatisticas(t['nome'], t)
+
+    texto += "\n📚 POR MATÉRIA:\n" + "-" * 60 + "\n"
+    for m in analise['por_materia']:
+        texto += _linha_estatisticas(m['nome'], m)
+
+    texto += f"\n🏆 RANKING (top {top}):\n" + "-" * 60 + "\n"
+    for r in analise['ranking'][:top]:
+        texto += f"  {r['posicao']:>3}º  {r['ra']:<10} {r['nome'][:30]:<30} {r['media']:6.2f} ({r['materias']} matérias)\n"
+    return texto
+
+
+def _carregar_local(pasta, nome):
+    try:
+        with open(os.path.join(pasta, nome), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError, ValueError):
+        return []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Análise de desempenho das notas (turma ou escola)")
+    parser.add_argument('--turma', help="ID da turma (padrão: escola inteira)")
+    parser.add_argument('--dados', help="Pasta com os arquivos JSON locais (padrão: servidor)")
+    parser.add_argument('--top', type=int, default=10, help="Tamanho do ranking exibido")
+    args = parser.parse_args(argv)
+
+    if not NUMPY_DISPONIVEL:
+        print("Erro: NumPy não está instalado.")
+        print("Para instalar, execute: pip install numpy")
+        return 1
+
+    arquivos = ('notas.json', 'turmas.json', 'materias.json', 'alunos.json')
+    if args.dados:
+        notas, turmas, materias, alunos = (_carregar_local(args.dados, nome) for nome in arquivos)
+    else:
+        import client_proxy_io as proxy
+        notas, turmas, materias, alunos = proxy.carregar_varios(*arquivos)
+
+    analise = analisar(notas, turmas, materias, turma_id=args.turma, alunos=alunos)
+    print(relatorio_texto(analise, top=args.top))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
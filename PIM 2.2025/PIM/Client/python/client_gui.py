@@ -19,11 +19,15 @@ from tkinter import ttk, messagebox, simpledialog
 import tkinter as tk
 import json
 import os
+import queue
 import re
+import threading
 import time
 import unicodedata
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 import datetime as dt
+import hmac
 import sys
 
 # Importa o módulo de proxy para comunicação com o servidor
@@ -39,16 +43,27 @@ except ImportError:
     USE_PROXY = False
     print("[MODO LOCAL] Proxy não encontrado, usando arquivos locais...")
 
+# Índice de notas e cálculo do boletim (compartilhado pelas telas do aluno)
+import consulta_notas
+# Análise de desempenho por turma/escola (usa NumPy, se instalado)
+import analise_notas
+# Filtro/ordenação/paginação de registros (modo local e servidores sem /api/query)
+import consulta_registros
+
 DATA_DIR = os.path.join(project_root, 'data')
 os.makedirs(DATA_DIR, exist_ok=True)
 
 
-def carregar_json(file_path):
-    """Carrega dados do arquivo JSON - usa proxy se disponível, senão usa arquivo local"""
+def carregar_json(file_path, campos=None):
+    """
+    Carrega dados do arquivo JSON - usa proxy se disponível, senão usa arquivo local.
+    'campos' limita os campos trazidos do servidor (ex.: ['usuario', 'nome']);
+    no modo local o arquivo é lido inteiro.
+    """
     if USE_PROXY:
         # Extrai apenas o nome do arquivo (ex: alunos.json)
         filename = os.path.basename(file_path)
-        return proxy.carregar_dados_do_servidor(filename)
+        return proxy.carregar_dados_do_servidor(filename, campos)
     else:
         # Modo local (fallback)
         if not os.path.exists(file_path):
@@ -61,6 +76,32 @@ def carregar_json(file_path):
         except (json.JSONDecodeError, ValueError):
             return []
 
+def carregar_varios_json(*file_paths):
+    """Carrega vários arquivos JSON de uma vez - no modo proxy usa uma única requisição"""
+    if USE_PROXY:
+        return proxy.carregar_varios(*(os.path.basename(p) for p in file_paths))
+    return [carregar_json(p) for p in file_paths]
+
+def consultar_json(file_path, campos=None, **consulta):
+    """
+    Registros filtrados/ordenados de um arquivo (parâmetros em consulta_registros:
+    igual, contem, faixa, ordem, limite, inicio). No modo proxy a consulta
+    roda no servidor e só o resultado é baixado.
+    """
+    if USE_PROXY:
+        return proxy.consultar_registros(os.path.basename(file_path), campos=campos, **consulta)
+    return consulta_registros.aplicar_consulta(carregar_json(file_path), **consulta)
+
+def consultar_pagina_json(file_path, limite, cursor=None, chave=None, campos=None, **consulta):
+    """
+    Uma página de uma consulta: (registros, próximo cursor ou None, total).
+    No modo proxy o cursor vem do servidor e continua válido mesmo que o
+    arquivo mude entre as páginas.
+    """
+    if USE_PROXY:
+        return proxy.consultar_pagina(os.path.basename(file_path), limite, cursor, chave, campos, **consulta)
+    return consulta_registros.paginar(carregar_json(file_path), limite, cursor, chave, **consulta)
+
 def salvar_json(file_path, data):
     """Salva dados no arquivo JSON - usa proxy se disponível, senão usa arquivo local"""
     if USE_PROXY:
@@ -87,6 +128,9 @@ NOTAS_FILE = os.path.join(DATA_DIR, 'notas.json')
 
 PEDIDOS_FILE = os.path.join(DATA_DIR, 'pedidos.json')
 
+# Campos de matérias usados nas telas do aluno (projeção ?fields= no servidor)
+CAMPOS_MATERIA_ALUNO = ['id', 'nome', 'turma_id']
+
 def carregar_todos_usuarios():
     """Carrega todos os usuários de todos os arquivos e retorna uma lista unificada"""
     todos_usuarios = []
@@ -98,8 +142,10 @@ def carregar_todos_usuarios():
         (ADMIN_FILE, 'admin')
     ]
     
-    for arquivo, tipo in tipos_arquivo:
-        usuarios = carregar_json(arquivo)
+    # Os três arquivos numa única leitura
+    dados = carregar_varios_json(*(arquivo for arquivo, _ in tipos_arquivo))
+    
+    for (arquivo, tipo), usuarios in zip(tipos_arquivo, dados):
         for usuario in usuarios:
             if 'tipo' not in usuario:
                 usuario['tipo'] = tipo
@@ -111,6 +157,10 @@ def salvar_usuario_por_tipo(usuario_data):
     """Salva um usuário no arquivo correspondente ao seu tipo"""
     tipo = usuario_data.get('tipo')
     
+    if USE_PROXY:
+        # Upsert de um único registro no servidor (sem reenviar a coleção)
+        return proxy.salvar_usuario_por_tipo(usuario_data)
+    
     # Mapeamento de tipo para arquivo
     arquivos_tipo = {
         'aluno': ALUNOS_FILE,
@@ -142,8 +192,47 @@ def salvar_usuario_por_tipo(usuario_data):
     
     salvar_json(arquivo, usuarios)
 
+def senha_confere(senha, senha_armazenada):
+    """Confere uma senha com a armazenada (hash bcrypt ou texto plano legado)"""
+    senha_armazenada = str(senha_armazenada or '')
+    if senha_armazenada.startswith('$2b$'):
+        return bcrypt.checkpw(senha.encode('utf-8'), senha_armazenada.encode('utf-8'))
+    return bool(senha_armazenada) and hmac.compare_digest(senha_armazenada.encode('utf-8'), senha.encode('utf-8'))
+
+def alterar_senha_usuario(usuario_data, senha_atual, nova_senha):
+    """
+    Confere a senha atual do usuário e grava a nova, criptografada.
+    Retorna True se alterou, False se a senha atual não confere e None em
+    falha. No modo proxy a senha atual é conferida por /api/auth/login e só
+    o campo 'senha' é alterado: a base de usuários (com os hashes) não é baixada.
+    """
+    login = usuario_data['usuario']
+    
+    if USE_PROXY:
+        resultado = proxy.autenticar_usuario(login, senha_atual)
+        if resultado is None:
+            return None
+        usuario = resultado['usuario']
+        # Servidor antigo (sem /api/auth/login): o registro veio com a senha
+        if usuario is None or not (resultado['verificado'] or senha_confere(senha_atual, usuario.get('senha'))):
+            return False
+        hashed_pw = bcrypt.hashpw(nova_senha.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        return proxy.alterar_campos_usuario(login, usuario.get('tipo'), {'senha': hashed_pw}) or None
+    
+    usuario = next((u for u in carregar_todos_usuarios() if u['usuario'] == login), None)
+    if usuario is None:
+        return None
+    if not senha_confere(senha_atual, usuario.get('senha')):
+        return False
+    usuario['senha'] = bcrypt.hashpw(nova_senha.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    salvar_usuario_por_tipo(usuario)
+    return True
+
 def remover_usuario_por_tipo(usuario_login, tipo_usuario, ra_aluno=None):
     """Remove um usuário do arquivo correspondente ao seu tipo"""
+    if USE_PROXY:
+        return proxy.remover_usuario_por_tipo(usuario_login, tipo_usuario, ra_aluno)
+    
     arquivos_tipo = {
         'aluno': ALUNOS_FILE,
         'professor': PROFESSORES_FILE,
@@ -166,7 +255,8 @@ def remover_usuario_por_tipo(usuario_login, tipo_usuario, ra_aluno=None):
 
 def gerar_mapa_professores():
     """Gera o mapa de login → nome do professor"""
-    professores = carregar_json(PROFESSORES_FILE)
+    # Só login e nome (sem os hashes de senha)
+    professores = carregar_json(PROFESSORES_FILE, ['usuario', 'nome'])
     return {p['usuario']: p.get('nome', p['usuario']) for p in professores}
 
 # Funções centralizadas de validação
@@ -240,20 +330,70 @@ def verificar_prazo_atividade(data_entrega_str):
     except:
         return False
 
-def verificar_atividade_ja_respondida(atividade_id, ra_aluno):
-    """Verifica se um aluno específico já respondeu uma atividade específica"""
+def carregar_atividades_respondidas(ra_aluno):
+    """Retorna {atividade_id (str): data_resposta} com as atividades já respondidas pelo aluno"""
+    if USE_PROXY:
+        # Consulta o índice do servidor em vez de baixar todas as respostas
+        return proxy.carregar_atividades_respondidas(ra_aluno)
+    
     RESPOSTAS_FILE = os.path.join(DATA_DIR, 'respostas_alunos.json')
-    respostas = carregar_json(RESPOSTAS_FILE)
+    respondidas = {}
+    for resposta in carregar_json(RESPOSTAS_FILE):
+        if str(resposta.get('ra_aluno')) == str(ra_aluno):
+            respondidas.setdefault(str(resposta.get('atividade_id')), resposta.get('data_resposta', 'Data não disponível'))
+    return respondidas
+
+# Mapa RA -> turma do modo local, refeito só quando turmas.json muda no disco
+_mapa_aluno_turma_local = {'assinatura': None, 'mapa': {}}
+
+def obter_mapa_aluno_turma():
+    """Mapa RA (texto, sem espaços) -> turma, compartilhado por todas as telas"""
+    if USE_PROXY:
+        return proxy.obter_mapa_aluno_turma()
     
-    for resposta in respostas:
-        if (str(resposta.get('ra_aluno')) == str(ra_aluno) and 
-            str(resposta.get('atividade_id')) == str(atividade_id)):
-            return True, resposta.get('data_resposta', 'Data não disponível')
+    try:
+        st = os.stat(TURMAS_FILE)
+        assinatura = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        assinatura = None
     
+    if assinatura is None or assinatura != _mapa_aluno_turma_local['assinatura']:
+        mapa = {}
+        for t in carregar_json(TURMAS_FILE):
+            for ra in t.get('alunos', []):
+                mapa.setdefault(str(ra).strip(), t)
+        _mapa_aluno_turma_local.update({'assinatura': assinatura, 'mapa': mapa})
+    return _mapa_aluno_turma_local['mapa']
+
+def buscar_turma_do_aluno(ra_aluno):
+    """Turma do aluno (ou None) - no modo proxy consulta o índice do servidor"""
+    if USE_PROXY:
+        return proxy.buscar_turma_do_aluno(ra_aluno)
+    return obter_mapa_aluno_turma().get(str(ra_aluno).strip())
+
+def carregar_boletim_aluno(ra_aluno, materias_aluno):
+    """
+    Boletim do aluno nas matérias informadas (formato de consulta_notas).
+    No modo proxy vem pronto do servidor, sem baixar notas.json.
+    """
+    if USE_PROXY:
+        boletim_servidor = proxy.carregar_boletim(ra_aluno)
+        if boletim_servidor is not None:
+            return consulta_notas.boletim_de_materializado(boletim_servidor, materias_aluno)
+    return consulta_notas.boletim_do_aluno(carregar_json(NOTAS_FILE), ra_aluno, materias_aluno)
+
+def verificar_atividade_ja_respondida(atividade_id, ra_aluno):
+    """Verifica se um aluno específico já respondeu uma atividade específica"""
+    data_resposta = carregar_atividades_respondidas(ra_aluno).get(str(atividade_id))
+    if data_resposta is not None:
+        return True, data_resposta
     return False, None
 
-def obter_status_atividade_aluno(atividade, ra_aluno):
-    """Obtém o status da atividade para o aluno específico"""
+def obter_status_atividade_aluno(atividade, ra_aluno, respondidas=None):
+    """
+    Obtém o status da atividade para o aluno específico.
+    'respondidas' (de carregar_atividades_respondidas) evita uma consulta por atividade.
+    """
     if atividade.get('status') != 'Liberada':
         return 'Não Liberada'
     
@@ -261,13 +401,358 @@ def obter_status_atividade_aluno(atividade, ra_aluno):
         return 'Expirada'
     
     # Verificar se já foi respondida
-    ja_respondida, _ = verificar_atividade_ja_respondida(atividade.get('id'), ra_aluno)
-    if ja_respondida:
+    if respondidas is None:
+        respondidas = carregar_atividades_respondidas(ra_aluno)
+    if str(atividade.get('id')) in respondidas:
         return 'Respondida'
     
     return 'Disponível'
 
 
+# Atualizações pedidas pelo feed de alterações do servidor. O feed roda
+# numa thread própria; a thread da interface executa as atualizações.
+_atualizacoes_pendentes = queue.Queue()
+ATUALIZACOES_INTERVALO_MS = 300
+
+def assinar_alteracoes(widget, arquivos, atualizar):
+    """
+    Executa atualizar() quando algum dos arquivos mudar no servidor, enquanto
+    o widget existir (a assinatura é cancelada quando ele é destruído).
+    No modo local não há feed: continua valendo o botão Atualizar.
+    """
+    if not USE_PROXY:
+        return None
+    ident = proxy.assinar_alteracoes(
+        [os.path.basename(a) for a in arquivos],
+        lambda alterados: _atualizacoes_pendentes.put((widget, atualizar))
+    )
+    widget.bind('<Destroy>', lambda e: proxy.cancelar_assinatura(ident) if e.widget is widget else None, add='+')
+    return ident
+
+def processar_atualizacoes_pendentes():
+    """Executa cada atualização pendente uma única vez (se o widget ainda existe)"""
+    executadas = set()
+    while True:
+        try:
+            widget, atualizar = _atualizacoes_pendentes.get_nowait()
+        except queue.Empty:
+            return
+        if atualizar in executadas:
+            continue
+        executadas.add(atualizar)
+        try:
+            if widget.winfo_exists():
+                atualizar()
+        except tk.TclError:
+            pass  # widget destruído no meio da atualização
+
+
+# Carregamento em segundo plano: as chamadas ao servidor rodam num pool de
+# threads e o resultado volta para a thread do Tk por uma fila lida com
+# after(), então a janela continua respondendo enquanto a rede demora.
+# As funções executadas no pool só acessam dados, nunca widgets.
+CARREGAMENTO_THREADS = 4
+CARREGAMENTO_INTERVALO_MS = 15
+
+def mostrar_carregando(widget, texto='⏳ Carregando...'):
+    """Aviso sobre o widget (lista ou aba) enquanto os dados chegam"""
+    if getattr(widget, '_aviso_carregando', None) is None:
+        aviso = ttk.Label(widget, text=texto)
+        aviso.place(relx=0.5, rely=0.5, anchor='center')
+        widget._aviso_carregando = aviso
+
+def remover_carregando(widget):
+    aviso = getattr(widget, '_aviso_carregando', None)
+    if aviso is not None:
+        aviso.destroy()
+        widget._aviso_carregando = None
+
+class CarregadorAssincrono:
+    """
+    Executa funções no pool e entrega o resultado na thread do Tk.
+
+    Cada carga pertence a um widget, onde o aviso de carregamento aparece.
+    Uma carga nova do mesmo grupo (por padrão, o mesmo widget) torna a
+    anterior obsoleta; cargas de widgets destruídos são descartadas; e,
+    ao trocar de aba, as cargas das abas que saíram de vista são canceladas
+    e refeitas quando elas voltarem a aparecer.
+    """
+
+    def __init__(self, threads=CARREGAMENTO_THREADS):
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='carregamento')
+        self._resultados = queue.Queue()
+        self._raiz = None
+        self._agendado = False
+        self._processando = False
+        self._pendentes = 0
+        self._geracao = {}      # grupo -> geração da carga mais recente
+        self._em_andamento = {} # grupo -> (future, widget, recarregar)
+        self._suspensas = {}    # grupo -> (widget, recarregar), canceladas por troca de aba
+        self._perguntas_lock = threading.Lock()
+        self._encerrado = False
+
+    def iniciar(self, raiz):
+        """Define a janela principal (dona dos after())"""
+        self._raiz = raiz
+
+    def executar(self, widget, funcao, ao_concluir, recarregar=None, grupo=None, aviso=True, ao_falhar=None,
+                 falha='Falha ao carregar os dados'):
+        """
+        Roda funcao() no pool e, na thread do Tk, ao_concluir(resultado).
+        'recarregar' refaz a carga se ela for cancelada por troca de aba
+        (sem ele a carga nunca é cancelada). Falhas são exibidas numa
+        mensagem ('falha: erro') e, depois, passadas a ao_falhar(erro).
+        """
+        grupo = grupo or str(widget)
+        geracao = self._geracao.get(grupo, 0) + 1
+        self._geracao[grupo] = geracao
+        self._suspensas.pop(grupo, None)
+        anterior = self._em_andamento.get(grupo)
+        if anterior is not None:
+            anterior[0].cancel()  # só tem efeito se ainda não começou
+
+        if aviso:
+            mostrar_carregando(widget)
+        futuro = self._pool.submit(funcao)
+        self._em_andamento[grupo] = (futuro, widget, recarregar)
+        self._pendentes += 1
+        futuro.add_done_callback(
+            lambda f: self._resultados.put(('carga', grupo, geracao, widget, f, ao_concluir, ao_falhar, falha)))
+        self._agendar()
+        return futuro
+
+    def acao(self, widget, funcao, ao_concluir=None, falha='Falha ao salvar os dados'):
+        """
+        Como executar(), para ações do usuário (gravar, abrir uma janela):
+        funcao() roda no pool - lendo, alterando e chamando salvar_json() -
+        e ao_concluir(resultado) na thread do Tk. A ação não substitui a
+        carga da lista do widget nem é cancelada por troca de aba; enquanto
+        ela não termina, outra ação do mesmo widget é ignorada (clique
+        duplo em Salvar não grava duas vezes).
+        """
+        grupo = 'acao:' + str(widget)
+        if grupo in self._em_andamento:
+            return None
+        return self.executar(widget, funcao, ao_concluir or (lambda resultado: None),
+                             grupo=grupo, aviso=False, falha=falha)
+
+    def mensagem(self, funcao, args, kwargs):
+        """Exibe uma mensagem (messagebox) pedida por uma thread do pool"""
+        self._resultados.put(('mensagem', funcao, args, kwargs))
+
+    def perguntar(self, funcao, args, kwargs):
+        """
+        Faz uma pergunta (askyesno etc.) pedida por uma thread do pool e
+        espera a resposta da thread do Tk. Depois de encerrar() a pergunta
+        é cancelada (CancelledError) em vez de esperar para sempre.
+        """
+        resposta = Future()
+        with self._perguntas_lock:
+            if self._encerrado:
+                resposta.cancel()
+            else:
+                self._resultados.put(('pergunta', funcao, args, kwargs, resposta))
+        return resposta.result()
+
+    def encerrar(self):
+        """Cancela as perguntas sem resposta (a janela foi fechada)"""
+        with self._perguntas_lock:
+            self._encerrado = True
+            while True:
+                try:
+                    item = self._resultados.get_nowait()
+                except queue.Empty:
+                    break
+                if item[0] == 'pergunta':
+                    item[-1].cancel()
+
+    def aba_trocada(self, tabview):
+        """Cancela as cargas das abas ocultas do tabview e refaz as da aba exibida"""
+        prefixo = str(tabview) + '.'
+        atual = str(tabview.tab(tabview.get())) + '.'
+        for grupo, (futuro, widget, recarregar) in list(self._em_andamento.items()):
+            caminho = str(widget) + '.'
+            if recarregar and caminho.startswith(prefixo) and not caminho.startswith(atual):
+                self._geracao[grupo] += 1
+                futuro.cancel()
+                del self._em_andamento[grupo]
+                self._suspensas[grupo] = (widget, recarregar)
+        for grupo, (widget, recarregar) in list(self._suspensas.items()):
+            if (str(widget) + '.').startswith(atual):
+                del self._suspensas[grupo]
+                if widget.winfo_exists():
+                    recarregar()
+
+    def _agendar(self):
+        if not self._agendado and self._raiz is not None:
+            self._agendado = True
+            self._raiz.after(CARREGAMENTO_INTERVALO_MS, self._entregar)
+
+    def _entregar(self):
+        self._agendado = False
+        self.processar()
+        if self._pendentes:
+            self._agendar()
+
+    def processar(self):
+        """Entrega os resultados prontos (chamar na thread do Tk)"""
+        if self._processando:
+            return  # chamada de dentro de uma mensagem modal
+        self._processando = True
+        mensagens = []
+        try:
+            while True:
+                try:
+                    item = self._resultados.get_nowait()
+                except queue.Empty:
+                    break
+                if item[0] == 'mensagem':
+                    # Várias cargas falhando juntas: cada mensagem aparece uma vez
+                    if item[1:] not in mensagens:
+                        mensagens.append(item[1:])
+                    continue
+                if item[0] == 'pergunta':
+                    # Cada pergunta tem quem espera a resposta: nunca é agrupada
+                    self._responder(*item[1:])
+                    continue
+                self._entregar_carga(*item[1:])
+            for funcao, args, kwargs in mensagens:
+                funcao(*args, **kwargs)
+        finally:
+            self._processando = False
+
+    def _responder(self, funcao, args, kwargs, resposta):
+        if not resposta.set_running_or_notify_cancel():
+            return
+        try:
+            resposta.set_result(funcao(*args, **kwargs))
+        except BaseException as erro:
+            resposta.set_exception(erro)
+
+    def _entregar_carga(self, grupo, geracao, widget, futuro, ao_concluir, ao_falhar, falha):
+        self._pendentes -= 1
+        if self._geracao.get(grupo) != geracao or futuro.cancelled():
+            return  # obsoleta: já existe uma carga mais nova (ou a aba saiu de vista)
+        del self._em_andamento[grupo]
+        try:
+            if not widget.winfo_exists():
+                return
+            remover_carregando(widget)
+            erro = futuro.exception()
+            if erro is not None:
+                messagebox.showerror("Erro", f"{falha}: {erro}")
+                if ao_falhar is not None:
+                    ao_falhar(erro)
+                return
+            ao_concluir(futuro.result())
+        except tk.TclError:
+            pass  # widget destruído durante a atualização
+
+carregador = CarregadorAssincrono()
+
+class _MensagensNaInterface:
+    """
+    messagebox usado pelo proxy: chamadas feitas nas threads do pool são
+    repassadas à thread do Tk (o Tk não pode ser usado fora dela). Avisos
+    (show*) seguem sem esperar; perguntas (ask*) esperam a resposta.
+    """
+
+    def __getattr__(self, nome):
+        funcao = getattr(messagebox, nome)
+
+        def chamar(*args, **kwargs):
+            if threading.current_thread() is threading.main_thread():
+                return funcao(*args, **kwargs)
+            if nome.startswith('ask'):
+                return carregador.perguntar(funcao, args, kwargs)
+            carregador.mensagem(funcao, args, kwargs)
+            return None
+        return chamar
+
+
+TAMANHO_PAGINA = 100
+
+class ListaPaginada:
+    """
+    Preenche um ttk.Treeview página a página: a primeira página aparece
+    logo e a seguinte só é buscada quando a rolagem chega perto do fim,
+    então o tempo até a lista aparecer não cresce com o tamanho do arquivo.
+    """
+
+    def __init__(self, tree, file_path, campos=None, tamanho=TAMANHO_PAGINA, scrollbar=None):
+        self.tree = tree
+        self.file_path = file_path
+        self.campos = campos
+        self.tamanho = tamanho
+        self.scrollbar = scrollbar
+        self.total = 0
+        self._inserir = None
+        self._consulta = {}
+        self._chave = None
+        self._cursor = None
+        self._fim = True
+        self._agendada = False
+        self._carregando = False
+        self._ao_carregar = None
+        tree.configure(yscrollcommand=self._ao_rolar)
+
+    def recarregar(self, inserir, chave=None, ao_carregar=None, **consulta):
+        """
+        Limpa a lista e exibe a primeira página da consulta (em segundo plano).
+        'inserir(registro)' insere uma linha; 'chave' é o campo (ou a lista de
+        campos) único que desempata a ordenação, ex.: 'id'; sem ela só a
+        primeira página é carregada; 'ao_carregar()' é chamado depois
+        que a primeira página aparece.
+        """
+        self.tree.delete(*self.tree.get_children())
+        self._inserir = inserir
+        self._chave = chave
+        self._consulta = consulta
+        self._cursor = None
+        self._fim = False
+        self._carregando = False
+        self._ao_carregar = ao_carregar
+        self.carregar_proxima()
+
+    def carregar_proxima(self):
+        """Busca e insere a próxima página (nada a fazer se já chegou ao fim)"""
+        self._agendada = False
+        if self._fim or self._carregando:
+            return
+        self._carregando = True
+        cursor, chave, consulta = self._cursor, self._chave, self._consulta
+        carregador.executar(
+            self.tree,
+            lambda: consultar_pagina_json(self.file_path, self.tamanho, cursor, chave, self.campos, **consulta),
+            self._pagina_recebida,
+            recarregar=self._refazer_pagina,
+            aviso=cursor is None
+        )
+
+    def _refazer_pagina(self):
+        self._carregando = False
+        self.carregar_proxima()
+
+    def _pagina_recebida(self, pagina):
+        registros, self._cursor, self.total = pagina
+        self._carregando = False
+        self._fim = self._cursor is None
+        for registro in registros:
+            self._inserir(registro)
+        if self._ao_carregar is not None:
+            ao_carregar, self._ao_carregar = self._ao_carregar, None
+            ao_carregar()
+
+    def _ao_rolar(self, primeiro, ultimo):
+        if self.scrollbar is not None:
+            self.scrollbar.set(primeiro, ultimo)
+        # Perto do fim da parte visível (ou lista ainda sem rolagem): próxima página
+        # (uma única busca agendada, mesmo com vários eventos de rolagem)
+        if not self._fim and not self._agendada and float(ultimo) >= 0.9:
+            self._agendada = True
+            self.tree.after_idle(self.carregar_proxima)
+
+
 class App(customtkinter.CTk):
     def __init__(self):
         super().__init__()
@@ -278,9 +763,19 @@ class App(customtkinter.CTk):
         self.series_disponiveis = [f"{i}ª Série" for i in range(1, 10)]
         self.turmas_disponiveis = ['A', 'B', 'C', 'D', 'E']
         
-        # Cache simples para dados frequentemente acessados
-        self._cache_usuarios = None
-        self._cache_timestamp = 0
+        # Estatísticas do cache de leitura do proxy (F12)
+        self.bind('<F12>', lambda e: self._mostrar_estatisticas_cache())
+        
+        # Cargas em segundo plano entregam o resultado por after() desta janela;
+        # as mensagens de erro do proxy (emitidas no pool) vêm para a thread do Tk
+        carregador.iniciar(self)
+        if USE_PROXY:
+            proxy.messagebox = _MensagensNaInterface()
+
+        # Telas abertas se atualizam quando o servidor avisa de alterações
+        self.after(ATUALIZACOES_INTERVALO_MS, self._processar_alteracoes)
+        # Situação do modo offline mostrada no título da janela
+        self._situacao_offline = None
 
         customtkinter.set_appearance_mode("System")
         customtkinter.set_default_color_theme("blue")
@@ -372,8 +867,9 @@ class App(customtkinter.CTk):
         show_pass_btn.configure(command=toggle_login_pass)
 
         # Botões
-        customtkinter.CTkButton(inner_frame, text='Entrar', command=self.autenticar, 
-                               height=45, font=customtkinter.CTkFont(size=14, weight="bold")).pack(fill='x', padx=30, pady=(0, 15))
+        self.btn_entrar = customtkinter.CTkButton(inner_frame, text='Entrar', command=self.autenticar, 
+                               height=45, font=customtkinter.CTkFont(size=14, weight="bold"))
+        self.btn_entrar.pack(fill='x', padx=30, pady=(0, 15))
         
         # Botão para solicitar matrícula
         customtkinter.CTkButton(inner_frame, text='Solicitar Matrícula', 
@@ -443,35 +939,40 @@ class App(customtkinter.CTk):
 Nome do Aluno: {nome}
 Data de Nascimento: {nascimento}"""
             
-            # Salvar pedido
-            pedidos = carregar_json(PEDIDOS_FILE)
-            
-            # Gerar novo ID
-            novo_id = max([p.get('id', 0) for p in pedidos], default=0) + 1
-            
             # Data atual formatada
             data_atual = datetime.now().strftime('%d/%m/%Y %H:%M')
             
-            # Criar novo pedido com dados simplificados
-            novo_pedido = {
-                "id": novo_id,
-                "data": data_atual,
-                "tipo": "Matrícula",
-                "status": "Pendente",
-                "descricao": descricao,
-                "aluno_ra": None,  # Não tem RA pois ainda não é aluno
-                "solicitante_nome": nome,
-                # Dados simplificados
-                "Nome": nome,
-                "Data de Nascimento": nascimento
-            }
+            def gravar_pedido():
+                # Salvar pedido (em segundo plano)
+                pedidos = carregar_json(PEDIDOS_FILE)
+                
+                # Gerar novo ID
+                novo_id = max([p.get('id', 0) for p in pedidos], default=0) + 1
+                
+                # Criar novo pedido com dados simplificados
+                novo_pedido = {
+                    "id": novo_id,
+                    "data": data_atual,
+                    "tipo": "Matrícula",
+                    "status": "Pendente",
+                    "descricao": descricao,
+                    "aluno_ra": None,  # Não tem RA pois ainda não é aluno
+                    "solicitante_nome": nome,
+                    # Dados simplificados
+                    "Nome": nome,
+                    "Data de Nascimento": nascimento
+                }
+                
+                # Adicionar à lista e salvar
+                pedidos.append(novo_pedido)
+                salvar_json(PEDIDOS_FILE, pedidos)
+                return novo_id
             
-            # Adicionar à lista e salvar
-            pedidos.append(novo_pedido)
-            salvar_json(PEDIDOS_FILE, pedidos)
+            def pedido_enviado(novo_id):
+                messagebox.showinfo("Sucesso", f"Solicitação de matrícula enviada com sucesso!\n\nAluno: {nome}\nProtocolo: {novo_id:06d}\n\nEntraremos em contato em breve.", parent=top)
+                top.destroy()
             
-            messagebox.showinfo("Sucesso", f"Solicitação de matrícula enviada com sucesso!\n\nAluno: {nome}\nProtocolo: {novo_id:06d}\n\nEntraremos em contato em breve.", parent=top)
-            top.destroy()
+            carregador.acao(top, gravar_pedido, pedido_enviado)
         
         # Botões de ação
         botoes_frame = customtkinter.CTkFrame(main_frame, fg_color="transparent")
@@ -490,36 +991,75 @@ Data de Nascimento: {nascimento}"""
                               command=enviar_solicitacao).pack(side='right', padx=(10, 0), expand=True, fill='x')
 
     def autenticar(self):
+        if self.btn_entrar.cget('state') == 'disabled':
+            return  # login já em andamento (Enter repetido)
         user_input = self.entry_user.get().strip()
         pwd_input = self.entry_pass.get().strip()
-        
-        usuarios = carregar_todos_usuarios()
-        # Permite login com 'usuario' ou 'ra'
-        u = next((x for x in usuarios if x['usuario'] == user_input or x.get('ra') == user_input), None)
+
+        if USE_PROXY:
+            # Busca indexada no servidor, que também confere a senha:
+            # a base de usuários (e os hashes) não é baixada.
+            # A consulta roda em segundo plano; a janela continua respondendo.
+            self._login_em_andamento(True)
+            carregador.executar(
+                self.login_frame,
+                lambda: proxy.autenticar_usuario(user_input, pwd_input),
+                lambda resultado: self._concluir_autenticacao(user_input, pwd_input, resultado),
+                aviso=False,
+                ao_falhar=lambda erro: self._login_em_andamento(False)
+            )
+        else:
+            self._concluir_autenticacao(user_input, pwd_input)
+
+    def _login_em_andamento(self, ativo):
+        self.btn_entrar.configure(state='disabled' if ativo else 'normal',
+                                  text='Entrando...' if ativo else 'Entrar')
+
+    def _concluir_autenticacao(self, user_input, pwd_input, resultado=None):
+        self._login_em_andamento(False)
+        autenticado = False
+        migrar_senha = False
+
+        if USE_PROXY:
+            if resultado is None:
+                return
+            u = resultado['usuario']
+            if resultado['verificado']:
+                autenticado = u is not None
+                migrar_senha = resultado['migrar_senha']
+        else:
+            usuarios = carregar_todos_usuarios()
+            # Permite login com 'usuario' ou 'ra'
+            u = next((x for x in usuarios if x['usuario'] == user_input or x.get('ra') == user_input), None)
         
         if not u:
             messagebox.showerror('Erro', 'Credenciais inválidas.')
             return
 
-        senha_armazenada = u['senha']
-        autenticado = False
+        if not autenticado and 'senha' in u:
+            senha_armazenada = u['senha']
 
-        # Verifica se a senha armazenada já está criptografada
-        if senha_armazenada.startswith('$2b$'):
-            if bcrypt.checkpw(pwd_input.encode('utf-8'), senha_armazenada.encode('utf-8')):
-                autenticado = True
-        else:
-            # Se não estiver, compara como texto plano (para migração)
-            if senha_armazenada == pwd_input:
-                autenticado = True
-                # Criptografa a senha e atualiza o arquivo
-                valida, msg = self._validar_senha(pwd_input)
-                if valida:
-                    hashed_pw = bcrypt.hashpw(pwd_input.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                    u['senha'] = hashed_pw
-                    salvar_usuario_por_tipo(u)
-                else:
-                    messagebox.showwarning("Senha Fraca", f"Sua senha é fraca e precisa ser atualizada. Por favor, contate um administrador.\nMotivo: {msg}")
+            # Verifica se a senha armazenada já está criptografada
+            if senha_armazenada.startswith('$2b$'):
+                if bcrypt.checkpw(pwd_input.encode('utf-8'), senha_armazenada.encode('utf-8')):
+                    autenticado = True
+            else:
+                # Se não estiver, compara como texto plano (para migração)
+                if senha_armazenada == pwd_input:
+                    autenticado = True
+                    migrar_senha = True
+
+        if migrar_senha:
+            # Criptografa a senha e atualiza o arquivo
+            valida, msg = self._validar_senha(pwd_input)
+            if valida:
+                hashed_pw = bcrypt.hashpw(pwd_input.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+                u['senha'] = hashed_pw
+                # Grava em segundo plano; o painel abre sem esperar
+                usuario_migrado = dict(u)
+                carregador.acao(self.login_frame, lambda: salvar_usuario_por_tipo(usuario_migrado))
+            else:
+                messagebox.showwarning("Senha Fraca", f"Sua senha é fraca e precisa ser atualizada. Por favor, contate um administrador.\nMotivo: {msg}")
 
         if not autenticado:
             messagebox.showerror('Erro', 'Credenciais inválidas.')
@@ -527,9 +1067,14 @@ Data de Nascimento: {nascimento}"""
 
         self.usuario_logado = u
         # atualizar mapa de professores sempre que houver login (útil após CRUD de usuários)
-        self.mapa_professores = gerar_mapa_professores()
-        self.login_frame.destroy()
-        self._build_dashboard()
+        self._login_em_andamento(True)
+
+        def abrir_dashboard(mapa):
+            self.mapa_professores = mapa
+            self.login_frame.destroy()
+            self._build_dashboard()
+        carregador.executar(self.login_frame, gerar_mapa_professores, abrir_dashboard, aviso=False,
+                            ao_falhar=lambda erro: self._login_em_andamento(False))
 
     # ================= DASHBOARD =================
     def _build_dashboard(self):
@@ -547,7 +1092,6 @@ Data de Nascimento: {nascimento}"""
             tab_admin = tabs.add('Admin')
             self._tab_admin(tab_admin)
         elif tipo == 'professor':
-            self.mapa_professores = gerar_mapa_professores()
             tab_prof = tabs.add('Professor')
             self._tab_prof(tab_prof)
         elif tipo == 'aluno':
@@ -575,11 +1119,20 @@ Data de Nascimento: {nascimento}"""
             self.destroy()
 
     # ================= ALUNO =================
+    def _carregar_aba(self, parent_tab, buscar, montar):
+        """
+        Busca os dados da aba em segundo plano e monta o conteúdo quando chegarem.
+        Se o usuário trocar de aba antes, a busca é refeita quando ela voltar a aparecer.
+        """
+        def carregar():
+            carregador.executar(parent_tab, buscar, montar, recarregar=carregar)
+        carregar()
+
     def _tab_aluno(self, parent_tab):
         """Cria a aba específica para alunos"""
         customtkinter.CTkLabel(parent_tab, text="Painel do Aluno", font=customtkinter.CTkFont(size=18, weight="bold")).pack(pady=(10, 5), padx=10, anchor='w')
 
-        tabs_inner = customtkinter.CTkTabview(parent_tab)
+        tabs_inner = customtkinter.CTkTabview(parent_tab, command=lambda: carregador.aba_trocada(tabs_inner))
         tabs_inner.pack(expand=True, fill='both')
 
         # Aba de Notas e Frequência
@@ -606,14 +1159,27 @@ Data de Nascimento: {nascimento}"""
                                  font=customtkinter.CTkFont(size=16)).pack(pady=50)
             return
 
-        # Encontrar a turma do aluno
-        turmas = carregar_json(TURMAS_FILE)
-        turma_aluno = None
-        for t in turmas:
-            if ra_aluno in t.get('alunos', []):
-                turma_aluno = t
-                break
+        self._carregar_aba(parent_tab, lambda: self._dados_boletim_aluno(ra_aluno),
+                           lambda dados: self._montar_notas_aluno(parent_tab, *dados))
+
+    def _dados_boletim_aluno(self, ra_aluno):
+        """Turma, matérias da turma e boletim do aluno (executado no pool de carregamento)"""
+        materias = carregar_json(MATERIAS_FILE, CAMPOS_MATERIA_ALUNO)
         
+        # Encontrar a turma do aluno (índice RA -> turma)
+        turma_aluno = buscar_turma_do_aluno(ra_aluno)
+        if not turma_aluno:
+            return None, [], []
+
+        # Filtrar matérias da turma do aluno pelo ID da turma
+        turma_id = turma_aluno.get('id')
+        materias_aluno = [m for m in materias if m.get('turma_id') == turma_id]
+        
+        # Boletim pronto (servidor) ou calculado numa passada pelo índice de notas
+        boletim = carregar_boletim_aluno(ra_aluno, materias_aluno) if materias_aluno else []
+        return turma_aluno, materias_aluno, boletim
+
+    def _montar_notas_aluno(self, parent_tab, turma_aluno, materias_aluno, boletim):
         if not turma_aluno:
             customtkinter.CTkLabel(parent_tab, text="Você ainda não foi matriculado em nenhuma turma.", 
                                  font=customtkinter.CTkFont(size=16)).pack(pady=50)
@@ -639,50 +1205,16 @@ Data de Nascimento: {nascimento}"""
         
         tree_notas.pack(fill='both', expand=True, padx=10, pady=10)
 
-        # Carregar notas
-        materias = carregar_json(MATERIAS_FILE)
-        notas = carregar_json(NOTAS_FILE)
-        
-        # Filtrar matérias da turma do aluno pelo ID da turma
-        turma_id = turma_aluno.get('id')
-        materias_aluno = [m for m in materias if m.get('turma_id') == turma_id]
-        
-        for materia in materias_aluno:
-            materia_id = materia['id']
-            nome_materia = materia['nome']
-            
-            # Inicializar valores
-            valores = [nome_materia]
-            medias_bimestrais = []
+        for linha in boletim:
+            valores = [linha['nome']]
             
-            for bim in range(1, 5):
-                bim_prefix = f"B{bim}"
-                
-                # Buscar notas NP1 e NP2
-                nota_np1 = next((n for n in notas if n.get('aluno_ra') == ra_aluno and n.get('materia_id') == materia_id and n.get('tipo_nota') == f"{bim_prefix}_NP1"), None)
-                nota_np2 = next((n for n in notas if n.get('aluno_ra') == ra_aluno and n.get('materia_id') == materia_id and n.get('tipo_nota') == f"{bim_prefix}_NP2"), None)
-                
-                val_np1 = nota_np1.get('valor') if nota_np1 else "N/L"
-                val_np2 = nota_np2.get('valor') if nota_np2 else "N/L"
-                
-                # Calcular média bimestral
-                if isinstance(val_np1, (int, float)) and isinstance(val_np2, (int, float)):
-                    media_bim = (val_np1 + val_np2) / 2
-                    media_bim_str = f"{media_bim:.2f}"
-                    medias_bimestrais.append(media_bim)
-                else:
-                    media_bim_str = "N/L"
-                
+            for b in linha['bimestres']:
+                val_np1 = b['np1'] if b['np1'] is not None else "N/L"
+                val_np2 = b['np2'] if b['np2'] is not None else "N/L"
+                media_bim_str = f"{b['media']:.2f}" if b['media'] is not None else "N/L"
                 valores.extend([val_np1, val_np2, media_bim_str])
             
-            # Calcular média final
-            if medias_bimestrais:
-                media_final = sum(medias_bimestrais) / len(medias_bimestrais)
-                media_final_str = f"{media_final:.2f}"
-            else:
-                media_final_str = "N/A"
-            
-            valores.append(media_final_str)
+            valores.append(f"{linha['media_final']:.2f}" if linha['media_final'] is not None else "N/A")
             tree_notas.insert('', 'end', values=valores)
 
     def _aluno_boletim_bimestral_tab(self, parent_tab):
@@ -694,14 +1226,10 @@ Data de Nascimento: {nascimento}"""
                                  font=customtkinter.CTkFont(size=16)).pack(pady=50)
             return
 
-        # Encontrar a turma do aluno
-        turmas = carregar_json(TURMAS_FILE)
-        turma_aluno = None
-        for t in turmas:
-            if ra_aluno in t.get('alunos', []):
-                turma_aluno = t
-                break
-        
+        self._carregar_aba(parent_tab, lambda: self._dados_boletim_aluno(ra_aluno),
+                           lambda dados: self._montar_boletim_bimestral(parent_tab, ra_aluno, *dados))
+
+    def _montar_boletim_bimestral(self, parent_tab, ra_aluno, turma_aluno, materias_aluno, boletim):
         if not turma_aluno:
             customtkinter.CTkLabel(parent_tab, text="Você ainda não foi matriculado em nenhuma turma.", 
                                  font=customtkinter.CTkFont(size=16)).pack(pady=50)
@@ -723,23 +1251,14 @@ Data de Nascimento: {nascimento}"""
         customtkinter.CTkLabel(header_frame, text=info_text, 
                               font=customtkinter.CTkFont(size=12)).pack(pady=(0, 15))
 
-        # Carregar dados
-        materias = carregar_json(MATERIAS_FILE)
-        notas = carregar_json(NOTAS_FILE)
-        
-        # Filtrar matérias da turma do aluno pelo ID da turma
-        turma_id = turma_aluno.get('id')
-        materias_aluno = [m for m in materias if m.get('turma_id') == turma_id]
-        
         if not materias_aluno:
             customtkinter.CTkLabel(main_frame, text="Nenhuma matéria encontrada para sua turma.", 
                                  font=customtkinter.CTkFont(size=16)).pack(pady=50)
             return
 
-        # Criar boletim por bimestre
         medias_finais_por_materia = {}
         
-        for bimestre in range(1, 5):
+        for bimestre in consulta_notas.BIMESTRES:
             bim_frame = customtkinter.CTkFrame(main_frame)
             bim_frame.pack(fill='x', pady=(0, 15))
             
@@ -767,31 +1286,19 @@ Data de Nascimento: {nascimento}"""
             
             tree_bimestre.pack(fill='x', padx=15, pady=(0, 10))
             
-            # Carregar notas do bimestre
+            # Notas do bimestre
             medias_bimestre = []
-            bim_prefix = f"B{bimestre}"
             
-            for materia in materias_aluno:
-                materia_id = materia['id']
-                nome_materia = materia['nome']
-                
-                # Buscar notas NP1 e NP2 do bimestre
-                nota_np1 = next((n for n in notas if 
-                               n.get('aluno_ra') == ra_aluno and 
-                               n.get('materia_id') == materia_id and 
-                               n.get('tipo_nota') == f"{bim_prefix}_NP1"), None)
-                
-                nota_np2 = next((n for n in notas if 
-                               n.get('aluno_ra') == ra_aluno and 
-                               n.get('materia_id') == materia_id and 
-                               n.get('tipo_nota') == f"{bim_prefix}_NP2"), None)
+            for linha in boletim:
+                nome_materia = linha['nome']
+                b = linha['bimestres'][bimestre - 1]
                 
-                val_np1 = nota_np1.get('valor') if nota_np1 else "N/L"
-                val_np2 = nota_np2.get('valor') if nota_np2 else "N/L"
+                val_np1 = b['np1'] if b['np1'] is not None else "N/L"
+                val_np2 = b['np2'] if b['np2'] is not None else "N/L"
                 
-                # Calcular média do bimestre
-                if isinstance(val_np1, (int, float)) and isinstance(val_np2, (int, float)):
-                    media_bim = (val_np1 + val_np2) / 2
+                # Média do bimestre
+                if b['media'] is not None:
+                    media_bim = b['media']
                     media_str = f"{media_bim:.2f}"
                     
                     # Armazenar para cálculo da média final
@@ -928,27 +1435,29 @@ Data de Nascimento: {nascimento}"""
                               hover_color="#e0a800",
                               font=customtkinter.CTkFont(weight="bold")).pack(side='right', padx=5)
 
+    def _dados_relatorio_aluno(self, ra_aluno):
+        """Cadastro do aluno e dados do boletim (executado no pool de carregamento)"""
+        usuarios = carregar_json(ALUNOS_FILE, ['ra', 'nome'])
+        aluno_info = next((u for u in usuarios if u.get('ra') == ra_aluno), None)
+        if not aluno_info:
+            return None, None, [], []
+        return (aluno_info,) + self._dados_boletim_aluno(ra_aluno)
+
     def _gerar_relatorio_boletim(self, ra_aluno):
         """Gera um relatório detalhado do boletim do aluno"""
+        # Buscar todos os dados do relatório em segundo plano
+        carregador.acao(self, lambda: self._dados_relatorio_aluno(ra_aluno),
+                        lambda dados: self._exibir_relatorio_boletim(ra_aluno, *dados),
+                        falha="Erro ao gerar relatório")
+
+    def _exibir_relatorio_boletim(self, ra_aluno, aluno_info, turma_aluno, materias_aluno, boletim):
         try:
             from datetime import datetime
             
-            # Buscar dados do aluno
-            usuarios = carregar_json(ALUNOS_FILE)
-            aluno_info = next((u for u in usuarios if u.get('ra') == ra_aluno), None)
-            
             if not aluno_info:
                 messagebox.showerror("Erro", "Dados do aluno não encontrados.")
                 return
             
-            # Encontrar turma
-            turmas = carregar_json(TURMAS_FILE)
-            turma_aluno = None
-            for t in turmas:
-                if ra_aluno in t.get('alunos', []):
-                    turma_aluno = t
-                    break
-            
             if not turma_aluno:
                 messagebox.showerror("Erro", "Turma do aluno não encontrada.")
                 return
@@ -968,44 +1477,26 @@ Data de Nascimento: {nascimento}"""
 
 """
             
-            # Carregar dados para o relatório
-            materias = carregar_json(MATERIAS_FILE)
-            notas = carregar_json(NOTAS_FILE)
-            turma_id = turma_aluno.get('id')
-            materias_aluno = [m for m in materias if m.get('turma_id') == turma_id]
-            
             if not materias_aluno:
                 relatorio += "\n❌ Nenhuma matéria encontrada para esta turma.\n"
             else:
                 relatorio += "\n📚 NOTAS POR BIMESTRE:\n" + "="*60 + "\n"
                 
-                # Processar cada bimestre
+                # Processar cada bimestre (boletim pronto do servidor ou calculado pelo índice de notas)
                 medias_finais = {}
                 
-                for bimestre in range(1, 5):
+                for bimestre in consulta_notas.BIMESTRES:
                     relatorio += f"\n🔸 {bimestre}º BIMESTRE:\n" + "-" * 40 + "\n"
-                    bim_prefix = f"B{bimestre}"
                     
-                    for materia in materias_aluno:
-                        materia_id = materia['id']
-                        nome_materia = materia['nome']
-                        
-                        # Buscar notas
-                        nota_np1 = next((n for n in notas if 
-                                       n.get('aluno_ra') == ra_aluno and 
-                                       n.get('materia_id') == materia_id and 
-                                       n.get('tipo_nota') == f"{bim_prefix}_NP1"), None)
-                        
-                        nota_np2 = next((n for n in notas if 
-                                       n.get('aluno_ra') == ra_aluno and 
-                                       n.get('materia_id') == materia_id and 
-                                       n.get('tipo_nota') == f"{bim_prefix}_NP2"), None)
+                    for linha in boletim:
+                        nome_materia = linha['nome']
+                        b = linha['bimestres'][bimestre - 1]
                         
-                        val_np1 = nota_np1.get('valor') if nota_np1 else "N/L"
-                        val_np2 = nota_np2.get('valor') if nota_np2 else "N/L"
+                        val_np1 = b['np1'] if b['np1'] is not None else "N/L"
+                        val_np2 = b['np2'] if b['np2'] is not None else "N/L"
                         
-                        if isinstance(val_np1, (int, float)) and isinstance(val_np2, (int, float)):
-                            media_bim = (val_np1 + val_np2) / 2
+                        if b['media'] is not None:
+                            media_bim = b['media']
                             if nome_materia not in medias_finais:
                                 medias_finais[nome_materia] = []
                             medias_finais[nome_materia].append(media_bim)
@@ -1061,62 +1552,28 @@ Data de Nascimento: {nascimento}"""
 
     def _mostrar_estatisticas_aluno(self, ra_aluno):
         """Mostra estatísticas detalhadas do desempenho do aluno"""
+        # Buscar dados em segundo plano
+        carregador.acao(self, lambda: self._dados_relatorio_aluno(ra_aluno),
+                        lambda dados: self._exibir_estatisticas_aluno(*dados),
+                        falha="Erro ao calcular estatísticas")
+
+    def _exibir_estatisticas_aluno(self, aluno_info, turma_aluno, materias_aluno, boletim):
         try:
-            # Buscar dados
-            usuarios = carregar_json(ALUNOS_FILE)
-            aluno_info = next((u for u in usuarios if u.get('ra') == ra_aluno), None)
-            
             if not aluno_info:
                 messagebox.showerror("Erro", "Dados do aluno não encontrados.")
                 return
             
-            turmas = carregar_json(TURMAS_FILE)
-            turma_aluno = None
-            for t in turmas:
-                if ra_aluno in t.get('alunos', []):
-                    turma_aluno = t
-                    break
-            
-            materias = carregar_json(MATERIAS_FILE)
-            notas = carregar_json(NOTAS_FILE)
-            turma_id = turma_aluno.get('id')
-            materias_aluno = [m for m in materias if m.get('turma_id') == turma_id]
-            
-            # Calcular estatísticas
-            todas_medias = []
-            medias_por_bimestre = {1: [], 2: [], 3: [], 4: []}
+            # Calcular estatísticas (boletim pronto do servidor ou calculado pelo índice de notas)
+            medias_por_bimestre = consulta_notas.medias_por_bimestre(boletim)
+            todas_medias = [m for linha in boletim for m in (b['media'] for b in linha['bimestres']) if m is not None]
             melhor_materia = {"nome": "", "media": 0}
             pior_materia = {"nome": "", "media": 10}
             
-            for materia in materias_aluno:
-                materia_id = materia['id']
-                nome_materia = materia['nome']
-                medias_materia = []
+            for linha in boletim:
+                nome_materia = linha['nome']
+                media_final_materia = linha['media_final']
                 
-                for bimestre in range(1, 5):
-                    bim_prefix = f"B{bimestre}"
-                    
-                    nota_np1 = next((n for n in notas if 
-                                   n.get('aluno_ra') == ra_aluno and 
-                                   n.get('materia_id') == materia_id and 
-                                   n.get('tipo_nota') == f"{bim_prefix}_NP1"), None)
-                    
-                    nota_np2 = next((n for n in notas if 
-                                   n.get('aluno_ra') == ra_aluno and 
-                                   n.get('materia_id') == materia_id and 
-                                   n.get('tipo_nota') == f"{bim_prefix}_NP2"), None)
-                    
-                    val_np1 = nota_np1.get('valor') if nota_np1 else None
-                    val_np2 = nota_np2.get('valor') if nota_np2 else None
-                    
-                    if isinstance(val_np1, (int, float)) and isinstance(val_np2, (int, float)):
-                        media_bim = (val_np1 + val_np2) / 2
-                        medias_materia.append(media_bim)
-                        medias_por_bimestre[bimestre].append(media_bim)
-                        todas_medias.append(media_bim)
-                
-                if medias_materia:
-                    media_final_materia = sum(medias_materia) / len(medias_materia)
+                if media_final_materia is not None:
                     if media_final_materia > melhor_materia["media"]:
                         melhor_materia = {"nome": nome_materia, "media": media_final_materia}
                     if media_final_materia < pior_materia["media"]:
@@ -1209,14 +1666,11 @@ Data de Nascimento: {nascimento}"""
                                  font=customtkinter.CTkFont(size=16)).pack(pady=50)
             return
 
-        # Encontrar a turma do aluno
-        turmas = carregar_json(TURMAS_FILE)
-        turma_aluno = None
-        for t in turmas:
-            if ra_aluno in t.get('alunos', []):
-                turma_aluno = t
-                break
-        
+        # Encontrar a turma do aluno (índice RA -> turma)
+        self._carregar_aba(parent_tab, lambda: buscar_turma_do_aluno(ra_aluno),
+                           lambda turma_aluno: self._montar_atividades_aluno(parent_tab, ra_aluno, turma_aluno))
+
+    def _montar_atividades_aluno(self, parent_tab, ra_aluno, turma_aluno):
         if not turma_aluno:
             customtkinter.CTkLabel(parent_tab, text="Você ainda não foi matriculado em nenhuma turma.", 
                                  font=customtkinter.CTkFont(size=16)).pack(pady=50)
@@ -1252,14 +1706,27 @@ Data de Nascimento: {nascimento}"""
 
         def carregar_atividades():
             """Carrega atividades LIBERADAS e dentro do prazo para o aluno"""
+            carregador.executar(tree_atividades, buscar_atividades, preencher_atividades,
+                                recarregar=carregar_atividades)
+
+        def buscar_atividades():
+            # Carregar só os campos exibidos (sem perguntas e respostas das atividades)
+            materias = carregar_json(MATERIAS_FILE, CAMPOS_MATERIA_ALUNO)
+            registros_aula = carregar_json(REGISTROS_AULA_FILE, [
+                'materia_id', 'nome_aula', 'atividades.id', 'atividades.nome', 'atividades.tipo',
+                'atividades.data_entrega', 'atividades.pontuacao_maxima', 'atividades.status'
+            ])
+            
+            # Atividades já respondidas pelo aluno: uma consulta para a aba inteira
+            respondidas = carregar_atividades_respondidas(ra_aluno)
+            return materias, registros_aula, respondidas
+
+        def preencher_atividades(dados):
+            materias, registros_aula, respondidas = dados
             # Limpar tabela
             for item in tree_atividades.get_children():
                 tree_atividades.delete(item)
 
-            # Carregar dados necessários
-            materias = carregar_json(MATERIAS_FILE)
-            registros_aula = carregar_json(REGISTROS_AULA_FILE)
-            
             # Filtrar matérias da turma do aluno
             materias_aluno = [m for m in materias if m.get('turma_id') == turma_aluno.get('id')]
             
@@ -1281,16 +1748,13 @@ Data de Nascimento: {nascimento}"""
                 # Processar atividades do registro
                 atividades = registro.get('atividades', [])
                 for atividade in atividades:
-                    # Obter status da atividade para este aluno
-                    status_atividade = obter_status_atividade_aluno(atividade, ra_aluno)
-                    
                     # Só mostra atividades liberadas pelo professor
                     if atividade.get('status') != "Liberada":
                         continue
                     
                     # Status visual baseado no status real da atividade
                     data_entrega = atividade.get('data_entrega', '')
-                    status_real = obter_status_atividade_aluno(atividade, ra_aluno)
+                    status_real = obter_status_atividade_aluno(atividade, ra_aluno, respondidas)
                     
                     if status_real == 'Expirada':
                         status_visual = "⏰ Expirada"
@@ -1379,87 +1843,90 @@ Data de Nascimento: {nascimento}"""
         pontuacao_max = valores[5]
         status = valores[6]
         
-        # Buscar dados completos da atividade
-        registros_aula = carregar_json(REGISTROS_AULA_FILE)
-        atividade_completa = None
+        def exibir(registros_aula):
+            atividade_completa = None
         
-        for registro in registros_aula:
-            if registro.get('nome_aula') == nome_aula:
-                atividades = registro.get('atividades', [])
-                for ativ in atividades:
-                    if ativ.get('nome') == nome_atividade:
-                        atividade_completa = ativ
+            for registro in registros_aula:
+                if registro.get('nome_aula') == nome_aula:
+                    atividades = registro.get('atividades', [])
+                    for ativ in atividades:
+                        if ativ.get('nome') == nome_atividade:
+                            atividade_completa = ativ
+                            break
+                    if atividade_completa:
                         break
-                if atividade_completa:
-                    break
         
-        if not atividade_completa:
-            messagebox.showerror("Erro", "Detalhes da atividade não encontrados.")
-            return
+            if not atividade_completa:
+                messagebox.showerror("Erro", "Detalhes da atividade não encontrados.")
+                return
         
-        # Verificação de segurança: não permitir visualização de atividades não liberadas
-        if atividade_completa.get('status', 'Não Liberada') != "Liberada":
-            messagebox.showerror("Acesso Negado", "Esta atividade não está liberada para visualização.")
-            return
+            # Verificação de segurança: não permitir visualização de atividades não liberadas
+            if atividade_completa.get('status', 'Não Liberada') != "Liberada":
+                messagebox.showerror("Acesso Negado", "Esta atividade não está liberada para visualização.")
+                return
         
-        # Verificar prazo
-        if not verificar_prazo_atividade(atividade_completa.get('data_entrega', '')):
-            messagebox.showwarning("Prazo Expirado", "O prazo para esta atividade já expirou.")
-            # Continua permitindo visualização, mas não permite resposta
+            # Verificar prazo
+            if not verificar_prazo_atividade(atividade_completa.get('data_entrega', '')):
+                messagebox.showwarning("Prazo Expirado", "O prazo para esta atividade já expirou.")
+                # Continua permitindo visualização, mas não permite resposta
         
-        # Criar janela de detalhes
-        janela_detalhes = customtkinter.CTkToplevel(self)
-        janela_detalhes.title("Detalhes da Atividade")
-        janela_detalhes.geometry("700x600")
-        janela_detalhes.transient(self)
-        janela_detalhes.grab_set()
+            # Criar janela de detalhes
+            janela_detalhes = customtkinter.CTkToplevel(self)
+            janela_detalhes.title("Detalhes da Atividade")
+            janela_detalhes.geometry("700x600")
+            janela_detalhes.transient(self)
+            janela_detalhes.grab_set()
 
-        # Título
-        customtkinter.CTkLabel(janela_detalhes, text=nome_atividade, 
-                              font=customtkinter.CTkFont(size=18, weight="bold")).pack(pady=10)
+            # Título
+            customtkinter.CTkLabel(janela_detalhes, text=nome_atividade, 
+                                  font=customtkinter.CTkFont(size=18, weight="bold")).pack(pady=10)
+        
+            # Informações da atividade
+            info_frame = customtkinter.CTkFrame(janela_detalhes)
+            info_frame.pack(fill='x', padx=20, pady=10)
+        
+            infos = [
+                ("Matéria:", materia_nome),
+                ("Aula:", nome_aula),
+                ("Tipo:", tipo_atividade),
+                ("Data de Entrega:", data_entrega),
+                ("Pontuação Máxima:", pontuacao_max),
+                ("Status:", status)
+            ]
         
-        # Informações da atividade
-        info_frame = customtkinter.CTkFrame(janela_detalhes)
-        info_frame.pack(fill='x', padx=20, pady=10)
+            for i, (label, valor) in enumerate(infos):
+                customtkinter.CTkLabel(info_frame, text=label, font=customtkinter.CTkFont(weight="bold")).grid(row=i, column=0, sticky='w', padx=10, pady=5)
+                customtkinter.CTkLabel(info_frame, text=valor).grid(row=i, column=1, sticky='w', padx=10, pady=5)
         
-        infos = [
-            ("Matéria:", materia_nome),
-            ("Aula:", nome_aula),
-            ("Tipo:", tipo_atividade),
-            ("Data de Entrega:", data_entrega),
-            ("Pontuação Máxima:", pontuacao_max),
-            ("Status:", status)
-        ]
-        
-        for i, (label, valor) in enumerate(infos):
-            customtkinter.CTkLabel(info_frame, text=label, font=customtkinter.CTkFont(weight="bold")).grid(row=i, column=0, sticky='w', padx=10, pady=5)
-            customtkinter.CTkLabel(info_frame, text=valor).grid(row=i, column=1, sticky='w', padx=10, pady=5)
-        
-        # Descrição
-        customtkinter.CTkLabel(janela_detalhes, text="Descrição:", 
-                              font=customtkinter.CTkFont(weight="bold")).pack(anchor='w', padx=20, pady=(20,5))
-        
-        desc_textbox = customtkinter.CTkTextbox(janela_detalhes, height=80)
-        desc_textbox.pack(fill='x', padx=20, pady=(0,10))
-        desc_textbox.insert("1.0", atividade_completa.get('descricao', 'Sem descrição'))
-        desc_textbox.configure(state="disabled")
-        
-        # Mostrar perguntas baseado no tipo
-        perguntas = atividade_completa.get('perguntas', [])
-        if perguntas:
-            customtkinter.CTkLabel(janela_detalhes, text="Perguntas:", 
+            # Descrição
+            customtkinter.CTkLabel(janela_detalhes, text="Descrição:", 
                                   font=customtkinter.CTkFont(weight="bold")).pack(anchor='w', padx=20, pady=(20,5))
+        
+            desc_textbox = customtkinter.CTkTextbox(janela_detalhes, height=80)
+            desc_textbox.pack(fill='x', padx=20, pady=(0,10))
+            desc_textbox.insert("1.0", atividade_completa.get('descricao', 'Sem descrição'))
+            desc_textbox.configure(state="disabled")
+        
+            # Mostrar perguntas baseado no tipo
+            perguntas = atividade_completa.get('perguntas', [])
+            if perguntas:
+                customtkinter.CTkLabel(janela_detalhes, text="Perguntas:", 
+                                      font=customtkinter.CTkFont(weight="bold")).pack(anchor='w', padx=20, pady=(20,5))
             
-            perguntas_frame = customtkinter.CTkScrollableFrame(janela_detalhes, height=250)
-            perguntas_frame.pack(fill='both', expand=True, padx=20, pady=(0,10))
+                perguntas_frame = customtkinter.CTkScrollableFrame(janela_detalhes, height=250)
+                perguntas_frame.pack(fill='both', expand=True, padx=20, pady=(0,10))
             
-            if tipo_atividade == "Múltipla Escolha":
-                self._mostrar_perguntas_multipla_escolha(perguntas_frame, perguntas)
-            elif tipo_atividade == "Dissertativa":
-                self._mostrar_perguntas_dissertativas(perguntas_frame, perguntas)
+                if tipo_atividade == "Múltipla Escolha":
+                    self._mostrar_perguntas_multipla_escolha(perguntas_frame, perguntas)
+                elif tipo_atividade == "Dissertativa":
+                    self._mostrar_perguntas_dissertativas(perguntas_frame, perguntas)
         
-        # Botão fechar
-        customtkinter.CTkButton(janela_detalhes, text="Fechar", command=janela_detalhes.destroy).pack(pady=10)
+            # Botão fechar
+            customtkinter.CTkButton(janela_detalhes, text="Fechar", command=janela_detalhes.destroy).pack(pady=10)
+
+        # Buscar dados completos da atividade (em segundo plano)
+        carregador.acao(tree_atividades, lambda: carregar_json(REGISTROS_AULA_FILE), exibir,
+                        falha="Falha ao carregar os dados")
 
     def _mostrar_perguntas_multipla_escolha(self, parent_frame, perguntas):
         """Mostra as perguntas de múltipla escolha"""
@@ -1542,105 +2009,115 @@ Data de Nascimento: {nascimento}"""
             messagebox.showinfo("Atividade Respondida", "Você já respondeu esta atividade.")
             return
         
-        # Buscar dados completos da atividade
-        registros_aula = carregar_json(REGISTROS_AULA_FILE)
-        atividade_completa = None
-        registro_pai = None
-        
-        for registro in registros_aula:
-            if registro.get('nome_aula') == nome_aula:
-                atividades = registro.get('atividades', [])
-                for ativ in atividades:
-                    if ativ.get('nome') == nome_atividade:
-                        atividade_completa = ativ
-                        registro_pai = registro
+        def buscar():
+            # Dados completos da atividade e situação da resposta (em segundo plano)
+            registros_aula = carregar_json(REGISTROS_AULA_FILE)
+            atividade_completa = None
+            registro_pai = None
+            
+            for registro in registros_aula:
+                if registro.get('nome_aula') == nome_aula:
+                    atividades = registro.get('atividades', [])
+                    for ativ in atividades:
+                        if ativ.get('nome') == nome_atividade:
+                            atividade_completa = ativ
+                            registro_pai = registro
+                            break
+                    if atividade_completa:
                         break
-                if atividade_completa:
-                    break
+            
+            if not atividade_completa:
+                return None, None, (False, None)
+            return atividade_completa, registro_pai, verificar_atividade_ja_respondida(atividade_completa.get('id'), ra_aluno)
         
-        if not atividade_completa:
-            messagebox.showerror("Erro", "Detalhes da atividade não encontrados.")
-            return
+        def exibir(dados):
+            atividade_completa, registro_pai, situacao_resposta = dados
+            
+            if not atividade_completa:
+                messagebox.showerror("Erro", "Detalhes da atividade não encontrados.")
+                return
         
-        # Verificação final de prazo
-        if not verificar_prazo_atividade(atividade_completa.get('data_entrega', '')):
-            messagebox.showerror("Prazo Expirado", "O prazo para responder esta atividade já expirou.")
-            return
+            # Verificação final de prazo
+            if not verificar_prazo_atividade(atividade_completa.get('data_entrega', '')):
+                messagebox.showerror("Prazo Expirado", "O prazo para responder esta atividade já expirou.")
+                return
         
-        # VERIFICAÇÃO CRÍTICA: Confirmar se já foi respondida antes de abrir o formulário
-        ja_respondida, data_resposta = verificar_atividade_ja_respondida(atividade_completa.get('id'), ra_aluno)
-        if ja_respondida:
-            messagebox.showwarning("⚠️ Atividade Já Respondida", 
-                                   f"Você já respondeu esta atividade em {data_resposta}.\n\n"
-                                   f"🚫 REGRA: Cada aluno pode responder uma atividade apenas UMA VEZ.\n\n"
-                                   f"✅ Suas respostas já foram registradas no sistema.\n"
-                                   f"📋 Consulte seu professor para mais informações.")
-            return
+            # VERIFICAÇÃO CRÍTICA: Confirmar se já foi respondida antes de abrir o formulário
+            ja_respondida, data_resposta = situacao_resposta
+            if ja_respondida:
+                messagebox.showwarning("⚠️ Atividade Já Respondida", 
+                                       f"Você já respondeu esta atividade em {data_resposta}.\n\n"
+                                       f"🚫 REGRA: Cada aluno pode responder uma atividade apenas UMA VEZ.\n\n"
+                                       f"✅ Suas respostas já foram registradas no sistema.\n"
+                                       f"📋 Consulte seu professor para mais informações.")
+                return
         
-        # Criar janela de resposta
-        janela_resposta = customtkinter.CTkToplevel(self)
-        janela_resposta.title(f"Responder: {nome_atividade}")
-        janela_resposta.geometry("800x700")
-        janela_resposta.transient(self)
-        janela_resposta.grab_set()
+            # Criar janela de resposta
+            janela_resposta = customtkinter.CTkToplevel(self)
+            janela_resposta.title(f"Responder: {nome_atividade}")
+            janela_resposta.geometry("800x700")
+            janela_resposta.transient(self)
+            janela_resposta.grab_set()
 
-        # Cabeçalho com informações da atividade
-        header_frame = customtkinter.CTkFrame(janela_resposta)
-        header_frame.pack(fill='x', padx=20, pady=10)
+            # Cabeçalho com informações da atividade
+            header_frame = customtkinter.CTkFrame(janela_resposta)
+            header_frame.pack(fill='x', padx=20, pady=10)
         
-        customtkinter.CTkLabel(header_frame, text=nome_atividade, 
-                              font=customtkinter.CTkFont(size=18, weight="bold")).pack(pady=5)
+            customtkinter.CTkLabel(header_frame, text=nome_atividade, 
+                                  font=customtkinter.CTkFont(size=18, weight="bold")).pack(pady=5)
         
-        info_text = f"Matéria: {materia_nome} | Aula: {nome_aula} | Tipo: {tipo_atividade} | Entrega: {data_entrega}"
-        customtkinter.CTkLabel(header_frame, text=info_text, 
-                              font=customtkinter.CTkFont(size=12)).pack(pady=2)
+            info_text = f"Matéria: {materia_nome} | Aula: {nome_aula} | Tipo: {tipo_atividade} | Entrega: {data_entrega}"
+            customtkinter.CTkLabel(header_frame, text=info_text, 
+                                  font=customtkinter.CTkFont(size=12)).pack(pady=2)
         
-        # Mostrar tempo restante
-        tempo_restante = self._calcular_tempo_restante(data_entrega)
-        customtkinter.CTkLabel(header_frame, text=f"⏰ Tempo restante: {tempo_restante}", 
-                              font=customtkinter.CTkFont(size=12, weight="bold"),
-                              text_color=("red" if "expirou" in tempo_restante.lower() else "orange")).pack(pady=2)
+            # Mostrar tempo restante
+            tempo_restante = self._calcular_tempo_restante(data_entrega)
+            customtkinter.CTkLabel(header_frame, text=f"⏰ Tempo restante: {tempo_restante}", 
+                                  font=customtkinter.CTkFont(size=12, weight="bold"),
+                                  text_color=("red" if "expirou" in tempo_restante.lower() else "orange")).pack(pady=2)
         
-        # Descrição da atividade
-        desc_frame = customtkinter.CTkFrame(janela_resposta)
-        desc_frame.pack(fill='x', padx=20, pady=5)
+            # Descrição da atividade
+            desc_frame = customtkinter.CTkFrame(janela_resposta)
+            desc_frame.pack(fill='x', padx=20, pady=5)
         
-        customtkinter.CTkLabel(desc_frame, text="Descrição:", 
-                              font=customtkinter.CTkFont(weight="bold")).pack(anchor='w', padx=10, pady=5)
+            customtkinter.CTkLabel(desc_frame, text="Descrição:", 
+                                  font=customtkinter.CTkFont(weight="bold")).pack(anchor='w', padx=10, pady=5)
         
-        desc_textbox = customtkinter.CTkTextbox(desc_frame, height=60)
-        desc_textbox.pack(fill='x', padx=10, pady=(0,10))
-        desc_textbox.insert("1.0", atividade_completa.get('descricao', 'Sem descrição'))
-        desc_textbox.configure(state="disabled")
+            desc_textbox = customtkinter.CTkTextbox(desc_frame, height=60)
+            desc_textbox.pack(fill='x', padx=10, pady=(0,10))
+            desc_textbox.insert("1.0", atividade_completa.get('descricao', 'Sem descrição'))
+            desc_textbox.configure(state="disabled")
         
-        # Frame scrollável para perguntas
-        perguntas_scroll = customtkinter.CTkScrollableFrame(janela_resposta, height=350)
-        perguntas_scroll.pack(fill='both', expand=True, padx=20, pady=10)
+            # Frame scrollável para perguntas
+            perguntas_scroll = customtkinter.CTkScrollableFrame(janela_resposta, height=350)
+            perguntas_scroll.pack(fill='both', expand=True, padx=20, pady=10)
         
-        # Criar campos de resposta baseado no tipo
-        perguntas = atividade_completa.get('perguntas', [])
-        respostas_widgets = []
+            # Criar campos de resposta baseado no tipo
+            perguntas = atividade_completa.get('perguntas', [])
+            respostas_widgets = []
         
-        if tipo_atividade == "Múltipla Escolha":
-            respostas_widgets = self._criar_formulario_multipla_escolha(perguntas_scroll, perguntas)
-        elif tipo_atividade == "Dissertativa":
-            respostas_widgets = self._criar_formulario_dissertativo(perguntas_scroll, perguntas)
+            if tipo_atividade == "Múltipla Escolha":
+                respostas_widgets = self._criar_formulario_multipla_escolha(perguntas_scroll, perguntas)
+            elif tipo_atividade == "Dissertativa":
+                respostas_widgets = self._criar_formulario_dissertativo(perguntas_scroll, perguntas)
         
-        # Botões de ação
-        btn_frame = customtkinter.CTkFrame(janela_resposta)
-        btn_frame.pack(fill='x', padx=20, pady=10)
+            # Botões de ação
+            btn_frame = customtkinter.CTkFrame(janela_resposta)
+            btn_frame.pack(fill='x', padx=20, pady=10)
         
-        customtkinter.CTkButton(btn_frame, text="❌ Cancelar", 
-                              fg_color="#dc3545", hover_color="#c82333",
-                              command=janela_resposta.destroy).pack(side='left', padx=5)
+            customtkinter.CTkButton(btn_frame, text="❌ Cancelar", 
+                                  fg_color="#dc3545", hover_color="#c82333",
+                                  command=janela_resposta.destroy).pack(side='left', padx=5)
         
-        customtkinter.CTkButton(btn_frame, text="📤 Enviar Respostas", 
-                              fg_color="#28a745", hover_color="#218838",
-                              font=customtkinter.CTkFont(weight="bold"),
-                              command=lambda: self._salvar_respostas_aluno(
-                                  janela_resposta, atividade_completa, registro_pai, 
-                                  respostas_widgets, ra_aluno, tipo_atividade
-                              )).pack(side='right', padx=5)
+            customtkinter.CTkButton(btn_frame, text="📤 Enviar Respostas", 
+                                  fg_color="#28a745", hover_color="#218838",
+                                  font=customtkinter.CTkFont(weight="bold"),
+                                  command=lambda: self._salvar_respostas_aluno(
+                                      janela_resposta, atividade_completa, registro_pai, 
+                                      respostas_widgets, ra_aluno, tipo_atividade
+                                  )).pack(side='right', padx=5)
+
+        carregador.acao(tree_atividades, buscar, exibir, falha="Falha ao carregar os dados")
 
     def _calcular_tempo_restante(self, data_entrega_str):
         """Calcula o tempo restante para entrega da atividade"""
@@ -1749,14 +2226,30 @@ Data de Nascimento: {nascimento}"""
             messagebox.showerror("Prazo Expirado", "O prazo para esta atividade expirou enquanto você respondia.")
             return
         
+        if USE_PROXY:
+            # O servidor recusa a resposta duplicada no próprio envio (409):
+            # sem consulta prévia, o envio é uma única requisição
+            self._enviar_respostas_aluno(janela, atividade, registro_pai, respostas_widgets,
+                                         ra_aluno, tipo_atividade, False, None)
+            return
+        
         # VERIFICAÇÃO 2: Verificar se já foi respondida (verificação crítica antes de salvar)
-        ja_respondida, data_resposta = verificar_atividade_ja_respondida(atividade.get('id'), ra_aluno)
+        carregador.acao(janela, lambda: verificar_atividade_ja_respondida(atividade.get('id'), ra_aluno),
+                        lambda situacao: self._enviar_respostas_aluno(janela, atividade, registro_pai, respostas_widgets,
+                                                                      ra_aluno, tipo_atividade, *situacao),
+                        falha="Falha ao carregar os dados")
+
+    def _avisar_atividade_ja_respondida(self, janela, data_resposta):
+        messagebox.showerror("❌ Erro Crítico", 
+                           f"ATENÇÃO: Esta atividade já foi respondida por você em {data_resposta}!\n\n"
+                           f"🚫 SISTEMA DE SEGURANÇA: Não é possível responder a mesma atividade duas vezes.\n\n"
+                           f"Fechando o formulário para proteger a integridade dos dados.")
+        janela.destroy()
+
+    def _enviar_respostas_aluno(self, janela, atividade, registro_pai, respostas_widgets, ra_aluno, tipo_atividade,
+                                ja_respondida, data_resposta):
         if ja_respondida:
-            messagebox.showerror("❌ Erro Crítico", 
-                               f"ATENÇÃO: Esta atividade já foi respondida por você em {data_resposta}!\n\n"
-                               f"🚫 SISTEMA DE SEGURANÇA: Não é possível responder a mesma atividade duas vezes.\n\n"
-                               f"Fechando o formulário para proteger a integridade dos dados.")
-            janela.destroy()
+            self._avisar_atividade_ja_respondida(janela, data_resposta)
             return
         
         # Coletar respostas
@@ -1803,26 +2296,42 @@ Data de Nascimento: {nascimento}"""
             "status": "Respondida"
         }
         
-        # VERIFICAÇÃO 4: Última verificação antes de salvar no arquivo
-        RESPOSTAS_FILE = os.path.join(DATA_DIR, 'respostas_alunos.json')
-        respostas_existentes = carregar_json(RESPOSTAS_FILE)
-        
-        # Verificação final para garantir que não há duplicata
-        for resp in respostas_existentes:
-            if (str(resp.get('ra_aluno')) == str(ra_aluno) and 
-                str(resp.get('atividade_id')) == str(atividade.get('id'))):
-                messagebox.showerror("🚨 ERRO DE SEGURANÇA", 
-                                   f"CRÍTICO: Detectada tentativa de resposta duplicada!\n\n"
-                                   f"• Aluno: {ra_aluno}\n"
-                                   f"• Atividade ID: {atividade.get('id')}\n"
-                                   f"• Resposta já existe desde: {resp.get('data_resposta', 'N/A')}\n\n"
-                                   f"🛡️ O sistema bloqueou esta operação por segurança.")
-                janela.destroy()
-                return
+        def gravar():
+            # VERIFICAÇÃO 4: Última verificação antes de salvar no arquivo (em segundo plano);
+            # retorna a resposta já existente, None se gravou ou False se o envio falhou
+            if USE_PROXY:
+                # Envia apenas a nova resposta; o servidor só a acrescenta se não
+                # houver outra do aluno para a atividade (verificação atômica)
+                resultado = proxy.inserir_resposta_aluno(resposta_aluno)
+                if resultado is None:
+                    return False
+                if resultado.get('conflict'):
+                    return resultado.get('existing') or {'data_resposta': 'N/A'}
+                return None
+            
+            respostas_existentes = carregar_json(RESPOSTAS_FILE)
+            
+            # Verificação final para garantir que não há duplicata
+            resp_existente = next((resp for resp in respostas_existentes
+                                   if str(resp.get('ra_aluno')) == str(ra_aluno) and
+                                   str(resp.get('atividade_id')) == str(atividade.get('id'))), None)
+            if resp_existente is None:
+                # Salvar nova resposta (garantido que não é duplicata)
+                respostas_existentes.append(resposta_aluno)
+                salvar_json(RESPOSTAS_FILE, respostas_existentes)
+            return resp_existente
         
-        # Salvar nova resposta (garantido que não é duplicata)
-        respostas_existentes.append(resposta_aluno)
-        salvar_json(RESPOSTAS_FILE, respostas_existentes)
+        carregador.acao(janela, gravar, lambda resp_existente: self._concluir_envio_respostas(
+            janela, atividade, ra_aluno, resposta_aluno, resp_existente))
+
+    def _concluir_envio_respostas(self, janela, atividade, ra_aluno, resposta_aluno, resp_existente):
+        if resp_existente is False:
+            return  # o proxy já exibiu o erro do envio
+        
+        if resp_existente is not None:
+            # Resposta já registrada (409 do servidor ou verificação local)
+            self._avisar_atividade_ja_respondida(janela, resp_existente.get('data_resposta', 'N/A'))
+            return
         
         messagebox.showinfo("✅ Sucesso", 
                            f"Suas respostas foram enviadas com sucesso!\n\n"
@@ -1835,83 +2344,97 @@ Data de Nascimento: {nascimento}"""
     def _ver_historico_respostas_aluno(self, ra_aluno):
         """Mostra o histórico de respostas do aluno"""
         RESPOSTAS_FILE = os.path.join(DATA_DIR, 'respostas_alunos.json')
-        respostas = carregar_json(RESPOSTAS_FILE)
-        
-        # Filtrar respostas do aluno
-        respostas_aluno = [r for r in respostas if str(r.get('ra_aluno')) == str(ra_aluno)]
         
-        if not respostas_aluno:
-            messagebox.showinfo("Histórico de Respostas", "Você ainda não respondeu nenhuma atividade.")
-            return
+        # Respostas do aluno, mais recentes primeiro, carregadas por página e
+        # sem o conteúdo das respostas (buscado só em "Ver Detalhes")
+        consulta_historico = {'igual': {'ra_aluno': ra_aluno}, 'ordem': ['-data_resposta']}
         
-        # Criar janela de histórico
-        janela_historico = customtkinter.CTkToplevel(self)
-        janela_historico.title("📋 Meu Histórico de Respostas")
-        janela_historico.geometry("900x600")
-        janela_historico.transient(self)
-        janela_historico.grab_set()
-        
-        # Cabeçalho
-        header_frame = customtkinter.CTkFrame(janela_historico)
-        header_frame.pack(fill='x', padx=20, pady=10)
-        
-        customtkinter.CTkLabel(header_frame, 
-                              text="📋 Histórico de Atividades Respondidas", 
-                              font=customtkinter.CTkFont(size=18, weight="bold")).pack(pady=10)
-        
-        customtkinter.CTkLabel(header_frame, 
-                              text=f"👤 Aluno: {self.usuario_logado.get('nome', '')} | 🆔 RA: {ra_aluno} | 📊 Total de respostas: {len(respostas_aluno)}", 
-                              font=customtkinter.CTkFont(size=12)).pack(pady=5)
+        def buscar():
+            # Total de respostas e nomes das matérias (em segundo plano)
+            _, _, total = consultar_pagina_json(RESPOSTAS_FILE, 1, campos=['atividade_id'], **consulta_historico)
+            if not total:
+                return 0, {}
+            materias = carregar_json(MATERIAS_FILE, CAMPOS_MATERIA_ALUNO)
+            return total, {m['id']: m['nome'] for m in materias}
         
-        # Tabela de histórico
-        tree_historico = ttk.Treeview(janela_historico, 
-                                     columns=('atividade', 'materia', 'tipo', 'data_resposta', 'status'), 
-                                     show='headings')
+        def exibir(dados):
+            total_respostas, mapa_materias = dados
+            
+            if not total_respostas:
+                messagebox.showinfo("Histórico de Respostas", "Você ainda não respondeu nenhuma atividade.")
+                return
         
-        # Configurar cabeçalhos
-        tree_historico.heading('atividade', text='Atividade')
-        tree_historico.column('atividade', width=200)
-        tree_historico.heading('materia', text='Matéria')
-        tree_historico.column('materia', width=150)
-        tree_historico.heading('tipo', text='Tipo')
-        tree_historico.column('tipo', width=120, anchor='center')
-        tree_historico.heading('data_resposta', text='Data/Hora Resposta')
-        tree_historico.column('data_resposta', width=140, anchor='center')
-        tree_historico.heading('status', text='Status')
-        tree_historico.column('status', width=100, anchor='center')
-        
-        tree_historico.pack(fill='both', expand=True, padx=20, pady=10)
-        
-        # Carregar dados das matérias para mostrar nomes
-        materias = carregar_json(MATERIAS_FILE)
-        mapa_materias = {m['id']: m['nome'] for m in materias}
-        
-        # Preencher tabela
-        for resposta in sorted(respostas_aluno, key=lambda x: x.get('data_resposta', ''), reverse=True):
-            materia_nome = mapa_materias.get(resposta.get('materia_id'), 'Matéria Desconhecida')
-            
-            valores = [
-                resposta.get('atividade_nome', 'N/A'),
-                materia_nome,
-                resposta.get('tipo_atividade', 'N/A'),
-                resposta.get('data_resposta', 'N/A'),
-                '✅ ' + resposta.get('status', 'N/A')
-            ]
+            # Criar janela de histórico
+            janela_historico = customtkinter.CTkToplevel(self)
+            janela_historico.title("📋 Meu Histórico de Respostas")
+            janela_historico.geometry("900x600")
+            janela_historico.transient(self)
+            janela_historico.grab_set()
+        
+            # Cabeçalho
+            header_frame = customtkinter.CTkFrame(janela_historico)
+            header_frame.pack(fill='x', padx=20, pady=10)
+        
+            customtkinter.CTkLabel(header_frame, 
+                                  text="📋 Histórico de Atividades Respondidas", 
+                                  font=customtkinter.CTkFont(size=18, weight="bold")).pack(pady=10)
+        
+            customtkinter.CTkLabel(header_frame, 
+                                  text=f"👤 Aluno: {self.usuario_logado.get('nome', '')} | 🆔 RA: {ra_aluno} | 📊 Total de respostas: {total_respostas}", 
+                                  font=customtkinter.CTkFont(size=12)).pack(pady=5)
+        
+            # Tabela de histórico
+            tree_historico = ttk.Treeview(janela_historico, 
+                                         columns=('atividade', 'materia', 'tipo', 'data_resposta', 'status'), 
+                                         show='headings')
+        
+            # Configurar cabeçalhos
+            tree_historico.heading('atividade', text='Atividade')
+            tree_historico.column('atividade', width=200)
+            tree_historico.heading('materia', text='Matéria')
+            tree_historico.column('materia', width=150)
+            tree_historico.heading('tipo', text='Tipo')
+            tree_historico.column('tipo', width=120, anchor='center')
+            tree_historico.heading('data_resposta', text='Data/Hora Resposta')
+            tree_historico.column('data_resposta', width=140, anchor='center')
+            tree_historico.heading('status', text='Status')
+            tree_historico.column('status', width=100, anchor='center')
+        
+            tree_historico.pack(fill='both', expand=True, padx=20, pady=10)
+        
+            # Preencher tabela (nomes das matérias em mapa_materias)
+            def inserir_resposta(resposta):
+                materia_nome = mapa_materias.get(resposta.get('materia_id'), 'Matéria Desconhecida')
+            
+                valores = [
+                    resposta.get('atividade_nome', 'N/A'),
+                    materia_nome,
+                    resposta.get('tipo_atividade', 'N/A'),
+                    resposta.get('data_resposta', 'N/A'),
+                    '✅ ' + resposta.get('status', 'N/A')
+                ]
             
-            tree_historico.insert('', 'end', values=valores)
+                tree_historico.insert('', 'end', values=valores)
         
-        # Frame de botões
-        btn_frame = customtkinter.CTkFrame(janela_historico)
-        btn_frame.pack(fill='x', padx=20, pady=10)
+            lista_historico = ListaPaginada(tree_historico, RESPOSTAS_FILE, campos=[
+                'atividade_nome', 'materia_id', 'tipo_atividade', 'data_resposta', 'status'])
+            # Uma resposta por aluno e atividade (o servidor garante): desempate estável
+            lista_historico.recarregar(inserir_resposta, chave=['ra_aluno', 'atividade_id'], **consulta_historico)
+        
+            # Frame de botões
+            btn_frame = customtkinter.CTkFrame(janela_historico)
+            btn_frame.pack(fill='x', padx=20, pady=10)
         
-        customtkinter.CTkButton(btn_frame, text="👁 Ver Detalhes da Resposta", 
-                              command=lambda: self._ver_detalhes_resposta_aluno(tree_historico, respostas_aluno),
-                              fg_color="#6c757d", hover_color="#545b62").pack(side='left', padx=5)
+            customtkinter.CTkButton(btn_frame, text="👁 Ver Detalhes da Resposta", 
+                                  command=lambda: self._ver_detalhes_resposta_aluno(tree_historico, ra_aluno),
+                                  fg_color="#6c757d", hover_color="#545b62").pack(side='left', padx=5)
         
-        customtkinter.CTkButton(btn_frame, text="❌ Fechar", 
-                              command=janela_historico.destroy).pack(side='right', padx=5)
+            customtkinter.CTkButton(btn_frame, text="❌ Fechar", 
+                                  command=janela_historico.destroy).pack(side='right', padx=5)
+
+        carregador.acao(self, buscar, exibir, falha="Falha ao carregar os dados")
 
-    def _ver_detalhes_resposta_aluno(self, tree_historico, respostas_aluno):
+    def _ver_detalhes_resposta_aluno(self, tree_historico, ra_aluno):
         """Mostra detalhes de uma resposta específica"""
         selection = tree_historico.selection()
         if not selection:
@@ -1922,65 +2445,119 @@ Data de Nascimento: {nascimento}"""
         valores = item['values']
         nome_atividade = valores[0]
         
-        # Encontrar a resposta completa
-        resposta_completa = next((r for r in respostas_aluno if r.get('atividade_nome') == nome_atividade), None)
+        # Encontrar a resposta completa (só ela é baixada, em segundo plano)
+        RESPOSTAS_FILE = os.path.join(DATA_DIR, 'respostas_alunos.json')
         
-        if not resposta_completa:
-            messagebox.showerror("Erro", "Detalhes da resposta não encontrados.")
-            return
+        def buscar():
+            encontradas = consultar_json(RESPOSTAS_FILE, igual={'ra_aluno': ra_aluno, 'atividade_nome': nome_atividade}, limite=1)
+            return encontradas[0] if encontradas else None
         
-        # Criar janela de detalhes
-        janela_detalhes = customtkinter.CTkToplevel(self)
-        janela_detalhes.title(f"🔍 Detalhes da Resposta: {nome_atividade}")
-        janela_detalhes.geometry("700x500")
-        janela_detalhes.transient(self)
-        janela_detalhes.grab_set()
+        def exibir(resposta_completa):
+            if not resposta_completa:
+                messagebox.showerror("Erro", "Detalhes da resposta não encontrados.")
+                return
         
-        # Frame de informações
-        info_frame = customtkinter.CTkFrame(janela_detalhes)
-        info_frame.pack(fill='x', padx=20, pady=10)
+            # Criar janela de detalhes
+            janela_detalhes = customtkinter.CTkToplevel(self)
+            janela_detalhes.title(f"🔍 Detalhes da Resposta: {nome_atividade}")
+            janela_detalhes.geometry("700x500")
+            janela_detalhes.transient(self)
+            janela_detalhes.grab_set()
+        
+            # Frame de informações
+            info_frame = customtkinter.CTkFrame(janela_detalhes)
+            info_frame.pack(fill='x', padx=20, pady=10)
         
-        customtkinter.CTkLabel(info_frame, text=f"📝 {nome_atividade}", 
-                              font=customtkinter.CTkFont(size=16, weight="bold")).pack(pady=5)
+            customtkinter.CTkLabel(info_frame, text=f"📝 {nome_atividade}", 
+                                  font=customtkinter.CTkFont(size=16, weight="bold")).pack(pady=5)
         
-        info_text = f"📚 Matéria: {valores[1]} | 🎯 Tipo: {valores[2]} | ⏰ Respondida em: {valores[3]}"
-        customtkinter.CTkLabel(info_frame, text=info_text, 
-                              font=customtkinter.CTkFont(size=11)).pack(pady=2)
+            info_text = f"📚 Matéria: {valores[1]} | 🎯 Tipo: {valores[2]} | ⏰ Respondida em: {valores[3]}"
+            customtkinter.CTkLabel(info_frame, text=info_text, 
+                                  font=customtkinter.CTkFont(size=11)).pack(pady=2)
         
-        # Frame de respostas
-        customtkinter.CTkLabel(janela_detalhes, text="📋 Suas Respostas:", 
-                              font=customtkinter.CTkFont(size=14, weight="bold")).pack(anchor='w', padx=20, pady=(20,5))
+            # Frame de respostas
+            customtkinter.CTkLabel(janela_detalhes, text="📋 Suas Respostas:", 
+                                  font=customtkinter.CTkFont(size=14, weight="bold")).pack(anchor='w', padx=20, pady=(20,5))
         
-        respostas_scroll = customtkinter.CTkScrollableFrame(janela_detalhes, height=300)
-        respostas_scroll.pack(fill='both', expand=True, padx=20, pady=10)
+            respostas_scroll = customtkinter.CTkScrollableFrame(janela_detalhes, height=300)
+            respostas_scroll.pack(fill='both', expand=True, padx=20, pady=10)
         
-        # Mostrar respostas
-        respostas_data = resposta_completa.get('respostas', [])
+            # Mostrar respostas
+            respostas_data = resposta_completa.get('respostas', [])
         
-        for i, resposta in enumerate(respostas_data):
-            resp_frame = customtkinter.CTkFrame(respostas_scroll)
-            resp_frame.pack(fill='x', padx=5, pady=5)
+            for i, resposta in enumerate(respostas_data):
+                resp_frame = customtkinter.CTkFrame(respostas_scroll)
+                resp_frame.pack(fill='x', padx=5, pady=5)
             
-            customtkinter.CTkLabel(resp_frame, text=f"Pergunta {i+1}:", 
-                                  font=customtkinter.CTkFont(weight="bold")).pack(anchor='w', padx=10, pady=5)
+                customtkinter.CTkLabel(resp_frame, text=f"Pergunta {i+1}:", 
+                                      font=customtkinter.CTkFont(weight="bold")).pack(anchor='w', padx=10, pady=5)
             
-            resposta_text = customtkinter.CTkTextbox(resp_frame, height=60)
-            resposta_text.pack(fill='x', padx=10, pady=(0,10))
-            resposta_text.insert("1.0", str(resposta))
-            resposta_text.configure(state="disabled")
+                resposta_text = customtkinter.CTkTextbox(resp_frame, height=60)
+                resposta_text.pack(fill='x', padx=10, pady=(0,10))
+                resposta_text.insert("1.0", str(resposta))
+                resposta_text.configure(state="disabled")
         
-        # Aviso
-        aviso_frame = customtkinter.CTkFrame(janela_detalhes)
-        aviso_frame.pack(fill='x', padx=20, pady=10)
+            # Aviso
+            aviso_frame = customtkinter.CTkFrame(janela_detalhes)
+            aviso_frame.pack(fill='x', padx=20, pady=10)
         
-        customtkinter.CTkLabel(aviso_frame, 
-                              text="🔒 IMPORTANTE: Estas respostas são definitivas e não podem ser alteradas.", 
-                              font=customtkinter.CTkFont(size=11, weight="bold"),
-                              text_color="orange").pack(pady=5)
+            customtkinter.CTkLabel(aviso_frame, 
+                                  text="🔒 IMPORTANTE: Estas respostas são definitivas e não podem ser alteradas.", 
+                                  font=customtkinter.CTkFont(size=11, weight="bold"),
+                                  text_color="orange").pack(pady=5)
         
-        # Botão fechar
-        customtkinter.CTkButton(janela_detalhes, text="❌ Fechar", 
-                              command=janela_detalhes.destroy).pack(pady=10)
+            # Botão fechar
+            customtkinter.CTkButton(janela_detalhes, text="❌ Fechar", 
+                                  command=janela_detalhes.destroy).pack(pady=10)
+
+        carregador.acao(tree_historico, buscar, exibir, falha="Falha ao carregar os dados")
+
+    def _criar_aba_desempenho(self, parent_tab, turmas, permitir_escola=False):
+        """Cria aba de análise de desempenho (médias, percentis, aprovação e ranking) por turma ou da escola"""
+        filtro_frame = customtkinter.CTkFrame(parent_tab)
+        filtro_frame.pack(fill='x', padx=10, pady=10)
+        
+        opcoes = {}
+        if permitir_escola:
+            opcoes["Escola (todas as turmas)"] = None
+        for t in turmas:
+            opcoes[f"{t.get('serie', '')} {t.get('turma', '')} (ID {t.get('id')})"] = t.get('id')
+        
+        customtkinter.CTkLabel(filtro_frame, text="Turma:").pack(side='left', padx=5)
+        combo_turma = customtkinter.CTkComboBox(filtro_frame, values=list(opcoes) or ["Nenhuma turma"], width=280)
+        combo_turma.pack(side='left', padx=5)
+        
+        texto_analise = customtkinter.CTkTextbox(parent_tab, font=customtkinter.CTkFont(family="Courier", size=12))
+        texto_analise.pack(fill='both', expand=True, padx=10, pady=(0, 10))
+        
+        def gerar_analise():
+            if not analise_notas.NUMPY_DISPONIVEL:
+                messagebox.showerror("NumPy não instalado", "A análise de desempenho precisa do NumPy.\nPara instalar, execute: pip install numpy")
+                return
+            
+            selecao = combo_turma.get()
+            if selecao not in opcoes:
+                messagebox.showwarning("Aviso", "Selecione uma turma.")
+                return
+            
+            turma_id = opcoes[selecao]
+
+            def analisar():
+                # Notas da escola inteira numa única leitura; a agregação é vetorizada
+                notas, materias, alunos = carregar_varios_json(NOTAS_FILE, MATERIAS_FILE, ALUNOS_FILE)
+                analise = analise_notas.analisar(notas, turmas, materias, turma_id=turma_id, alunos=alunos)
+                return analise_notas.relatorio_texto(analise)
+
+            def exibir(relatorio):
+                texto_analise.configure(state="normal")
+                texto_analise.delete("1.0", "end")
+                texto_analise.insert("1.0", relatorio)
+                texto_analise.configure(state="disabled")
+
+            # Leitura e análise em segundo plano (a escola inteira pode demorar)
+            carregador.executar(texto_analise, analisar, exibir, recarregar=gerar_analise)
+        
+        customtkinter.CTkButton(filtro_frame, text="📊 Gerar Análise", command=gerar_analise).pack(side='left', padx=5)
 
     def _criar_aba_seguranca(self, parent_tab):
         """Cria aba de segurança (alterar senha)"""
@@ -2019,7 +2596,7 @@ Data de Nascimento: {nascimento}"""
         # Adiciona um título para garantir que a aba Admin aparece
         customtkinter.CTkLabel(parent_tab, text="Painel Administrativo", font=customtkinter.CTkFont(size=18, weight="bold")).pack(pady=(10, 5), padx=10, anchor='w')
 
-        tabs_inner = customtkinter.CTkTabview(parent_tab)
+        tabs_inner = customtkinter.CTkTabview(parent_tab, command=lambda: carregador.aba_trocada(tabs_inner))
         tabs_inner.pack(expand=True, fill='both')
 
         # Ordem das abas alterada conforme solicitado
@@ -2028,6 +2605,9 @@ Data de Nascimento: {nascimento}"""
         self._admin_turmas_tab(tabs_inner.add('Turmas'))
         self._admin_materias_tab(tabs_inner.add('Matérias'))
         self._admin_pedidos_tab(tabs_inner.add('Pedidos'))
+        tab_desempenho = tabs_inner.add('Desempenho')
+        self._carregar_aba(tab_desempenho, lambda: carregar_json(TURMAS_FILE),
+                           lambda turmas: self._criar_aba_desempenho(tab_desempenho, turmas, permitir_escola=True))
         
         self._criar_controles_inferiores(parent_tab)
 
@@ -2069,26 +2649,31 @@ Data de Nascimento: {nascimento}"""
         tree.pack(fill='both', expand=True, padx=10, pady=10)
 
         def refresh(termo_pesquisa=None, tipo_filtro="Todos"):
+            carregador.executar(tree, lambda: buscar_usuarios(termo_pesquisa, tipo_filtro), preencher,
+                                recarregar=lambda: refresh(termo_pesquisa, tipo_filtro))
+
+        def buscar_usuarios(termo_pesquisa, tipo_filtro):
+            # Apenas admin e professor (alunos ficam na aba própria); a busca
+            # roda no servidor e o arquivo de um tipo fora do filtro nem é lido
+            contem = {'usuario|nome': termo_pesquisa} if termo_pesquisa else None
+            usuarios_filtrados = []
+            for arquivo, tipo in ((PROFESSORES_FILE, 'professor'), (ADMIN_FILE, 'admin')):
+                if tipo_filtro not in ("Todos", tipo):
+                    continue
+                for u in consultar_json(arquivo, campos=['usuario', 'tipo', 'nome', 'data_nascimento'], contem=contem):
+                    u.setdefault('tipo', tipo)
+                    if u['tipo'] in ['admin', 'professor'] and tipo_filtro in ("Todos", u['tipo']):
+                        usuarios_filtrados.append(u)
+            return usuarios_filtrados
+
+        def preencher(usuarios_filtrados):
             for i in tree.get_children():
                 tree.delete(i)
-            
-            usuarios = carregar_todos_usuarios()
-            # Filtrar apenas admin e professor (excluir alunos)
-            usuarios_filtrados = [u for u in usuarios if u.get('tipo') in ['admin', 'professor']]
-
-            if termo_pesquisa:
-                usuarios_filtrados = [
-                    u for u in usuarios_filtrados if
-                    termo_pesquisa in u['usuario'].lower() or
-                    termo_pesquisa in u.get('nome', '').lower()
-                ]
-            
-            if tipo_filtro != "Todos":
-                usuarios_filtrados = [u for u in usuarios_filtrados if u['tipo'] == tipo_filtro]
-
             for u in usuarios_filtrados:
                 tree.insert('', 'end', values=(u['usuario'], u['tipo'], u.get('nome', ''), u.get('data_nascimento', 'N/A')))
         refresh()
+        # Reaplica a pesquisa atual quando professores/admin mudarem no servidor
+        assinar_alteracoes(tree, [PROFESSORES_FILE, ADMIN_FILE], aplicar_filtros)
 
         frm = customtkinter.CTkFrame(parent_tab)
         frm.pack(fill='x', pady=8, padx=10)
@@ -2107,47 +2692,44 @@ Data de Nascimento: {nascimento}"""
         ).pack(side='right', padx=5)
         
     def _usuario_form(self, refresh, edit=False, tree=None):
-        top = customtkinter.CTkToplevel(self)
-        top.title('Adicionar Usuário' if not edit else 'Alterar Usuário')
-        top.geometry('500x600')
-        top.resizable(False, False)
-        todos_usuarios = carregar_todos_usuarios()
-        u = None
-        usuario_original = None
-        tipo_original = None
+        if not (edit and tree):
+            self._abrir_usuario_form(refresh, edit)
+            return
 
-        if edit and tree:
-            sel = tree.selection()
-            if not sel:
-                messagebox.showwarning('Erro', 'Selecione um usuário.')
-                top.destroy()
-                return
-            values = tree.item(sel[0])['values']
-            usuario_original = values[0]  # Primeira coluna é o nome de usuário
-            tipo_original = values[1]     # Segunda coluna é o tipo
-            
+        sel = tree.selection()
+        if not sel:
+            messagebox.showwarning('Erro', 'Selecione um usuário.')
+            return
+        values = tree.item(sel[0])['values']
+        usuario_original = values[0]  # Primeira coluna é o nome de usuário
+        tipo_original = values[1]     # Segunda coluna é o tipo
+        
+        # Buscar usuário no arquivo específico do tipo (apenas admin e professor)
+        if tipo_original == 'professor':
+            arquivo = PROFESSORES_FILE
+        elif tipo_original == 'admin':
+            arquivo = ADMIN_FILE
+        else:
+            messagebox.showerror('Erro', f'Tipo de usuário "{tipo_original}" não é permitido nesta seção.')
+            return
 
-            
-            # Buscar usuário no arquivo específico do tipo (apenas admin e professor)
-            if tipo_original == 'professor':
-                professores = carregar_json(PROFESSORES_FILE)
-                u = next((x for x in professores if x.get('usuario') == usuario_original), None)
-            elif tipo_original == 'admin':
-                admins = carregar_json(ADMIN_FILE)
-                u = next((x for x in admins if x.get('usuario') == usuario_original), None)
-            else:
-                messagebox.showerror('Erro', f'Tipo de usuário "{tipo_original}" não é permitido nesta seção.')
-                top.destroy()
-                return
-            
+        def abrir(u):
             if not u:
                 messagebox.showerror('Erro', f'Usuário "{usuario_original}" do tipo "{tipo_original}" não encontrado.')
-                top.destroy()
                 return
             
             # Adicionar tipo ao objeto para garantir consistência
             u['tipo'] = tipo_original
+            self._abrir_usuario_form(refresh, edit, u, usuario_original)
 
+        carregador.acao(tree, lambda: next((x for x in carregar_json(arquivo) if x.get('usuario') == usuario_original), None),
+                        abrir, falha="Falha ao carregar os dados")
+
+    def _abrir_usuario_form(self, refresh, edit, u=None, usuario_original=None):
+        top = customtkinter.CTkToplevel(self)
+        top.title('Adicionar Usuário' if not edit else 'Alterar Usuário')
+        top.geometry('500x600')
+        top.resizable(False, False)
 
         # Frame principal com scroll
         main_frame = customtkinter.CTkScrollableFrame(top)
@@ -2264,12 +2846,6 @@ Data de Nascimento: {nascimento}"""
             else: # Editando sem alterar a senha
                 senha_para_salvar = None
 
-            # Verificar se o usuário já existe em qualquer arquivo
-            todos_usuarios_atualizado = carregar_todos_usuarios()
-            if not edit and any(x['usuario'] == novo_usuario for x in todos_usuarios_atualizado):
-                messagebox.showerror('Erro', f'O usuário "{novo_usuario}" já existe.', parent=top)
-                return
-
             # Criar/atualizar usuário
             usuario_data = {
                 'usuario': novo_usuario, 
@@ -2278,31 +2854,48 @@ Data de Nascimento: {nascimento}"""
                 'data_nascimento': nova_data_nascimento
             }
 
-            if edit and u:
-                # Manter a senha original se não foi alterada
-                if senha_para_salvar:
-                    usuario_data['senha'] = senha_para_salvar
+            def gravar():
+                # Verificar se o usuário já existe em qualquer arquivo (em segundo plano)
+                if not edit and any(x['usuario'] == novo_usuario for x in carregar_todos_usuarios()):
+                    return None
+
+                if edit and u:
+                    # Manter a senha original se não foi alterada
+                    if senha_para_salvar:
+                        usuario_data['senha'] = senha_para_salvar
+                    else:
+                        usuario_data['senha'] = u['senha']
+                    
+                    # Se o tipo mudou, remover do arquivo antigo e salvar no novo
+                    if u['tipo'] != novo_tipo:
+                        # Remover do arquivo antigo
+                        remover_usuario_por_tipo(usuario_original, u['tipo'])
+                    
+                    # Salvar no arquivo correto do novo tipo
+                    salvar_usuario_por_tipo(usuario_data)
                 else:
-                    usuario_data['senha'] = u['senha']
+                    # Novo usuário
+                    usuario_data['senha'] = senha_para_salvar
+                    salvar_usuario_por_tipo(usuario_data)
                 
-                # Se o tipo mudou, remover do arquivo antigo e salvar no novo
-                if u['tipo'] != novo_tipo:
-                    # Remover do arquivo antigo
-                    remover_usuario_por_tipo(usuario_original, u['tipo'])
+                # mapa de professores já atualizado
+                return gerar_mapa_professores()
+
+            def concluir(mapa):
+                if mapa is None:
+                    messagebox.showerror('Erro', f'O usuário "{novo_usuario}" já existe.', parent=top)
+                    return
+                if edit and u:
+                    messagebox.showinfo('Sucesso', f'Usuário "{novo_nome}" foi atualizado com sucesso!')
+                else:
+                    messagebox.showinfo('Sucesso', f'Usuário "{novo_nome}" foi criado com sucesso!')
                 
-                # Salvar no arquivo correto do novo tipo
-                salvar_usuario_por_tipo(usuario_data)
-                messagebox.showinfo('Sucesso', f'Usuário "{novo_nome}" foi atualizado com sucesso!')
-            else:
-                # Novo usuário
-                usuario_data['senha'] = senha_para_salvar
-                salvar_usuario_por_tipo(usuario_data)
-                messagebox.showinfo('Sucesso', f'Usuário "{novo_nome}" foi criado com sucesso!')
-            
-            # atualizar mapa local de professores
-            self.mapa_professores = gerar_mapa_professores()
-            refresh()
-            top.destroy()
+                # atualizar mapa local de professores
+                self.mapa_professores = mapa
+                refresh()
+                top.destroy()
+
+            carregador.acao(top, gravar, concluir)
     
         # Frame de botões fixo na parte inferior
         botoes_frame = customtkinter.CTkFrame(top, fg_color="transparent")
@@ -2357,13 +2950,18 @@ Data de Nascimento: {nascimento}"""
         
         if not messagebox.askyesno('Confirmar', f'Confirma a exclusão do usuário "{usuario_nome}" ({tipo_usuario})?'):
             return
-            
-        # Remover do arquivo correspondente ao tipo
-        remover_usuario_por_tipo(usuario_nome, tipo_usuario)
         
-        # atualizar mapa local de professores
-        self.mapa_professores = gerar_mapa_professores()
-        refresh()
+        def gravar():
+            # Remover do arquivo correspondente ao tipo (em segundo plano)
+            remover_usuario_por_tipo(usuario_nome, tipo_usuario)
+            return gerar_mapa_professores()
+        
+        def concluir(mapa):
+            # atualizar mapa local de professores
+            self.mapa_professores = mapa
+            refresh()
+        
+        carregador.acao(tree, gravar, concluir)
 
     # --------- TURMAS ---------
     def _admin_turmas_tab(self, parent_tab):
@@ -2430,10 +3028,15 @@ Data de Nascimento: {nascimento}"""
         tree_alunos_disponiveis.grid(row=2, column=2, sticky='nsew', padx=(5,10))
 
         def refresh_turmas():
-            materias = carregar_json(MATERIAS_FILE)
+            """Recarrega a lista de turmas e, em seguida, o painel da seleção (ver on_turma_select)"""
+            carregador.executar(tree_turmas, lambda: carregar_varios_json(MATERIAS_FILE, TURMAS_FILE),
+                                preencher_turmas, recarregar=refresh_turmas)
+
+        def preencher_turmas(dados):
+            materias, turmas = dados
             for i in tree_turmas.get_children():
                 tree_turmas.delete(i)
-            for t in carregar_json(TURMAS_FILE):
+            for t in turmas:
                 num_alunos = len(t.get('alunos', []))
                 limite_alunos = t.get('limite_alunos', 'N/A')
                 info_alunos = f"{num_alunos}/{limite_alunos}"
@@ -2441,6 +3044,7 @@ Data de Nascimento: {nascimento}"""
                 qtd_materias = len([m for m in materias if m.get('turma_id') == t.get('id')])
 
                 tree_turmas.insert('', 'end', iid=t['id'], values=(t['id'], t.get('serie', ''), t.get('turma', ''), info_alunos, qtd_materias))
+            on_turma_select()
 
         def on_turma_select(event=None):
             sel = tree_turmas.selection()
@@ -2454,7 +3058,14 @@ Data de Nascimento: {nascimento}"""
                 return
             
             turma_id = int(sel[0])
-            turmas = carregar_json(TURMAS_FILE)
+            # Turmas e alunos em segundo plano (a seleção mais recente prevalece)
+            carregador.executar(tree_alunos_na_turma, lambda: carregar_varios_json(TURMAS_FILE, ALUNOS_FILE),
+                                lambda dados: preencher_alunos(turma_id, *dados))
+
+        def preencher_alunos(turma_id, turmas, todos_usuarios):
+            sel = tree_turmas.selection()
+            if not sel or int(sel[0]) != turma_id:
+                return  # a seleção mudou enquanto os dados chegavam
             turma_selecionada = next((t for t in turmas if t['id'] == turma_id), None)
             
             if not turma_selecionada: return
@@ -2467,9 +3078,8 @@ Data de Nascimento: {nascimento}"""
             for i in tree_alunos_na_turma.get_children(): tree_alunos_na_turma.delete(i)
             for i in tree_alunos_disponiveis.get_children(): tree_alunos_disponiveis.delete(i)
 
-            # Carregar todos os alunos e turmas
-            todos_usuarios = carregar_json(ALUNOS_FILE)  # Agora apenas alunos
-            alunos = {u['ra']: u for u in todos_usuarios}  # Todos já são alunos
+            # Todos os alunos (o arquivo só tem alunos)
+            alunos = {u['ra']: u for u in todos_usuarios}
             
             ras_em_outras_turmas = set()
             for t in turmas:
@@ -2504,19 +3114,21 @@ Data de Nascimento: {nascimento}"""
                     messagebox.showwarning("Aviso", "Selecione um ou mais alunos da turma para remover.")
                     return
 
-            turmas = carregar_json(TURMAS_FILE)
-            turma_alvo = next((t for t in turmas if t['id'] == turma_id), None)
-            
-            if turma_alvo:
+            def gravar():
+                # Lê, altera e salva em segundo plano; retorna se salvou ou o erro a exibir
+                turmas = carregar_json(TURMAS_FILE)
+                turma_alvo = next((t for t in turmas if t['id'] == turma_id), None)
+                
+                if not turma_alvo:
+                    return False
                 alunos_na_turma = turma_alvo.setdefault('alunos', [])
                 if adicionar:
                     try:
                         limite_alunos = int(turma_alvo.get('limite_alunos', 0))
                         if len(alunos_na_turma) + len(sel_alunos) > limite_alunos:
-                            return
+                            return False
                     except (ValueError, TypeError):
-                        messagebox.showerror("Erro de Configuração", "O limite de alunos para esta turma não é um número válido.")
-                        return
+                        return "O limite de alunos para esta turma não é um número válido."
                     
                     for ra_aluno in sel_alunos:
                         if ra_aluno not in alunos_na_turma:
@@ -2528,8 +3140,15 @@ Data de Nascimento: {nascimento}"""
                             alunos_na_turma.remove(ra_aluno)
                 
                 salvar_json(TURMAS_FILE, turmas)
-                refresh_turmas() # Atualiza a lista de turmas para mostrar a nova contagem
-                on_turma_select() # Refresh as listas de alunos
+                return True
+
+            def concluir(resultado):
+                if isinstance(resultado, str):
+                    messagebox.showerror("Erro de Configuração", resultado)
+                elif resultado:
+                    refresh_turmas() # Atualiza a lista de turmas (nova contagem) e as listas de alunos
+
+            carregador.acao(tree_turmas, gravar, concluir)
 
         # CORREÇÃO: Lógica dos botões invertida para o correto
         btn_adicionar_aluno.configure(command=lambda: mover_aluno(adicionar=True))  # Botão > (adicionar)
@@ -2544,7 +3163,6 @@ Data de Nascimento: {nascimento}"""
         # Função de callback para atualizar a lista de turmas e a seleção
         def refresh_e_seleciona():
             refresh_turmas()
-            on_turma_select()
 
         customtkinter.CTkButton(frm_botoes_turma, text='Criar', command=lambda: self._turma_form(refresh_e_seleciona)).pack(side='left', padx=5)
         customtkinter.CTkButton(frm_botoes_turma, text='Alterar', command=lambda: self._turma_form(refresh_e_seleciona, edit=True, tree=tree_turmas)).pack(side='left', padx=5)
@@ -2562,24 +3180,29 @@ Data de Nascimento: {nascimento}"""
 
         # Carrega os dados iniciais
         refresh_turmas()
-        on_turma_select()
 
     def _turma_form(self, refresh, edit=False, tree=None):
-        top = customtkinter.CTkToplevel(self)
-        top.title('Turma')
-        top.geometry('400x450')
-        top.resizable(False, False)
-
-        data = carregar_json(TURMAS_FILE)
-        t = None
+        turma_id = None
         if edit and tree:
             sel = tree.selection()
             if not sel:
                 messagebox.showwarning('Erro', 'Selecione uma turma.')
-                top.destroy()
                 return
-            values = tree.item(sel[0])['values']
-            t = next((x for x in data if x['id'] == values[0]), None)
+            turma_id = tree.item(sel[0])['values'][0]
+
+        # Turmas e professores (só login e nome) em segundo plano
+        carregador.acao(tree or self,
+                        lambda: (carregar_json(TURMAS_FILE), carregar_json(PROFESSORES_FILE, ['usuario', 'nome'])),
+                        lambda dados: self._abrir_turma_form(refresh, edit, turma_id, *dados),
+                        falha="Falha ao carregar os dados")
+
+    def _abrir_turma_form(self, refresh, edit, turma_id, data, professores):
+        top = customtkinter.CTkToplevel(self)
+        top.title('Turma')
+        top.geometry('400x450')
+        top.resizable(False, False)
+
+        t = next((x for x in data if x['id'] == turma_id), None) if turma_id is not None else None
 
         customtkinter.CTkLabel(top, text='Série:').pack(anchor='w', pady=(10, 0), padx=20)
         e_serie = customtkinter.CTkComboBox(top, values=self.series_disponiveis)
@@ -2602,7 +3225,6 @@ Data de Nascimento: {nascimento}"""
         e_limite.insert(0, t.get('limite_alunos', '') if t else '')
 
         customtkinter.CTkLabel(top, text='Professor responsável:').pack(anchor='w', pady=(5, 0), padx=20)
-        professores = carregar_json(PROFESSORES_FILE)
         professores_nomes = [u.get('nome', u['usuario']) for u in professores]
         e_prof = customtkinter.CTkComboBox(top, values=professores_nomes)
         e_prof.pack(fill='x', padx=20, pady=(0, 5))
@@ -2622,19 +3244,28 @@ Data de Nascimento: {nascimento}"""
                 messagebox.showerror('Erro', 'Todos os campos são obrigatórios.', parent=top)
                 return
 
-            if edit and t:
-                t['serie'] = serie
-                t['turma'] = turma_letra
-                t['tempo_curso'] = tempo_curso
-                t['limite_alunos'] = limite_alunos
-                t['professor'] = professor_responsavel
-            else:
-                novo_id = max([x.get('id', 0) for x in data], default=0) + 1
-                data.append({'id': novo_id, 'serie': serie, 'turma': turma_letra, 'tempo_curso': tempo_curso, 'limite_alunos': limite_alunos, 'professor': professor_responsavel, 'alunos': []})
-            
-            salvar_json(TURMAS_FILE, data)
-            refresh()
-            top.destroy()
+            def gravar():
+                # Relê as turmas: alterações feitas enquanto o formulário estava aberto são mantidas
+                data = carregar_json(TURMAS_FILE)
+                if edit and t:
+                    alvo = next((x for x in data if x['id'] == t['id']), None)
+                    if alvo is not None:
+                        alvo['serie'] = serie
+                        alvo['turma'] = turma_letra
+                        alvo['tempo_curso'] = tempo_curso
+                        alvo['limite_alunos'] = limite_alunos
+                        alvo['professor'] = professor_responsavel
+                else:
+                    novo_id = max([x.get('id', 0) for x in data], default=0) + 1
+                    data.append({'id': novo_id, 'serie': serie, 'turma': turma_letra, 'tempo_curso': tempo_curso, 'limite_alunos': limite_alunos, 'professor': professor_responsavel, 'alunos': []})
+                
+                salvar_json(TURMAS_FILE, data)
+
+            def concluir(_):
+                refresh()
+                top.destroy()
+
+            carregador.acao(top, gravar, concluir)
 
         customtkinter.CTkButton(top, text='Salvar', command=salvar).pack(pady=20)
 
@@ -2647,11 +3278,14 @@ Data de Nascimento: {nascimento}"""
         if not messagebox.askyesno('Confirmar', 'Confirma a exclusão da turma selecionada?'):
             return
 
-        turmas = carregar_json(TURMAS_FILE)
         turma_id = int(tree.item(sel[0])['values'][0]) # Garantir que o ID é int
-        turmas = [x for x in turmas if x['id'] != turma_id]
-        salvar_json(TURMAS_FILE, turmas)
-        refresh()
+
+        def gravar():
+            turmas = carregar_json(TURMAS_FILE)
+            turmas = [x for x in turmas if x['id'] != turma_id]
+            salvar_json(TURMAS_FILE, turmas)
+
+        carregador.acao(tree, gravar, lambda _: refresh())
 
     # --------- ALUNOS (atribuição) ---------
     def _admin_alunos_tab(self, parent_tab):
@@ -2702,59 +3336,48 @@ Data de Nascimento: {nascimento}"""
         tree.column('turma', width=150)
         tree.pack(fill='both', expand=True, padx=10, pady=10)
 
-        def refresh_alunos_list(termo_pesquisa=None, serie_filtro=None, turma_filtro=None):
-            for i in tree.get_children():
-                tree.delete(i)
-            
-            usuarios = carregar_json(ALUNOS_FILE)  # Agora busca diretamente no arquivo de alunos
-            turmas = carregar_json(TURMAS_FILE)
-            
-            # Mapeia cada aluno (RA) à sua turma para consulta rápida
-            mapa_aluno_turma = {}
-            for t in turmas:
-                nome_turma = f"{t.get('serie', '')} - {t.get('turma', '')}"
-                for aluno_ra in t.get('alunos', []):
-                    # Garantir que o RA seja tratado como string
-                    ra_string = str(aluno_ra).strip()
-                    mapa_aluno_turma[ra_string] = nome_turma
-
-            # Filtra apenas os usuários que são alunos (todos do arquivo já são alunos)
-            alunos = usuarios
+        # Alunos carregados por página, conforme a rolagem
+        lista_alunos = ListaPaginada(tree, ALUNOS_FILE, campos=['nome', 'ra', 'usuario', 'data_nascimento'])
 
-            # Aplica filtro de pesquisa por texto
+        def refresh_alunos_list(termo_pesquisa=None, serie_filtro=None, turma_filtro=None):
+            # Mapa RA -> turma compartilhado (refeito só quando turmas.json muda), buscado em
+            # segundo plano no mesmo grupo da lista: um refresh mais novo descarta o anterior
+            carregador.executar(tree, obter_mapa_aluno_turma,
+                                lambda mapa: listar_alunos(mapa, termo_pesquisa, serie_filtro, turma_filtro),
+                                recarregar=lambda: refresh_alunos_list(termo_pesquisa, serie_filtro, turma_filtro))
+
+        def listar_alunos(mapa_turmas, termo_pesquisa, serie_filtro, turma_filtro):
+            def nome_turma_do_aluno(ra):
+                t = mapa_turmas.get(str(ra).strip())
+                return f"{t.get('serie', '')} - {t.get('turma', '')}" if t else "Sem turma"
+
+            # Busca por texto e ordenação no servidor; só os alunos encontrados são baixados
+            consulta = {'ordem': ['nome']}
             if termo_pesquisa:
-                alunos = [
-                    u for u in alunos if
-                    termo_pesquisa in u.get('nome', '').lower() or
-                    termo_pesquisa in u.get('usuario', '').lower() or
-                    termo_pesquisa in str(u.get('ra', '')).lower()
-                ]
+                consulta['contem'] = {'nome|usuario|ra': termo_pesquisa}
 
-            # Aplica filtros de série e turma
+            # Série/turma: RAs das turmas que atendem ao filtro (busca pelo índice de RA)
             if serie_filtro or turma_filtro:
-                alunos_filtrados_turma = []
-                for aluno in alunos:
-                    ra_aluno = aluno.get('ra')
-                    turma_aluno = mapa_aluno_turma.get(ra_aluno, "Sem turma")
-                    
-                    match_serie = not serie_filtro or serie_filtro in turma_aluno
-                    match_turma = not turma_filtro or turma_filtro in turma_aluno
-                    
-                    if match_serie and match_turma:
-                        alunos_filtrados_turma.append(aluno)
-                alunos = alunos_filtrados_turma
+                consulta['igual'] = {'ra': [
+                    ra for ra in mapa_turmas
+                    if (not serie_filtro or serie_filtro in nome_turma_do_aluno(ra)) and
+                       (not turma_filtro or turma_filtro in nome_turma_do_aluno(ra))
+                ]}
 
-            for aluno in sorted(alunos, key=lambda x: x.get('nome', '')):
+            def inserir_aluno(aluno):
                 nome = aluno.get('nome', '')
                 ra = str(aluno.get('ra', '')).strip()  # Garantir que seja string
                 usuario = aluno.get('usuario', '')
                 data_nascimento = aluno.get('data_nascimento', 'N/A')
-                turma_aluno = mapa_aluno_turma.get(ra, "Sem turma")
+                turma_aluno = nome_turma_do_aluno(ra)
                 
-                # Debug para verificar os dados sendo inseridos
                 tree.insert('', 'end', values=(nome, ra, usuario, data_nascimento, turma_aluno))
+
+            lista_alunos.recarregar(inserir_aluno, chave='ra', **consulta)
         
         refresh_alunos_list()
+        # Alunos ou turmas alterados no servidor: reaplica os filtros atuais
+        assinar_alteracoes(tree, [ALUNOS_FILE, TURMAS_FILE], aplicar_filtros)
 
         frm_botoes_aluno = customtkinter.CTkFrame(parent_tab)
         frm_botoes_aluno.pack(fill='x', padx=10, pady=5)
@@ -2774,29 +3397,40 @@ Data de Nascimento: {nascimento}"""
 
     def _aluno_form(self, refresh_callback=None, edit=False, prefill_data=None, tree=None):
         """Formulário completo para criação/edição de alunos com interface moderna"""
-        top = customtkinter.CTkToplevel(self)
-        top.geometry('750x900')
-        top.resizable(True, True)
-        top.grab_set()
-        
-        # Configurar título baseado no modo
-        usuarios = carregar_json(ALUNOS_FILE)  # Buscar apenas no arquivo de alunos
-        aluno_selecionado = None
         ra_original = None
         
         if edit:
             if not tree or not tree.selection():
-                messagebox.showerror("Erro", "Selecione um aluno para alterar.", parent=top)
-                top.destroy()
+                messagebox.showerror("Erro", "Selecione um aluno para alterar.")
                 return
             
             # Obter valores do item selecionado
             item_values = tree.item(tree.selection()[0])['values']
             # Estrutura: (nome, ra, usuario, turma)
             ra_original = str(item_values[1]).strip()  # RA está na segunda coluna
-            
 
-            
+        def buscar():
+            # Dados do formulário, em segundo plano: alunos e turmas (edição) e
+            # todos os usuários (sugestão de login ao completar uma matrícula)
+            usuarios = carregar_json(ALUNOS_FILE) if edit else []  # Buscar apenas no arquivo de alunos
+            turmas = carregar_json(TURMAS_FILE) if edit else []
+            todos_usuarios = carregar_todos_usuarios() if prefill_data and prefill_data.get('Nome') else []
+            return usuarios, turmas, todos_usuarios
+
+        carregador.acao(tree or self, buscar,
+                        lambda dados: self._abrir_aluno_form(refresh_callback, edit, prefill_data, ra_original, *dados),
+                        falha="Falha ao carregar os dados")
+
+    def _abrir_aluno_form(self, refresh_callback, edit, prefill_data, ra_original, usuarios, turmas, todos_usuarios):
+        top = customtkinter.CTkToplevel(self)
+        top.geometry('750x900')
+        top.resizable(True, True)
+        top.grab_set()
+        
+        # Configurar título baseado no modo
+        aluno_selecionado = None
+        
+        if edit:
             # Buscar aluno pelo RA - comparação mais robusta
             aluno_selecionado = None
             for u in usuarios:
@@ -2826,7 +3460,6 @@ Data de Nascimento: {nascimento}"""
 
         if edit and aluno_selecionado:
             # Buscar informações da turma do aluno
-            turmas = carregar_json(TURMAS_FILE)
             turma_aluno = None
             for t in turmas:
                 if ra_original in t.get('alunos', []):
@@ -3054,7 +3687,6 @@ Data de Nascimento: {nascimento}"""
                 usuario_sugerido = normalizar_texto(usuario_sugerido)
                 
                 # Verificar disponibilidade
-                todos_usuarios = carregar_todos_usuarios()
                 contador = 1
                 usuario_final = usuario_sugerido
                 while any(u['usuario'] == usuario_final for u in todos_usuarios):
@@ -3125,51 +3757,53 @@ Data de Nascimento: {nascimento}"""
                     return
                 senha_para_salvar = bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
-            # Carregar dados
-            data = carregar_json(ALUNOS_FILE)  # Usar arquivo específico de alunos
+            def concluir():
+                if refresh_callback:
+                    refresh_callback()
+                
+                top.destroy()
 
             if edit:
-                # Editar aluno existente
-                aluno_encontrado = False
-                for usuario_data in data:
-                    ra_atual = str(usuario_data.get('ra', '')).strip()
-                    ra_procurado = str(ra_original).strip()
-                    
-                    if ra_atual == ra_procurado:
-                        # Atualizar dados
-                        usuario_data.update({
-                            'nome': nome,
-                            'data_nascimento': data_nascimento,
-                            'status': status,
-                            'observacoes': observacoes
-                        })
-                        
-                        if senha_para_salvar:
-                            usuario_data['senha'] = senha_para_salvar
+                def gravar_edicao():
+                    # Lê, altera e salva em segundo plano; retorna se o aluno foi encontrado
+                    data = carregar_json(ALUNOS_FILE)  # Usar arquivo específico de alunos
+                    for usuario_data in data:
+                        ra_atual = str(usuario_data.get('ra', '')).strip()
+                        ra_procurado = str(ra_original).strip()
                         
-                        aluno_encontrado = True
+                        if ra_atual == ra_procurado:
+                            # Atualizar dados
+                            usuario_data.update({
+                                'nome': nome,
+                                'data_nascimento': data_nascimento,
+                                'status': status,
+                                'observacoes': observacoes
+                            })
+                            
+                            if senha_para_salvar:
+                                usuario_data['senha'] = senha_para_salvar
+                            
+                            salvar_json(ALUNOS_FILE, data)
+                            return True
+                    return False
 
-                        break
-                
-                if not aluno_encontrado:
-                    messagebox.showerror('Erro', f'Aluno com RA {ra_original} não encontrado para alteração.', parent=top)
-                    return
+                def edicao_concluida(aluno_encontrado):
+                    if not aluno_encontrado:
+                        messagebox.showerror('Erro', f'Aluno com RA {ra_original} não encontrado para alteração.', parent=top)
+                        return
                     
-                messagebox.showinfo('✅ Sucesso', f'Dados do aluno "{nome}" foram atualizados com sucesso!', parent=top)
-            else:
-                # Criar novo aluno
-                # Verificar se usuário já existe (verificar todos os tipos de usuário)
-                todos_usuarios = carregar_todos_usuarios()
-                if any(u['usuario'] == usuario for u in todos_usuarios):
-                    messagebox.showerror('Erro', f'O usuário "{usuario}" já existe.', parent=top)
-                    e_user.focus()
-                    return
-                
-                if not senha_para_salvar:
-                    messagebox.showerror('Erro', 'A senha é obrigatória para novos alunos.', parent=top)
-                    e_pass.focus()
-                    return
+                    messagebox.showinfo('✅ Sucesso', f'Dados do aluno "{nome}" foram atualizados com sucesso!', parent=top)
+                    concluir()
+
+                carregador.acao(top, gravar_edicao, edicao_concluida)
+                return
+
+            if not senha_para_salvar:
+                messagebox.showerror('Erro', 'A senha é obrigatória para novos alunos.', parent=top)
+                e_pass.focus()
+                return
 
+            def gerar_ra(data):
                 # Gerar novo RA - 8 dígitos começando com 1 (10000000)
                 ras_existentes = []
                 for u in data:
@@ -3188,7 +3822,19 @@ Data de Nascimento: {nascimento}"""
                 else:
                     proximo_ra = 10000000  # Primeiro RA no novo formato
                 
-                novo_ra = str(proximo_ra)  # RA já tem 8 dígitos
+                return str(proximo_ra)  # RA já tem 8 dígitos
+
+            def verificar_novo():
+                # Verificar se usuário já existe (todos os tipos de usuário) e prever o RA, em segundo plano
+                if any(u['usuario'] == usuario for u in carregar_todos_usuarios()):
+                    return None
+                return gerar_ra(carregar_json(ALUNOS_FILE))
+
+            def confirmar_novo(novo_ra):
+                if novo_ra is None:
+                    messagebox.showerror('Erro', f'O usuário "{usuario}" já existe.', parent=top)
+                    e_user.focus()
+                    return
 
                 # === CONFIRMAÇÃO DE CADASTRO ===
                 confirmacao_texto = f"""🎓 CONFIRMAR CADASTRO DE NOVO ALUNO
@@ -3208,6 +3854,13 @@ Os dados serão salvos permanentemente no sistema."""
                 ):
                     return  # Usuário cancelou
 
+                carregador.acao(top, gravar_novo, cadastro_concluido)
+
+            def gravar_novo():
+                # Relê o arquivo ao gravar: o RA é recalculado se outro cadastro entrou nesse meio tempo
+                data = carregar_json(ALUNOS_FILE)  # Usar arquivo específico de alunos
+                novo_ra = gerar_ra(data)
+
                 # Criar estrutura do aluno com dados simplificados
                 novo_aluno = {
                     'tipo': 'aluno',  # Identificação do tipo
@@ -3221,9 +3874,12 @@ Os dados serão salvos permanentemente no sistema."""
                     'data_cadastro': datetime.now().strftime('%d/%m/%Y %H:%M:%S')
                 }
                 
-                # Adicionar à lista
+                # Adicionar à lista e salvar arquivo
                 data.append(novo_aluno)
-                
+                salvar_json(ALUNOS_FILE, data)
+                return novo_ra
+
+            def cadastro_concluido(novo_ra):
                 # Mensagem de sucesso
                 messagebox.showinfo(
                     '✅ Cadastro Realizado!', 
@@ -3235,14 +3891,9 @@ Os dados serão salvos permanentemente no sistema."""
                     f'O aluno já pode fazer login no sistema!', 
                     parent=top
                 )
+                concluir()
 
-            # Salvar arquivo
-            salvar_json(ALUNOS_FILE, data)
-            
-            if refresh_callback:
-                refresh_callback()
-            
-            top.destroy()
+            carregador.acao(top, verificar_novo, confirmar_novo, falha="Falha ao carregar os dados")
 
         # === RODAPÉ COM BOTÕES ===
         footer_frame = customtkinter.CTkFrame(top, height=80)
@@ -3301,36 +3952,44 @@ Os dados serão salvos permanentemente no sistema."""
         if not messagebox.askyesno("Confirmar Exclusão", f"Tem certeza que deseja excluir o aluno '{nome_aluno}' (RA: {ra_aluno})?\n\nEsta ação não pode ser desfeita."):
             return
 
-        # Remover dos usuários - buscar apenas alunos
-        usuarios = carregar_json(ALUNOS_FILE)  # Agora busca apenas no arquivo de alunos
-        usuarios_filtrados = []
-        aluno_removido = False
-        
-        for u in usuarios:
-            ra_atual = str(u.get('ra', '')).strip()
-            if ra_atual == ra_aluno:
+        def gravar():
+            # Remover dos usuários - buscar apenas alunos (em segundo plano)
+            usuarios = carregar_json(ALUNOS_FILE)  # Agora busca apenas no arquivo de alunos
+            usuarios_filtrados = []
+            aluno_removido = False
+            
+            for u in usuarios:
+                ra_atual = str(u.get('ra', '')).strip()
+                if ra_atual == ra_aluno:
 
-                aluno_removido = True
-                continue  # Pula este usuário (remove da lista)
-            usuarios_filtrados.append(u)
-        
-        if not aluno_removido:
-            messagebox.showerror("Erro", f"Aluno com RA {ra_aluno} não foi encontrado para exclusão.")
-            return
-        
-        # Remover das turmas
-        turmas = carregar_json(TURMAS_FILE)
-        for turma in turmas:
-            alunos_turma = turma.get('alunos', [])
-            # Remover o RA da lista de alunos da turma
-            turma['alunos'] = [ra for ra in alunos_turma if str(ra).strip() != ra_aluno]
+                    aluno_removido = True
+                    continue  # Pula este usuário (remove da lista)
+                usuarios_filtrados.append(u)
+            
+            if not aluno_removido:
+                return False
+            
+            # Remover das turmas
+            turmas = carregar_json(TURMAS_FILE)
+            for turma in turmas:
+                alunos_turma = turma.get('alunos', [])
+                # Remover o RA da lista de alunos da turma
+                turma['alunos'] = [ra for ra in alunos_turma if str(ra).strip() != ra_aluno]
+
+            # Salvar alterações
+            salvar_json(ALUNOS_FILE, usuarios_filtrados)
+            salvar_json(TURMAS_FILE, turmas)
+            return True
 
-        # Salvar alterações
-        salvar_json(ALUNOS_FILE, usuarios_filtrados)
-        salvar_json(TURMAS_FILE, turmas)
+        def concluir(aluno_removido):
+            if not aluno_removido:
+                messagebox.showerror("Erro", f"Aluno com RA {ra_aluno} não foi encontrado para exclusão.")
+                return
+            
+            messagebox.showinfo("Sucesso", f"Aluno '{nome_aluno}' foi excluído com sucesso.")
+            refresh_callback()
 
-        messagebox.showinfo("Sucesso", f"Aluno '{nome_aluno}' foi excluído com sucesso.")
-        refresh_callback()
+        carregador.acao(tree, gravar, concluir)
 
     def _gerenciar_alunos_turma(self, tree, refresh):
         sel = tree.selection()
@@ -3339,11 +3998,11 @@ Os dados serão salvos permanentemente no sistema."""
             return
         turma_values = tree.item(sel[0])['values']
         turma_id = turma_values[0]
-        turmas = carregar_json(TURMAS_FILE)
-        t = next((x for x in turmas if x['id'] == turma_id), None)
-        if not t:
-            return
+        carregador.acao(tree, lambda: next((x for x in carregar_json(TURMAS_FILE) if x['id'] == turma_id), None),
+                        lambda t: self._abrir_alunos_turma(turma_id, t) if t else None,
+                        falha="Falha ao carregar os dados")
 
+    def _abrir_alunos_turma(self, turma_id, t):
         top = customtkinter.CTkToplevel(self)
         top.title(f"Gerenciar Alunos - Turma {t.get('serie')} {t.get('turma')}")
         top.geometry('600x400')
@@ -3363,14 +4022,17 @@ Os dados serão salvos permanentemente no sistema."""
         frm_botoes.pack(fill='x', padx=10, pady=5)
         
         def refresh_alunos_na_turma():
+            # Recarrega os dados da turma específica e os alunos (em segundo plano)
+            carregador.executar(tree_alunos, lambda: carregar_varios_json(TURMAS_FILE, ALUNOS_FILE),
+                                lambda dados: preencher_alunos_na_turma(*dados))
+
+        def preencher_alunos_na_turma(turmas, todos_usuarios):
             for i in tree_alunos.get_children():
                 tree_alunos.delete(i)
             
-            # Recarrega os dados da turma específica
-            turma_atualizada = next((x for x in carregar_json(TURMAS_FILE) if x['id'] == turma_id), None)
+            turma_atualizada = next((x for x in turmas if x['id'] == turma_id), None)
             if turma_atualizada:
                 alunos_na_turma_ra = turma_atualizada.get('alunos', [])
-                todos_usuarios = carregar_json(ALUNOS_FILE)  # Buscar apenas alunos
                 
                 for ra_aluno in alunos_na_turma_ra:
                     # Encontra o aluno pelo RA
@@ -3407,11 +4069,13 @@ Os dados serão salvos permanentemente no sistema."""
 
         def pesquisar_alunos():
             termo = e_pesquisa.get().lower().strip()
+            # Alunos e turmas em segundo plano (a pesquisa mais recente prevalece)
+            carregador.executar(tree_resultados, lambda: carregar_varios_json(ALUNOS_FILE, TURMAS_FILE),
+                                lambda dados: mostrar_resultados(termo, *dados))
+
+        def mostrar_resultados(termo, todos_usuarios, turmas):
             for i in tree_resultados.get_children():
                 tree_resultados.delete(i)
-
-            todos_usuarios = carregar_json(ALUNOS_FILE)  # Buscar apenas alunos
-            turmas = carregar_json(TURMAS_FILE)
             
             # Obter RAs de todos os alunos já matriculados em qualquer turma
             ras_matriculados = set()
@@ -3445,30 +4109,39 @@ Os dados serão salvos permanentemente no sistema."""
             
             ra_aluno = tree_resultados.item(sel[0])['values'][0]
             
-            turmas = carregar_json(TURMAS_FILE)
-            turma_alvo = next((t for t in turmas if t['id'] == turma_id), None)
+            def gravar():
+                # Lê, confere e salva em segundo plano; retorna o aviso a exibir (None se adicionou)
+                turmas = carregar_json(TURMAS_FILE)
+                turma_alvo = next((t for t in turmas if t['id'] == turma_id), None)
+                if not turma_alvo:
+                    return False
 
-            if turma_alvo:
                 # Verificação dupla para garantir que o aluno não foi adicionado enquanto a janela estava aberta
                 if ra_aluno in turma_alvo.get('alunos', []):
-                    messagebox.showwarning('Aviso', 'Este aluno já está na turma.', parent=top)
-                    return
+                    return 'Este aluno já está na turma.'
                 
                 # Verifica se o aluno já está em outra turma
                 for t in turmas:
 
                     if ra_aluno in t.get('alunos', []):
-                         messagebox.showwarning('Aviso', f"Este aluno já está matriculado na turma {t.get('serie')} - {t.get('turma')}.", parent=top)
-                         return
+                         return f"Este aluno já está matriculado na turma {t.get('serie')} - {t.get('turma')}."
 
                 turma_alvo.setdefault('alunos', []).append(ra_aluno)
                 salvar_json(TURMAS_FILE, turmas)
-                messagebox.showinfo('Sucesso', 'Aluno adicionado à turma com sucesso.', parent=top)
-                refresh_func() # Atualiza a lista de alunos na janela de gerenciamento
-                pesquisar_alunos() # Atualiza a lista de pesquisa para remover o aluno adicionado
-            else:
-                messagebox.showerror('Erro', 'Turma não encontrada. A operação foi cancelada.', parent=top)
-                top.destroy()
+                return None
+
+            def concluir(aviso):
+                if aviso is False:
+                    messagebox.showerror('Erro', 'Turma não encontrada. A operação foi cancelada.', parent=top)
+                    top.destroy()
+                elif aviso:
+                    messagebox.showwarning('Aviso', aviso, parent=top)
+                else:
+                    messagebox.showinfo('Sucesso', 'Aluno adicionado à turma com sucesso.', parent=top)
+                    refresh_func() # Atualiza a lista de alunos na janela de gerenciamento
+                    pesquisar_alunos() # Atualiza a lista de pesquisa para remover o aluno adicionado
+
+            carregador.acao(top, gravar, concluir)
 
         # --- Botão de Adicionar ---
         customtkinter.CTkButton(top, text='Adicionar Aluno Selecionado', command=adicionar_aluno_selecionado).pack(pady=10)
@@ -3483,19 +4156,27 @@ Os dados serão salvos permanentemente no sistema."""
             return
         
         aluno_ra = tree.item(sel[0])['values'][0]
-        turmas = carregar_json(TURMAS_FILE)
         
-        for t in turmas:
-            if t['id'] == turma_id:
-                if aluno_ra in t.get('alunos', []):
-                    t['alunos'].remove(aluno_ra)
-                    salvar_json(TURMAS_FILE, turmas)
-                    messagebox.showinfo('Sucesso', 'Aluno removido da turma com sucesso.')
-                else:
-                    messagebox.showwarning('Aviso', 'Aluno não encontrado nesta turma.')
-                break
-        
-        refresh_func()
+        def gravar():
+            # Retorna se removeu (None se a turma não existe mais)
+            turmas = carregar_json(TURMAS_FILE)
+            for t in turmas:
+                if t['id'] == turma_id:
+                    if aluno_ra in t.get('alunos', []):
+                        t['alunos'].remove(aluno_ra)
+                        salvar_json(TURMAS_FILE, turmas)
+                        return True
+                    return False
+            return None
+
+        def concluir(removido):
+            if removido:
+                messagebox.showinfo('Sucesso', 'Aluno removido da turma com sucesso.')
+            elif removido is False:
+                messagebox.showwarning('Aviso', 'Aluno não encontrado nesta turma.')
+            refresh_func()
+
+        carregador.acao(tree, gravar, concluir)
 
     # --------- MATÉRIAS ---------
     def _admin_materias_tab(self, parent_tab):
@@ -3529,33 +4210,34 @@ Os dados serão salvos permanentemente no sistema."""
             mapa_nome_prof = {v: k for k, v in self.mapa_professores.items()}
             prof_login_sel = mapa_nome_prof.get(prof_sel)
 
-            for i in tree.get_children():
-                tree.delete(i)
-
-            materias = carregar_json(MATERIAS_FILE)
-            turmas = carregar_json(TURMAS_FILE)
+            def preencher(materias, turmas):
+                for i in tree.get_children():
+                    tree.delete(i)
 
-            for m in materias:
-                # Buscar informações da turma pelo ID
-                turma_info = next((t for t in turmas if t.get('id') == m.get('turma_id')), None)
+                for m in materias:
+                    # Buscar informações da turma pelo ID
+                    turma_info = next((t for t in turmas if t.get('id') == m.get('turma_id')), None)
                 
-                if turma_info:
-                    serie_materia = turma_info.get('serie', '')
-                    turma_materia = turma_info.get('turma', '')
-                else:
-                    # Compatibilidade com formato antigo
-                    serie_materia = m.get('serie', '')
-                    turma_materia = m.get('turma', '')
+                    if turma_info:
+                        serie_materia = turma_info.get('serie', '')
+                        turma_materia = turma_info.get('turma', '')
+                    else:
+                        # Compatibilidade com formato antigo
+                        serie_materia = m.get('serie', '')
+                        turma_materia = m.get('turma', '')
+
+                    # Lógica de filtro
+                    match_serie = not serie_sel or serie_materia == serie_sel
+                    match_turma = not turma_sel or turma_materia == turma_sel
+                    match_prof = not prof_sel or m.get('professor') == prof_login_sel
 
-                # Lógica de filtro
-                match_serie = not serie_sel or serie_materia == serie_sel
-                match_turma = not turma_sel or turma_materia == turma_sel
-                match_prof = not prof_sel or m.get('professor') == prof_login_sel
+                    if match_serie and match_turma and match_prof:
+                        # Usar o mapa para obter o nome do professor a partir do login
+                        nome_professor = self.mapa_professores.get(m.get('professor'), 'N/A')
+                        tree.insert('', 'end', values=(m['id'], m['nome'], serie_materia, turma_materia, nome_professor))
 
-                if match_serie and match_turma and match_prof:
-                    # Usar o mapa para obter o nome do professor a partir do login
-                    nome_professor = self.mapa_professores.get(m.get('professor'), 'N/A')
-                    tree.insert('', 'end', values=(m['id'], m['nome'], serie_materia, turma_materia, nome_professor))
+            carregador.executar(tree, lambda: carregar_varios_json(MATERIAS_FILE, TURMAS_FILE),
+                                lambda dados: preencher(*dados), recarregar=aplicar_filtros)
 
         customtkinter.CTkButton(frm_filtros, text="Aplicar Filtros", command=aplicar_filtros).pack(side='right', padx=5)
         customtkinter.CTkButton(frm_filtros, text="Limpar", command=lambda: (e_serie_filtro.set(''), e_turma_filtro.set(''), e_prof_filtro.set(''), refresh())).pack(side='right', padx=5)
@@ -3580,12 +4262,13 @@ Os dados serão salvos permanentemente no sistema."""
             e_serie_filtro.set('')
             e_turma_filtro.set('')
             e_prof_filtro.set('')
+            carregador.executar(tree, lambda: carregar_varios_json(MATERIAS_FILE, TURMAS_FILE),
+                                lambda dados: preencher(*dados), recarregar=refresh)
+
+        def preencher(materias, turmas):
             for i in tree.get_children():
                 tree.delete(i)
-            
-            materias = carregar_json(MATERIAS_FILE)
-            turmas = carregar_json(TURMAS_FILE)
-            
+
             for m in materias:
                 # Buscar informações da turma pelo ID
                 turma_info = next((t for t in turmas if t.get('id') == m.get('turma_id')), None)
@@ -3621,21 +4304,25 @@ Os dados serão salvos permanentemente no sistema."""
         ).pack(side='right', padx=5)
         
     def _materia_form(self, refresh, edit=False, tree=None):
-        top = customtkinter.CTkToplevel(self)
-        top.title('Matéria')
-        top.geometry('400x400')
-        top.resizable(False, False)
-        data = carregar_json(MATERIAS_FILE)
-        m = None
-
+        materia_id = None
         if edit and tree:
             sel = tree.selection()
             if not sel:
                 messagebox.showwarning('Erro', 'Selecione uma matéria.')
-                top.destroy()
                 return
-            values = tree.item(sel[0])['values']
-            m = next((x for x in data if x['id'] == values[0]), None)
+            materia_id = tree.item(sel[0])['values'][0]
+
+        # Matérias e turmas disponíveis em segundo plano
+        carregador.acao(tree or self, lambda: carregar_varios_json(MATERIAS_FILE, TURMAS_FILE),
+                        lambda dados: self._abrir_materia_form(refresh, edit, materia_id, *dados),
+                        falha="Falha ao carregar os dados")
+
+    def _abrir_materia_form(self, refresh, edit, materia_id, data, turmas_data):
+        top = customtkinter.CTkToplevel(self)
+        top.title('Matéria')
+        top.geometry('400x400')
+        top.resizable(False, False)
+        m = next((x for x in data if x['id'] == materia_id), None) if materia_id is not None else None
 
         customtkinter.CTkLabel(top, text='Nome:').pack(anchor='w', pady=(10, 0), padx=20)
         e_nome = customtkinter.CTkEntry(top)
@@ -3644,8 +4331,7 @@ Os dados serão salvos permanentemente no sistema."""
             e_nome.insert(0, m['nome'])
 
         customtkinter.CTkLabel(top, text='Turma:').pack(anchor='w', pady=(10, 0), padx=20)
-        # Carregar turmas disponíveis
-        turmas_data = carregar_json(TURMAS_FILE)
+        # Turmas disponíveis
         turmas_options = [f"{t.get('serie', '')} - {t.get('turma', '')} (ID: {t.get('id', '')})" for t in turmas_data]
         
         e_turma = customtkinter.CTkComboBox(top, values=turmas_options if turmas_options else ["Nenhuma turma disponível"])
@@ -3694,17 +4380,26 @@ Os dados serão salvos permanentemente no sistema."""
                 messagebox.showerror('Erro', 'Professor selecionado não é válido.', parent=top)
                 return
 
-            if edit and m:
-                m['nome'] = nome
-                m['turma_id'] = turma_id
-                m['professor'] = login_prof
-            else:
-                novo_id = max([x.get('id', 0) for x in data], default=0) + 1
-                data.append({'id': novo_id, 'nome': nome, 'turma_id': turma_id, 'professor': login_prof})
-            
-            salvar_json(MATERIAS_FILE, data)
-            refresh()
-            top.destroy()
+            def gravar():
+                # Relê as matérias: alterações feitas enquanto o formulário estava aberto são mantidas
+                data = carregar_json(MATERIAS_FILE)
+                if edit and m:
+                    alvo = next((x for x in data if x['id'] == m['id']), None)
+                    if alvo is not None:
+                        alvo['nome'] = nome
+                        alvo['turma_id'] = turma_id
+                        alvo['professor'] = login_prof
+                else:
+                    novo_id = max([x.get('id', 0) for x in data], default=0) + 1
+                    data.append({'id': novo_id, 'nome': nome, 'turma_id': turma_id, 'professor': login_prof})
+                
+                salvar_json(MATERIAS_FILE, data)
+
+            def concluir(_):
+                refresh()
+                top.destroy()
+
+            carregador.acao(top, gravar, concluir)
 
         customtkinter.CTkButton(top, text='Salvar', command=salvar).pack(pady=20)
 
@@ -3718,11 +4413,14 @@ Os dados serão salvos permanentemente no sistema."""
         if not messagebox.askyesno('Confirmar', 'Confirma a exclusão da matéria selecionada?'):
             return
 
-        data = carregar_json(MATERIAS_FILE)
         mid = tree.item(sel[0])['values'][0]
-        data = [x for x in data if x['id'] != mid]
-        salvar_json(MATERIAS_FILE, data)
-        refresh()
+
+        def gravar():
+            data = carregar_json(MATERIAS_FILE)
+            data = [x for x in data if x['id'] != mid]
+            salvar_json(MATERIAS_FILE, data)
+
+        carregador.acao(tree, gravar, lambda _: refresh())
 
     def _admin_pedidos_tab(self, parent_tab):
         main_frame = customtkinter.CTkFrame(parent_tab, fg_color="transparent")
@@ -3772,17 +4470,21 @@ Os dados serão salvos permanentemente no sistema."""
         btn_recusar = customtkinter.CTkButton(action_frame, text="Recusar Pedido", state="disabled", fg_color="#dc3545", hover_color="#c82333", command=lambda: recusar_pedido())
         btn_recusar.pack(side='right', padx=5)
 
-        def refresh_pedidos():
+        # Pedidos carregados por página, conforme a rolagem (só as colunas da lista)
+        lista_pedidos = ListaPaginada(tree_pedidos, PEDIDOS_FILE, campos=['id', 'data', 'tipo', 'status', 'solicitante_nome'])
+
+        def inserir_pedido(p):
+            if not tree_pedidos.exists(p['id']):
+                tree_pedidos.insert('', 'end', iid=p['id'], values=(
+                    p['id'], p.get('data', ''), p.get('tipo', ''), p.get('status', ''), p.get('solicitante_nome', '')
+                ))
+
+        def refresh_pedidos(ao_carregar=None):
             status_filtro = combo_status.get()
-            for i in tree_pedidos.get_children():
-                tree_pedidos.delete(i)
-            
-            pedidos = carregar_json(PEDIDOS_FILE)
-            for p in sorted(pedidos, key=lambda x: x.get('data', ''), reverse=True):
-                if status_filtro == "Todos" or p.get('status') == status_filtro:
-                    tree_pedidos.insert('', 'end', iid=p['id'], values=(
-                        p['id'], p.get('data', ''), p.get('tipo', ''), p.get('status', ''), p.get('solicitante_nome', '')
-                    ))
+            
+            # Filtro de status e ordenação no servidor
+            igual = None if status_filtro == "Todos" else {'status': status_filtro}
+            lista_pedidos.recarregar(inserir_pedido, chave='id', ao_carregar=ao_carregar, igual=igual, ordem=['-data'])
             on_pedido_select() # Limpar detalhes
 
         def on_pedido_select(event=None):
@@ -3798,8 +4500,19 @@ Os dados serão salvos permanentemente no sistema."""
                 return
 
             pedido_id = int(sel[0])
-            pedidos = carregar_json(PEDIDOS_FILE)
-            pedido = next((p for p in pedidos if p['id'] == pedido_id), None)
+            # Sem ações até o pedido selecionado chegar
+            btn_aprovar.configure(state="disabled")
+            btn_recusar.configure(state="disabled")
+            txt_descricao.configure(state="disabled")
+            # Pedido completo em segundo plano (a seleção mais recente prevalece)
+            carregador.executar(txt_descricao, lambda: next((p for p in carregar_json(PEDIDOS_FILE) if p['id'] == pedido_id), None),
+                                lambda pedido: mostrar_pedido(pedido_id, pedido))
+
+        def mostrar_pedido(pedido_id, pedido):
+            sel = tree_pedidos.selection()
+            if not sel or int(sel[0]) != pedido_id:
+                return  # a seleção mudou enquanto o pedido chegava
+            txt_descricao.configure(state="normal")
 
             if pedido:
                 lbl_detalhes.configure(text=f"Detalhes do Pedido #{pedido_id} - {pedido.get('tipo')}")
@@ -3823,12 +4536,11 @@ Os dados serão salvos permanentemente no sistema."""
             sel = tree_pedidos.selection()
             if not sel: return
             pedido_id = int(sel[0])
-            pedidos = carregar_json(PEDIDOS_FILE)
-            pedido = next((p for p in pedidos if p['id'] == pedido_id), None)
-            if not pedido: return
+            carregador.acao(tree_pedidos, lambda: next((p for p in carregar_json(PEDIDOS_FILE) if p['id'] == pedido_id), None),
+                            lambda pedido: completar_matricula(pedido_id, pedido) if pedido else None,
+                            falha="Falha ao carregar os dados")
 
-
-            
+        def completar_matricula(pedido_id, pedido):
             # Verificar se o pedido tem dados estruturados (novo formato)
             if 'dados_aluno' in pedido and 'dados_responsavel' in pedido:
                 # Novo formato - usar dados estruturados
@@ -3887,10 +4599,7 @@ Os dados serão salvos permanentemente no sistema."""
             
             # Chamar o formulário de aluno, passando os dados pré-preenchidos
             self._aluno_form(
-                refresh_callback=lambda: (
-                    atualizar_status_pedido(pedido_id, "Aprovado"),
-                    refresh_pedidos()
-                ),
+                refresh_callback=lambda: atualizar_status_pedido(pedido_id, "Aprovado", ao_concluir=refresh_pedidos),
                 prefill_data=dados_aluno
             )
 
@@ -3899,21 +4608,33 @@ Os dados serão salvos permanentemente no sistema."""
             if not sel: return
             pedido_id = int(sel[0])
             if messagebox.askyesno("Confirmar", "Tem certeza que deseja recusar este pedido?"):
-                atualizar_status_pedido(pedido_id, "Recusado")
-                refresh_pedidos()
-
-        def atualizar_status_pedido(pedido_id, novo_status, ra_aluno=None):
-            pedidos = carregar_json(PEDIDOS_FILE)
-            for p in pedidos:
-                if p['id'] == pedido_id:
-                    p['status'] = novo_status
-                    if ra_aluno:
-                        p['aluno_ra'] = ra_aluno
-                    break
-            salvar_json(PEDIDOS_FILE, pedidos)
+                atualizar_status_pedido(pedido_id, "Recusado", ao_concluir=refresh_pedidos)
+
+        def atualizar_status_pedido(pedido_id, novo_status, ra_aluno=None, ao_concluir=None):
+            def gravar():
+                pedidos = carregar_json(PEDIDOS_FILE)
+                for p in pedidos:
+                    if p['id'] == pedido_id:
+                        p['status'] = novo_status
+                        if ra_aluno:
+                            p['aluno_ra'] = ra_aluno
+                        break
+                salvar_json(PEDIDOS_FILE, pedidos)
+            carregador.acao(tree_pedidos, gravar, lambda _: ao_concluir() if ao_concluir else None)
 
         combo_status.configure(command=lambda choice: refresh_pedidos())
         tree_pedidos.bind("<<TreeviewSelect>>", on_pedido_select)
+
+        def atualizar_pedidos_alterados():
+            # Mantém o pedido selecionado (se ainda está na lista)
+            selecionado = tree_pedidos.selection()
+
+            def restaurar_selecao():
+                if selecionado and tree_pedidos.exists(selecionado[0]):
+                    tree_pedidos.selection_set(selecionado[0])
+            refresh_pedidos(ao_carregar=restaurar_selecao)
+
+        assinar_alteracoes(tree_pedidos, [PEDIDOS_FILE], atualizar_pedidos_alterados)
         
         # Adicionar botão de atualizar na área de filtros
         customtkinter.CTkButton(
@@ -3936,21 +4657,26 @@ Os dados serão salvos permanentemente no sistema."""
         user_login = self.usuario_logado['usuario']
         nome_professor = self.mapa_professores.get(user_login, user_login)
 
-        # Buscar turmas onde o professor é responsável (por nome ou login)
-        turmas = carregar_json(TURMAS_FILE)
-        turmas_professor = [t for t in turmas if t.get('professor', '') == nome_professor or t.get('professor_login', '') == user_login]
-        
-        # Buscar matérias do professor
-        materias = carregar_json(MATERIAS_FILE)
-        materias_do_prof = [m for m in materias if m.get('professor') == user_login]
-
         # --- Frame principal para organizar o layout ---
         main_prof_frame = customtkinter.CTkFrame(parent_tab, fg_color="transparent")
         main_prof_frame.pack(fill='both', expand=True)
         main_prof_frame.grid_rowconfigure(0, weight=1)
         main_prof_frame.grid_columnconfigure(0, weight=1)
 
-        tabs_prof = customtkinter.CTkTabview(main_prof_frame)
+        # As abas são montadas quando turmas e matérias chegarem do servidor
+        self._carregar_aba(main_prof_frame, lambda: carregar_varios_json(TURMAS_FILE, MATERIAS_FILE),
+                           lambda dados: self._montar_abas_prof(main_prof_frame, user_login, nome_professor, *dados))
+        
+        self._criar_controles_inferiores(parent_tab)
+
+    def _montar_abas_prof(self, main_prof_frame, user_login, nome_professor, turmas, materias):
+        # Turmas onde o professor é responsável (por nome ou login)
+        turmas_professor = [t for t in turmas if t.get('professor', '') == nome_professor or t.get('professor_login', '') == user_login]
+        
+        # Matérias do professor
+        materias_do_prof = [m for m in materias if m.get('professor') == user_login]
+
+        tabs_prof = customtkinter.CTkTabview(main_prof_frame, command=lambda: carregador.aba_trocada(tabs_prof))
         tabs_prof.grid(row=0, column=0, sticky='nsew', padx=5, pady=5)
 
         # ================= MINHAS TURMAS =================
@@ -3959,21 +4685,26 @@ Os dados serão salvos permanentemente no sistema."""
         
         # ================= MINHAS MATÉRIAS =================
         tab_minhas_materias = tabs_prof.add('Minhas Matérias')
-        self._criar_aba_minhas_materias(tab_minhas_materias, materias_do_prof, user_login)
+        self._criar_aba_minhas_materias(tab_minhas_materias, materias_do_prof, turmas, user_login)
         
         # ================= LANÇAMENTO DE NOTAS =================
         tab_notas = tabs_prof.add('Lançar Notas')
-        self._criar_aba_lancamento_notas(tab_notas, materias_do_prof, user_login)
+        self._criar_aba_lancamento_notas(tab_notas, materias_do_prof, turmas, user_login)
         
         # ================= REGISTROS DE AULA =================
         tab_registros = tabs_prof.add('Registros de Aula')
-        self._criar_aba_registros_aula(tab_registros, materias_do_prof, user_login)
+        self._criar_aba_registros_aula(tab_registros, materias_do_prof, turmas, user_login)
+        
+        # ================= DESEMPENHO =================
+        # Turmas onde o professor é responsável ou leciona alguma matéria
+        ids_turmas_prof = {m.get('turma_id') for m in materias_do_prof}
+        turmas_desempenho = [t for t in turmas if t in turmas_professor or t.get('id') in ids_turmas_prof]
+        tab_desempenho = tabs_prof.add('Desempenho')
+        self._criar_aba_desempenho(tab_desempenho, turmas_desempenho)
         
         # Aba de Segurança
         tab_seguranca = tabs_prof.add("Segurança")
         self._criar_aba_seguranca(tab_seguranca)
-        
-        self._criar_controles_inferiores(parent_tab)
 
     def _criar_aba_minhas_turmas(self, parent_tab, turmas_professor, nome_professor):
         """Cria a aba de visualização das turmas do professor"""
@@ -4002,7 +4733,7 @@ Os dados serão salvos permanentemente no sistema."""
                 turma.get('tempo_curso', '')
             ))
 
-    def _criar_aba_minhas_materias(self, parent_tab, materias_prof, user_login):
+    def _criar_aba_minhas_materias(self, parent_tab, materias_prof, turmas, user_login):
         """Cria a aba de visualização das matérias do professor"""
         if not materias_prof:
             customtkinter.CTkLabel(parent_tab, text="Você não possui matérias atribuídas.", 
@@ -4018,8 +4749,7 @@ Os dados serão salvos permanentemente no sistema."""
         tree_materias.column('turma', width=100)
         tree_materias.pack(fill='both', expand=True, padx=10, pady=10)
 
-        # Obter informações das turmas para exibição
-        turmas = carregar_json(TURMAS_FILE)
+        # Informações das turmas (já carregadas com as abas) para exibição
         turma_info = {t['id']: f"{t.get('serie', '')} - {t.get('turma', '')}" for t in turmas}
         
         for materia in materias_prof:
@@ -4037,7 +4767,7 @@ Os dados serão salvos permanentemente no sistema."""
         customtkinter.CTkButton(btn_frame, text='Ver Alunos e Notas', 
                                command=lambda: self._visualizar_alunos_materia(tree_materias)).pack(side='left', padx=5)
 
-    def _criar_aba_registros_aula(self, parent_tab, materias_prof, user_login):
+    def _criar_aba_registros_aula(self, parent_tab, materias_prof, turmas, user_login):
         """Cria a aba para registros de aula"""
         if not materias_prof:
             customtkinter.CTkLabel(parent_tab, text="Você não possui matérias para registrar aulas.", 
@@ -4050,8 +4780,7 @@ Os dados serão salvos permanentemente no sistema."""
         top_frame.grid_columnconfigure(1, weight=1)
 
         customtkinter.CTkLabel(top_frame, text="Matéria:").grid(row=0, column=0, padx=10, pady=10, sticky='w')
-        # Obter informações das turmas para mostrar série e turma
-        turmas = carregar_json(TURMAS_FILE)
+        # Informações das turmas (já carregadas com as abas) para mostrar série e turma
         turma_info = {t['id']: f"{t.get('serie', '')} - {t.get('turma', '')}" for t in turmas}
         mapa_materias_prof = {f"{m['nome']} ({turma_info.get(m.get('turma_id'), 'N/A')})": m['id'] for m in materias_prof}
         combo_materias = customtkinter.CTkComboBox(top_frame, values=["Selecione uma matéria"] + list(mapa_materias_prof.keys()))
@@ -4100,11 +4829,21 @@ Os dados serão salvos permanentemente no sistema."""
         tree_registros.pack(fill='both', expand=True, padx=5, pady=5)
 
         def refresh_registros(materia_id=None):
+            # Sem matéria a lista só é limpa (passando pelo carregador, o que
+            # descarta uma carga ainda pendente da matéria anterior)
+            carregador.executar(tree_registros, lambda: carregar_json(REGISTROS_AULA_FILE) if materia_id else [],
+                                lambda registros: preencher_registros(materia_id, registros),
+                                recarregar=lambda: refresh_registros(materia_id), aviso=bool(materia_id))
+
+        # Registros da última carga: a seleção usa estes, sem nova leitura
+        registros_carregados = []
+
+        def preencher_registros(materia_id, registros):
+            registros_carregados[:] = registros
             for i in tree_registros.get_children():
                 tree_registros.delete(i)
             
             if materia_id:
-                registros = carregar_json(REGISTROS_AULA_FILE)
                 registros_materia = [r for r in registros if r.get('materia_id') == materia_id and r.get('professor_login') == user_login]
                 for registro in sorted(registros_materia, key=lambda x: x.get('data', ''), reverse=True):
                     # Contar atividades deste registro
@@ -4132,9 +4871,8 @@ Os dados serão salvos permanentemente no sistema."""
                     tag = tags[0]
                     if tag.startswith('registro_'):
                         registro_index = int(tag.split('_')[1])
-                        registros = carregar_json(REGISTROS_AULA_FILE)
-                        if registro_index < len(registros):
-                            self.registro_selecionado = registros[registro_index]
+                        if registro_index < len(registros_carregados):
+                            self.registro_selecionado = registros_carregados[registro_index]
                             btn_criar_atividade.configure(state="normal")
                             btn_gerenciar_atividades.configure(state="normal")
                             return
@@ -4199,16 +4937,20 @@ Os dados serão salvos permanentemente no sistema."""
                 "atividades": []  # Inicializar lista de atividades vazia
             }
 
-            registros = carregar_json(REGISTROS_AULA_FILE)
-            registros.append(novo_registro)
-            salvar_json(REGISTROS_AULA_FILE, registros)
+            def gravar():
+                registros = carregar_json(REGISTROS_AULA_FILE)
+                registros.append(novo_registro)
+                salvar_json(REGISTROS_AULA_FILE, registros)
+
+            def concluir(_):
+                messagebox.showinfo("Sucesso", "Registro de aula salvo com sucesso.")
+                # Limpar campos e atualizar a lista
+                entry_data.delete(0, 'end')
+                entry_nome_aula.delete(0, 'end')
+                entry_descricao.delete("1.0", "end")
+                refresh_registros(materia_id)
 
-            messagebox.showinfo("Sucesso", "Registro de aula salvo com sucesso.")
-            # Limpar campos e atualizar a lista
-            entry_data.delete(0, 'end')
-            entry_nome_aula.delete(0, 'end')
-            entry_descricao.delete("1.0", "end")
-            refresh_registros(materia_id)
+            carregador.acao(top_frame, gravar, concluir)
 
         btn_salvar = customtkinter.CTkButton(top_frame, text="Salvar Registro", command=salvar_registro)
         btn_salvar.grid(row=4, column=1, padx=10, pady=10, sticky='e')
@@ -4850,34 +5592,35 @@ Os dados serão salvos permanentemente no sistema."""
             return
 
         # === SALVAR ATIVIDADE ===
-        try:
-            # Criar ID único para a atividade
-            atividade_id = int(time.time() * 1000)
-
-            nova_atividade = {
-                "id": atividade_id,
-                "nome": nome_atividade,
-                "descricao": descricao_atividade,
-                "tipo": tipo_atividade,
-                "data_entrega": data_entrega,
-                "pontuacao_maxima": pontuacao_float,
-                "status": status,
-                "professor_login": professor_login,
-                "data_criacao": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
-                "quantidade_questoes": len(perguntas_data),
-                "perguntas": perguntas_data
-            }
+        # Criar ID único para a atividade
+        atividade_id = int(time.time() * 1000)
+
+        nova_atividade = {
+            "id": atividade_id,
+            "nome": nome_atividade,
+            "descricao": descricao_atividade,
+            "tipo": tipo_atividade,
+            "data_entrega": data_entrega,
+            "pontuacao_maxima": pontuacao_float,
+            "status": status,
+            "professor_login": professor_login,
+            "data_criacao": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+            "quantidade_questoes": len(perguntas_data),
+            "perguntas": perguntas_data
+        }
 
+        registro_alvo = self.registro_selecionado
+
+        def gravar():
             # Carregar e atualizar registros de aula
             registros = carregar_json(REGISTROS_AULA_FILE)
             
             # Encontrar e atualizar o registro correspondente
-            registro_encontrado = False
             for i, registro in enumerate(registros):
-                if (registro.get('materia_id') == self.registro_selecionado.get('materia_id') and
-                    registro.get('professor_login') == self.registro_selecionado.get('professor_login') and
-                    registro.get('data') == self.registro_selecionado.get('data') and
-                    registro.get('nome_aula') == self.registro_selecionado.get('nome_aula')):
+                if (registro.get('materia_id') == registro_alvo.get('materia_id') and
+                    registro.get('professor_login') == registro_alvo.get('professor_login') and
+                    registro.get('data') == registro_alvo.get('data') and
+                    registro.get('nome_aula') == registro_alvo.get('nome_aula')):
                     
                     # Inicializar lista de atividades se não existir
                     if 'atividades' not in registros[i]:
@@ -4885,15 +5628,16 @@ Os dados serão salvos permanentemente no sistema."""
                     
                     # Adicionar nova atividade
                     registros[i]['atividades'].append(nova_atividade)
-                    registro_encontrado = True
-                    break
+                    
+                    # Salvar alterações
+                    salvar_json(REGISTROS_AULA_FILE, registros)
+                    return True
+            return False
 
+        def concluir(registro_encontrado):
             if not registro_encontrado:
                 messagebox.showerror("❌ Erro", "Registro de aula não encontrado. Operação cancelada.")
                 return
-
-            # Salvar alterações
-            salvar_json(REGISTROS_AULA_FILE, registros)
             
             # Sucesso!
             messagebox.showinfo(
@@ -4908,9 +5652,8 @@ Os dados serão salvos permanentemente no sistema."""
             
             # Fechar dashboard
             janela.destroy()
-            
-        except Exception as e:
-            messagebox.showerror("❌ Erro", f"Erro ao salvar atividade: {str(e)}")
+
+        carregador.acao(janela, gravar, concluir, falha="❌ Erro ao salvar atividade")
 
 
     def _criar_config_multipla_escolha(self, parent_frame):
@@ -5179,6 +5922,43 @@ Os dados serão salvos permanentemente no sistema."""
             """Bloqueia a atividade selecionada"""
             alterar_status_atividade("Não Liberada")
 
+        def atualizar_atividade(atividade_index, alterar, sucesso, erro):
+            """Relê os registros no pool, aplica alterar() à lista de atividades
+            do registro selecionado e salva; a tabela é atualizada no retorno"""
+            registro_alvo = self.registro_selecionado
+
+            def gravar():
+                # Carregar registros de aula
+                registros = carregar_json(REGISTROS_AULA_FILE)
+                
+                # Encontrar e atualizar o registro correspondente
+                for i, registro in enumerate(registros):
+                    if (registro.get('materia_id') == registro_alvo.get('materia_id') and
+                        registro.get('professor_login') == registro_alvo.get('professor_login') and
+                        registro.get('data') == registro_alvo.get('data') and
+                        registro.get('nome_aula') == registro_alvo.get('nome_aula')):
+                        
+                        if atividade_index < len(registro.get('atividades', [])):
+                            alterar(registros[i]['atividades'])
+                            
+                            # Salvar alterações
+                            salvar_json(REGISTROS_AULA_FILE, registros)
+                            return registros[i]
+                return None
+
+            def concluir(registro):
+                if registro is None:
+                    messagebox.showerror("Erro", erro)
+                    return
+                # Atualizar registro selecionado em memória
+                self.registro_selecionado = registro
+                
+                # Recarregar tabela
+                carregar_atividades()
+                messagebox.showinfo("Sucesso", sucesso)
+
+            carregador.acao(tree_atividades, gravar, concluir)
+
         def alterar_status_atividade(novo_status):
             """Altera o status da atividade selecionada"""
             selection = tree_atividades.selection()
@@ -5197,34 +5977,14 @@ Os dados serão salvos permanentemente no sistema."""
             if tag.startswith('atividade_'):
                 atividade_index = int(tag.split('_')[1])
                 
-                # Carregar registros de aula
-                registros = carregar_json(REGISTROS_AULA_FILE)
-                
-                # Encontrar e atualizar o registro correspondente
-                for i, registro in enumerate(registros):
-                    if (registro.get('materia_id') == self.registro_selecionado.get('materia_id') and
-                        registro.get('professor_login') == self.registro_selecionado.get('professor_login') and
-                        registro.get('data') == self.registro_selecionado.get('data') and
-                        registro.get('nome_aula') == self.registro_selecionado.get('nome_aula')):
-                        
-                        # Atualizar status da atividade
-                        if atividade_index < len(registro.get('atividades', [])):
-                            registros[i]['atividades'][atividade_index]['status'] = novo_status
-                            
-                            # Salvar alterações
-                            salvar_json(REGISTROS_AULA_FILE, registros)
-                            
-                            # Atualizar registro selecionado em memória
-                            self.registro_selecionado = registros[i]
-                            
-                            # Recarregar tabela
-                            carregar_atividades()
-                            
-                            action_text = "liberada" if novo_status == "Liberada" else "bloqueada"
-                            messagebox.showinfo("Sucesso", f"Atividade {action_text} com sucesso!")
-                            return
+                # Atualizar status da atividade
+                def alterar(atividades):
+                    atividades[atividade_index]['status'] = novo_status
                 
-                messagebox.showerror("Erro", "Erro ao atualizar a atividade.")
+                action_text = "liberada" if novo_status == "Liberada" else "bloqueada"
+                atualizar_atividade(atividade_index, alterar,
+                                    f"Atividade {action_text} com sucesso!",
+                                    "Erro ao atualizar a atividade.")
 
         def excluir_atividade():
             """Exclui a atividade selecionada"""
@@ -5249,33 +6009,13 @@ Os dados serão salvos permanentemente no sistema."""
             if tag.startswith('atividade_'):
                 atividade_index = int(tag.split('_')[1])
                 
-                # Carregar registros de aula
-                registros = carregar_json(REGISTROS_AULA_FILE)
-                
-                # Encontrar e atualizar o registro correspondente
-                for i, registro in enumerate(registros):
-                    if (registro.get('materia_id') == self.registro_selecionado.get('materia_id') and
-                        registro.get('professor_login') == self.registro_selecionado.get('professor_login') and
-                        registro.get('data') == self.registro_selecionado.get('data') and
-                        registro.get('nome_aula') == self.registro_selecionado.get('nome_aula')):
-                        
-                        # Remover atividade
-                        if atividade_index < len(registro.get('atividades', [])):
-                            del registros[i]['atividades'][atividade_index]
-                            
-                            # Salvar alterações
-                            salvar_json(REGISTROS_AULA_FILE, registros)
-                            
-                            # Atualizar registro selecionado em memória
-                            self.registro_selecionado = registros[i]
-                            
-                            # Recarregar tabela
-                            carregar_atividades()
-                            
-                            messagebox.showinfo("Sucesso", "Atividade excluída com sucesso!")
-                            return
+                # Remover atividade
+                def alterar(atividades):
+                    del atividades[atividade_index]
                 
-                messagebox.showerror("Erro", "Erro ao excluir a atividade.")
+                atualizar_atividade(atividade_index, alterar,
+                                    "Atividade excluída com sucesso!",
+                                    "Erro ao excluir a atividade.")
 
         # Adicionar botões
         customtkinter.CTkButton(btn_frame, text="Liberar Atividade", command=liberar_atividade,
@@ -5286,15 +6026,14 @@ Os dados serão salvos permanentemente no sistema."""
                                fg_color="red", hover_color="darkred").pack(side='left', padx=5)
         customtkinter.CTkButton(btn_frame, text="Fechar", command=janela_gerenciar.destroy).pack(side='right', padx=5)
 
-    def _criar_aba_lancamento_notas(self, parent_tab, materias_prof, user_login):
+    def _criar_aba_lancamento_notas(self, parent_tab, materias_prof, turmas, user_login):
         # --- Frame de Seleção ---
         top_frame = customtkinter.CTkFrame(parent_tab)
         top_frame.pack(fill='x', padx=10, pady=10)
         top_frame.grid_columnconfigure(1, weight=1)
 
         customtkinter.CTkLabel(top_frame, text="Matéria:").grid(row=0, column=0, padx=10, pady=(10,0), sticky='w')
-        # Obter informações das turmas para mostrar série e turma
-        turmas = carregar_json(TURMAS_FILE)
+        # Informações das turmas (já carregadas com as abas) para mostrar série e turma
         turma_info = {t['id']: f"{t.get('serie', '')} - {t.get('turma', '')}" for t in turmas}
         mapa_materias_prof = {f"{m['nome']} ({turma_info.get(m.get('turma_id'), 'N/A')})": m['id'] for m in materias_prof}
         combo_materias = customtkinter.CTkComboBox(top_frame, values=["Selecione uma matéria"] + list(mapa_materias_prof.keys()))
@@ -5339,21 +6078,29 @@ Os dados serão salvos permanentemente no sistema."""
             return map_bimestre.get(bimestre_var.get())
 
         def refresh_lista_alunos():
-            for i in tree_alunos.get_children(): tree_alunos.delete(i)
-            
             materia_id = mapa_materias_prof.get(combo_materias.get())
-            if not materia_id: return
-
             bimestre_prefix = get_bimestre_prefix()
-            if not bimestre_prefix: return
+            selecionado = bool(materia_id and bimestre_prefix)
+
+            # Sem matéria ou bimestre a lista só é limpa (descartando uma carga pendente)
+            carregador.executar(
+                tree_alunos,
+                lambda: buscar_notas_alunos(materia_id, bimestre_prefix) if selecionado else [],
+                preencher_lista_alunos,
+                recarregar=refresh_lista_alunos,
+                aviso=selecionado
+            )
 
+        def buscar_notas_alunos(materia_id, bimestre_prefix):
+            """Linhas (RA, nome, NP1, NP2, média) dos alunos da turma da matéria"""
+            linhas = []
             todas_materias = carregar_json(MATERIAS_FILE)
             materia_sel = next((m for m in todas_materias if m['id'] == materia_id), None)
-            if not materia_sel: return
+            if not materia_sel: return linhas
 
             turmas = carregar_json(TURMAS_FILE)
             turma_correta = next((t for t in turmas if t.get('id') == materia_sel.get('turma_id')), None)
-            if not turma_correta: return
+            if not turma_correta: return linhas
 
             usuarios = carregar_json(ALUNOS_FILE)  # Buscar apenas alunos
             notas = carregar_json(NOTAS_FILE)
@@ -5372,7 +6119,13 @@ Os dados serão salvos permanentemente no sistema."""
                 if isinstance(val_np1, (int, float)) and isinstance(val_np2, (int, float)):
                     media_bim = f"{(val_np1 + val_np2) / 2:.2f}"
 
-                tree_alunos.insert('', 'end', iid=ra_aluno, values=(ra_aluno, aluno_info.get('nome', ''), val_np1, val_np2, media_bim))
+                linhas.append((ra_aluno, aluno_info.get('nome', ''), val_np1, val_np2, media_bim))
+            return linhas
+
+        def preencher_lista_alunos(linhas):
+            for i in tree_alunos.get_children(): tree_alunos.delete(i)
+            for linha in linhas:
+                tree_alunos.insert('', 'end', iid=linha[0], values=linha)
 
         def on_selection_change(event=None):
             materia_id = mapa_materias_prof.get(combo_materias.get())
@@ -5383,7 +6136,7 @@ Os dados serão salvos permanentemente no sistema."""
             else:
                 btn_lancar_np1.configure(state="disabled")
                 btn_lancar_np2.configure(state="disabled")
-                for i in tree_alunos.get_children(): tree_alunos.delete(i)
+                refresh_lista_alunos()
 
         def lancar_nota_action(tipo_prova): # tipo_prova será "NP1" ou "NP2"
             sel = tree_alunos.selection()
@@ -5406,20 +6159,22 @@ Os dados serão salvos permanentemente no sistema."""
                 messagebox.showerror("Erro", "Valor da nota inválido. Use um número entre 0 e 10.")
                 return
 
-            notas = carregar_json(NOTAS_FILE)
-            nota_existente = next((n for n in notas if n.get('aluno_ra') == ra_aluno and n.get('materia_id') == materia_id and n.get('tipo_nota') == tipo_nota_completo), None)
+            def gravar():
+                notas = carregar_json(NOTAS_FILE)
+                nota_existente = next((n for n in notas if n.get('aluno_ra') == ra_aluno and n.get('materia_id') == materia_id and n.get('tipo_nota') == tipo_nota_completo), None)
 
-            if nota_existente:
-                nota_existente['valor'] = nota_valor
-            else:
-                notas.append({
-                    "aluno_ra": ra_aluno, "materia_id": materia_id,
-                    "tipo_nota": tipo_nota_completo, "valor": nota_valor,
-                    "professor_login": user_login
-                })
-            
-            salvar_json(NOTAS_FILE, notas)
-            refresh_lista_alunos()
+                if nota_existente:
+                    nota_existente['valor'] = nota_valor
+                else:
+                    notas.append({
+                        "aluno_ra": ra_aluno, "materia_id": materia_id,
+                        "tipo_nota": tipo_nota_completo, "valor": nota_valor,
+                        "professor_login": user_login
+                    })
+                
+                salvar_json(NOTAS_FILE, notas)
+
+            carregador.acao(action_frame, gravar, lambda _: refresh_lista_alunos())
 
         combo_materias.configure(command=on_selection_change)
         segmented_bimestre.configure(command=lambda e: on_selection_change())
@@ -5436,13 +6191,19 @@ Os dados serão salvos permanentemente no sistema."""
         values = tree_materias.item(sel[0])['values']
         nome_materia = values[0]
         
-        # Buscar matéria pelo nome (usando materias_prof que já está filtrada)
-        materias_prof = carregar_json(MATERIAS_FILE)
         user_login = self.user_info.get('login')
-        materias_prof = [m for m in materias_prof if m.get('professor_login') == user_login]
-        
-        materia_selecionada = next((m for m in materias_prof if m['nome'] == nome_materia), None)
-        
+
+        def buscar():
+            # Buscar matéria pelo nome (usando materias_prof que já está filtrada)
+            materias_prof, turmas, usuarios = carregar_varios_json(MATERIAS_FILE, TURMAS_FILE, ALUNOS_FILE)
+            materias_prof = [m for m in materias_prof if m.get('professor_login') == user_login]
+            
+            materia_selecionada = next((m for m in materias_prof if m['nome'] == nome_materia), None)
+            return materia_selecionada, turmas, usuarios
+
+        carregador.acao(tree_materias, buscar, lambda dados: self._exibir_dashboard_materia(*dados))
+
+    def _exibir_dashboard_materia(self, materia_selecionada, turmas, usuarios):
         if not materia_selecionada:
             messagebox.showerror('Erro', 'Matéria não encontrada.')
             return
@@ -5451,7 +6212,6 @@ Os dados serão salvos permanentemente no sistema."""
         dashboard_materia = customtkinter.CTkToplevel(self)
         
         # Buscar informações da turma
-        turmas = carregar_json(TURMAS_FILE)
         turma_info = next((t for t in turmas if t.get('id') == materia_selecionada.get('turma_id')), {})
         serie_turma = f"{turma_info.get('serie', 'N/A')} - {turma_info.get('turma', 'N/A')}"
         
@@ -5466,7 +6226,7 @@ Os dados serão salvos permanentemente no sistema."""
 
         # ================= ABA: ALUNOS E NOTAS =================
         aba_alunos_notas = tabs_materia.add('👥 Alunos e Notas')
-        self._criar_aba_alunos_notas(aba_alunos_notas, materia_selecionada)
+        self._criar_aba_alunos_notas(aba_alunos_notas, materia_selecionada, turmas, usuarios)
 
         # ================= BOTÃO VOLTAR =================
         frame_botoes = customtkinter.CTkFrame(dashboard_materia, height=60)
@@ -5493,7 +6253,7 @@ Os dados serão salvos permanentemente no sistema."""
         )
         info_label.pack(side='right', padx=10, pady=10)
 
-    def _criar_aba_alunos_notas(self, parent_tab, materia_selecionada):
+    def _criar_aba_alunos_notas(self, parent_tab, materia_selecionada, turmas, usuarios):
         """Cria a aba com informações gerais dos alunos (apenas quantidade)"""
         # Cabeçalho da aba
         header_frame = customtkinter.CTkFrame(parent_tab, height=80)
@@ -5510,10 +6270,7 @@ Os dados serão salvos permanentemente no sistema."""
         info_frame = customtkinter.CTkFrame(parent_tab)
         info_frame.pack(fill='both', expand=True, padx=10, pady=10)
 
-        # Calcular quantidade de alunos
-        turmas = carregar_json(TURMAS_FILE)
-        usuarios = carregar_json(ALUNOS_FILE)
-        
+        # Calcular quantidade de alunos (turmas e alunos já carregados no pool)
         # Encontrar a turma correspondente
         turma_correta = next((t for t in turmas if t.get('id') == materia_selecionada.get('turma_id')), None)
         
@@ -5571,6 +6328,11 @@ Os dados serão salvos permanentemente no sistema."""
 
     def _abrir_janela_notas_aluno_especifico(self, ra_aluno, nome_aluno, materia_selecionada, callback_refresh=None):
         """Abre janela específica para lançar notas de um aluno"""
+        carregador.acao(self, lambda: carregar_varios_json(TURMAS_FILE, NOTAS_FILE),
+                        lambda dados: self._exibir_janela_notas_aluno(ra_aluno, nome_aluno, materia_selecionada,
+                                                                      callback_refresh, *dados))
+
+    def _exibir_janela_notas_aluno(self, ra_aluno, nome_aluno, materia_selecionada, callback_refresh, turmas, notas_db):
         janela_notas = customtkinter.CTkToplevel(self)
         janela_notas.title(f"📝 Lançar Notas - {nome_aluno}")
         janela_notas.geometry("800x600")
@@ -5583,7 +6345,6 @@ Os dados serão salvos permanentemente no sistema."""
         header_frame.pack_propagate(False)
 
         # Buscar informações da turma
-        turmas = carregar_json(TURMAS_FILE)
         turma_info = next((t for t in turmas if t.get('id') == materia_selecionada.get('turma_id')), {})
         serie_turma_label = f"{turma_info.get('serie', 'N/A')} {turma_info.get('turma', 'N/A')}"
         
@@ -5603,8 +6364,7 @@ Os dados serão salvos permanentemente no sistema."""
         main_frame = customtkinter.CTkScrollableFrame(janela_notas)
         main_frame.pack(fill='both', expand=True, padx=20, pady=10)
 
-        # Carregar notas existentes
-        notas_db = carregar_json(NOTAS_FILE)
+        # Notas existentes (carregadas no pool)
         materia_id = materia_selecionada['id']
 
         # Widgets para entrada de notas
@@ -5718,28 +6478,32 @@ Os dados serão salvos permanentemente no sistema."""
                 messagebox.showwarning("Aviso", "Nenhuma nota foi preenchida.")
                 return
 
-            # Carregar notas existentes e atualizar
-            notas_db = carregar_json(NOTAS_FILE)
-            
-            # Remover notas antigas deste aluno/matéria
-            notas_db = [n for n in notas_db if not (
-                n.get('aluno_ra') == ra_aluno and 
-                n.get('materia_id') == materia_id
-            )]
-            
-            # Adicionar novas notas
-            notas_db.extend(notas_atualizadas)
-            
-            # Salvar
-            salvar_json(NOTAS_FILE, notas_db)
-            
-            messagebox.showinfo("Sucesso", f"Notas de {nome_aluno} salvas com sucesso!")
-            
-            # Callback para refresh
-            if callback_refresh:
-                callback_refresh()
-            
-            janela_notas.destroy()
+            def gravar():
+                # Carregar notas existentes e atualizar
+                notas_db = carregar_json(NOTAS_FILE)
+                
+                # Remover notas antigas deste aluno/matéria
+                notas_db = [n for n in notas_db if not (
+                    n.get('aluno_ra') == ra_aluno and 
+                    n.get('materia_id') == materia_id
+                )]
+                
+                # Adicionar novas notas
+                notas_db.extend(notas_atualizadas)
+                
+                # Salvar
+                salvar_json(NOTAS_FILE, notas_db)
+
+            def concluir(_):
+                messagebox.showinfo("Sucesso", f"Notas de {nome_aluno} salvas com sucesso!")
+                
+                # Callback para refresh
+                if callback_refresh:
+                    callback_refresh()
+                
+                janela_notas.destroy()
+
+            carregador.acao(janela_notas, gravar, concluir)
 
         # Botões
         botoes_frame = customtkinter.CTkFrame(janela_notas, height=60)
@@ -5847,16 +6611,64 @@ DADOS BRUTOS:
             hover_color="#c82333"
         ).pack(side='right', padx=5)
 
+    def _processar_alteracoes(self):
+        """Executa as atualizações vindas do feed de alterações (na thread do Tk)"""
+        try:
+            processar_atualizacoes_pendentes()
+            # Mensagens pedidas fora de uma carga (ex.: sincronização da fila offline)
+            carregador.processar()
+            if USE_PROXY:
+                self._atualizar_situacao_offline()
+        finally:
+            self.after(ATUALIZACOES_INTERVALO_MS, self._processar_alteracoes)
+
+    def _atualizar_situacao_offline(self):
+        """Indica no título quando o servidor está inacessível e avisa sobre conflitos na sincronização."""
+        situacao = proxy.situacao_offline()
+        circuito = proxy.estado_circuito()
+        chave = (situacao['offline'], situacao['pendentes'], circuito['estado'], int(circuito['reabre_em']))
+        if chave != self._situacao_offline:
+            self._situacao_offline = chave
+            if circuito['estado'] == 'aberto':
+                self.title(f"Sistema Acadêmico - OFFLINE ({situacao['pendentes']} alterações a enviar)"
+                           f" - servidor indisponível, nova tentativa em {circuito['reabre_em']:.0f}s")
+            elif situacao['offline']:
+                self.title(f"Sistema Acadêmico - OFFLINE ({situacao['pendentes']} alterações a enviar)")
+            elif situacao['pendentes']:
+                self.title(f"Sistema Acadêmico - sincronizando ({situacao['pendentes']} alterações)")
+            else:
+                self.title('Sistema Acadêmico')
+
+        conflitos = proxy.conflitos_novos()
+        if conflitos:
+            linhas = "\n".join(f"• {c['arquivo']}: {c['motivo']}" for c in conflitos[:10])
+            messagebox.showwarning(
+                "Conflitos na Sincronização",
+                f"{len(conflitos)} alteração(ões) feitas sem conexão não foram aplicadas:\n\n{linhas}\n\n"
+                f"Elas foram guardadas em {proxy.CONFLITOS_PATH}. Confira os dados e refaça se necessário."
+            )
+
+    def _mostrar_estatisticas_cache(self):
+        """Mostra (e imprime no console) as estatísticas do cache de leitura do proxy."""
+        if not USE_PROXY:
+            messagebox.showinfo("Cache", "Modo local: não há cache de leitura.")
+            return
+        messagebox.showinfo("📈 Cache de Leitura", proxy.imprimir_estatisticas_cache())
+
     def _alterar_propria_senha(self):
         """Abre um formulário para o usuário logado alterar a própria senha."""
         top = customtkinter.CTkToplevel(self)
         top.title("Alterar Senha")
-        top.geometry("400x300")
+        top.geometry("400x380")
         top.resizable(False, False)
         top.grab_set()
 
         customtkinter.CTkLabel(top, text="Alterar Minha Senha", font=customtkinter.CTkFont(size=16, weight="bold")).pack(pady=(20,10))
 
+        customtkinter.CTkLabel(top, text="Senha Atual:").pack(anchor='w', padx=20, pady=(10,0))
+        e_senha_atual = customtkinter.CTkEntry(top, show='*')
+        e_senha_atual.pack(fill='x', padx=20, pady=5)
+
         customtkinter.CTkLabel(top, text="Nova Senha:").pack(anchor='w', padx=20, pady=(10,0))
         e_nova_senha = customtkinter.CTkEntry(top, show='*')
         e_nova_senha.pack(fill='x', padx=20, pady=5)
@@ -5866,11 +6678,12 @@ DADOS BRUTOS:
         e_confirma_senha.pack(fill='x', padx=20, pady=5)
 
         def salvar_nova_senha():
+            senha_atual = e_senha_atual.get()
             nova_senha = e_nova_senha.get()
             confirma_senha = e_confirma_senha.get()
 
-            if not nova_senha or not confirma_senha:
-                messagebox.showerror("Erro", "Ambos os campos são obrigatórios.", parent=top)
+            if not senha_atual or not nova_senha or not confirma_senha:
+                messagebox.showerror("Erro", "Todos os campos são obrigatórios.", parent=top)
                 return
             
             if nova_senha != confirma_senha:
@@ -5882,21 +6695,25 @@ DADOS BRUTOS:
                 messagebox.showerror("Senha Inválida", msg, parent=top)
                 return
 
-            # Criptografar e salvar
-            todos_usuarios = carregar_todos_usuarios()
-            usuario_atual = next((u for u in todos_usuarios if u['usuario'] == self.usuario_logado['usuario']), None)
-            
-            if usuario_atual:
-                hashed_pw = bcrypt.hashpw(nova_senha.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                usuario_atual['senha'] = hashed_pw
-                salvar_usuario_por_tipo(usuario_atual)
-                messagebox.showinfo("Sucesso", "Senha alterada com sucesso!", parent=top)
-                top.destroy()
-            else:
-                messagebox.showerror("Erro Crítico", "Não foi possível encontrar o usuário logado para alterar a senha.", parent=top)
+            usuario_logado = dict(self.usuario_logado)
+
+            def concluir(alterada):
+                if alterada:
+                    messagebox.showinfo("Sucesso", "Senha alterada com sucesso!", parent=top)
+                    top.destroy()
+                elif alterada is False:
+                    messagebox.showerror("Erro", "Senha atual incorreta.", parent=top)
+                    e_senha_atual.delete(0, 'end')
+                    e_senha_atual.focus()
+                else:
+                    messagebox.showerror("Erro Crítico", "Não foi possível alterar a senha do usuário logado.", parent=top)
+
+            # Confere a senha atual, criptografa e salva (em segundo plano)
+            carregador.acao(top, lambda: alterar_senha_usuario(usuario_logado, senha_atual, nova_senha), concluir)
 
         customtkinter.CTkButton(top, text="Salvar Nova Senha", command=salvar_nova_senha).pack(pady=20)
 
 if __name__ == '__main__':
     app = App()
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
+    carregador.encerrar()
\ No newline at end of file
@@ -9,13 +9,26 @@
 ===============================================================
 """
 
+import copy
+import gzip
+import hashlib
 import json
 import os
+import random
 import sys
-import urllib.request
-import urllib.error
+import time
+import queue
+import socket
+import threading
+import http.client
+import urllib.parse
+import uuid
+from collections import OrderedDict
+from datetime import datetime
 from tkinter import messagebox
 
+import consulta_registros
+
 # ---------------------------------------------------------------
 # CONFIGURAÇÃO DE CONEXÃO
 # ---------------------------------------------------------------
@@ -46,83 +59,1186 @@ except json.JSONDecodeError:
 
 SERVER_HOST = CONFIG_CLIENT.get('server_host', '127.0.0.1')
 SERVER_PORT = CONFIG_CLIENT.get('server_port', 8080)
-BASE_URL = f"http://{SERVER_HOST}:{SERVER_PORT}/api"
+API_PREFIX = '/api'
+
+# Pool de conexões HTTP/1.1 keep-alive com o servidor.
+# http.client conecta direto em SERVER_HOST:SERVER_PORT e nunca passa por
+# proxy, o que também resolve o problema do Forefront TMG.
+POOL_MAX_CONEXOES = 4
+# Conexões ociosas há mais tempo que isso são descartadas (o servidor
+# fecha conexões ociosas após 'keepalive_timeout', 60s por padrão)
+POOL_MAX_OCIOSIDADE = 50
+
+_pool_conexoes = queue.LifoQueue(maxsize=POOL_MAX_CONEXOES)
+
+# Tempo máximo só para estabelecer a conexão: numa rede local o servidor
+# aceita em milissegundos; se a máquina caiu, não há por que esperar
+# REQUEST_TIMEOUT (que continua valendo para a resposta)
+CONNECT_TIMEOUT = CONFIG_CLIENT.get('connect_timeout', 5)
+
+# Política de requisições (ver "RETRY E CIRCUIT BREAKER")
+RETRY_TENTATIVAS = CONFIG_CLIENT.get('retry_tentativas', 3)
+RETRY_ESPERA_BASE = 0.2
+RETRY_ESPERA_MAXIMA = 2.0
+RETRY_STATUS = (502, 503, 504)
+CIRCUITO_FALHAS = CONFIG_CLIENT.get('circuito_falhas', 5)
+CIRCUITO_ESPERA = CONFIG_CLIENT.get('circuito_espera', 10)
+CIRCUITO_ESPERA_MAXIMA = 60
+
+# Compressão gzip: respostas sempre aceitas comprimidas; corpos de
+# requisição a partir deste tamanho são comprimidos, mas só depois que o
+# servidor anunciar suporte ('Accept-Encoding: gzip' numa resposta)
+GZIP_MIN_BYTES = CONFIG_CLIENT.get('gzip_min_bytes', 1024)
+_servidor_aceita_gzip = False
+
+# Cache de leitura compartilhado por todos os carregar_*.
+# Dentro do TTL a leitura não acessa a rede; depois do TTL o cliente
+# revalida com o ETag (If-None-Match -> 304 Not Modified). Escritas feitas
+# por este cliente invalidam o arquivo. O tamanho total é limitado (LRU).
+CACHE_TTL_PADRAO = 5
+CACHE_TTL_POR_ARQUIVO = {
+  'turmas.json': 30,
+  'materias.json': 30,
+  'professores.json': 30,
+  'admin.json': 10,
+  'alunos.json': 10,
+  'notas.json': 5,
+  'registros_aula.json': 5,
+  'pedidos.json': 5,
+  'respostas_alunos.json': 2,
+}
+CACHE_TTL_POR_ARQUIVO.update(CONFIG_CLIENT.get('cache_ttl', {}))
+CACHE_MAX_BYTES = CONFIG_CLIENT.get('cache_max_bytes', 8 * 1024 * 1024)
+
+# { filename: {'etag': ..., 'corpo': str, 'validado_em': monotonic} } em ordem LRU
+_cache_leituras = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+_cache_stats = {'hits': 0, 'revalidacoes': 0, 'misses': 0, 'invalidacoes': 0, 'despejos': 0}
+
+
+# ---------------------------------------------------------------
+# POOL DE CONEXÕES
+# ---------------------------------------------------------------
+
+class _ConexaoHTTP(http.client.HTTPConnection):
+  """Conexão que usa CONNECT_TIMEOUT para conectar e REQUEST_TIMEOUT para a resposta."""
+  
+  def connect(self):
+    timeout = self.timeout
+    self.timeout = CONNECT_TIMEOUT
+    try:
+      super().connect()
+    finally:
+      self.timeout = timeout
+    self.sock.settimeout(timeout)
+
+def _obter_conexao():
+  """Retorna uma conexão ociosa do pool (ou uma nova)."""
+  while True:
+    try:
+      conexao, ultimo_uso = _pool_conexoes.get_nowait()
+    except queue.Empty:
+      return _ConexaoHTTP(SERVER_HOST, SERVER_PORT, timeout=REQUEST_TIMEOUT)
+    
+    if time.monotonic() - ultimo_uso < POOL_MAX_OCIOSIDADE:
+      return conexao
+    conexao.close()
+
+def _devolver_conexao(conexao):
+  """Devolve a conexão ao pool; fecha se o pool estiver cheio."""
+  try:
+    _pool_conexoes.put_nowait((conexao, time.monotonic()))
+  except queue.Full:
+    conexao.close()
+
+def fechar_conexoes():
+  """Fecha todas as conexões ociosas do pool."""
+  while True:
+    try:
+      conexao, _ = _pool_conexoes.get_nowait()
+    except queue.Empty:
+      return
+    conexao.close()
+
+def _executar_requisicao(metodo, caminho, corpo=None, headers=None, query=None):
+  """
+  Executa uma requisição usando o pool de conexões.
+  Retorna (status, headers, corpo_bytes). Erros de rede são propagados.
+  
+  Se uma conexão reaproveitada tiver sido fechada pelo servidor
+  (broken pipe / conexão resetada), tenta uma única vez numa conexão nova.
+  
+  Segmentos variáveis do caminho (ex.: um RA) chegam já codificados por
+  quem chamou, com quote(..., safe=''); aqui só o que falta é codificado,
+  sem recodificar o '%' (senão '%2F' viraria '%252F').
+  """
+  global _servidor_aceita_gzip
+  url = API_PREFIX + urllib.parse.quote(caminho, safe='/%')
+  if query:
+    url += '?' + urllib.parse.urlencode(query, doseq=True)
+  headers = dict(headers or {})
+  headers.setdefault('Accept-Encoding', 'gzip')
+  
+  if corpo and _servidor_aceita_gzip and len(corpo) >= GZIP_MIN_BYTES:
+    corpo = gzip.compress(corpo)
+    headers['Content-Encoding'] = 'gzip'
+  
+  for tentativa in range(2):
+    conexao = _obter_conexao()
+    reaproveitada = conexao.sock is not None
+    try:
+      conexao.request(metodo, url, body=corpo, headers=headers)
+      resposta = conexao.getresponse()
+      dados = resposta.read()
+    except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError, http.client.RemoteDisconnected,
+            http.client.CannotSendRequest, http.client.BadStatusLine):
+      conexao.close()
+      if reaproveitada and tentativa == 0:
+        continue
+      raise
+    except Exception:
+      conexao.close()
+      raise
+    
+    if resposta.will_close:
+      conexao.close()
+    else:
+      _devolver_conexao(conexao)
+    
+    if 'gzip' in resposta.getheader('Accept-Encoding', ''):
+      _servidor_aceita_gzip = True
+    if resposta.getheader('Content-Encoding', '').strip().lower() == 'gzip':
+      dados = gzip.decompress(dados)
+    return resposta.status, resposta.headers, dados
+
+def _mensagem_erro(dados, padrao):
+  """Extrai o campo 'error' de uma resposta JSON de erro do servidor."""
+  try:
+    return json.loads(dados.decode('utf-8')).get('error', padrao)
+  except Exception:
+    return padrao
+
+
+# ---------------------------------------------------------------
+# RETRY E CIRCUIT BREAKER
+# ---------------------------------------------------------------
+# Leituras (GET) que falham por erro transitório (conexão recusada ou
+# derrubada, HTTP 502/503/504) são repetidas até RETRY_TENTATIVAS vezes,
+# com espera exponencial sorteada entre 0 e o teto da tentativa (jitter),
+# para que os clientes não voltem todos no mesmo instante. Timeouts não
+# são repetidos: o servidor está lento, não ausente, e repetir só aumenta a
+# carga. Escritas também não: sem conexão elas vão para a fila de saída.
+#
+# Circuit breaker: após CIRCUITO_FALHAS falhas seguidas (conexão recusada
+# ou derrubada, HTTP 502/503/504) o circuito abre e toda requisição falha
+# na hora (CircuitoAberto) por CIRCUITO_ESPERA segundos. Timeouts não contam:
+# o servidor está lento, não ausente. O long-poll do feed de alterações fica
+# de fora (circuito=False), pois esperar até o tempo limite é o normal dele.
+# Passada a espera, uma única requisição de teste é liberada (meio-aberto):
+# se der certo o circuito fecha; se falhar, reabre com a espera dobrada,
+# até CIRCUITO_ESPERA_MAXIMA.
+
+class CircuitoAberto(ConnectionError):
+  """Requisição recusada sem acessar a rede: o servidor falhou repetidamente há pouco."""
+
+_circuito = {
+  'estado': 'fechado',  # 'fechado', 'aberto' ou 'meio-aberto'
+  'falhas': 0,
+  'aberto_ate': 0.0,
+  'espera': CIRCUITO_ESPERA,
+  'teste_em_andamento': False,
+  'aberturas': 0,
+  'recusadas': 0,
+  'repeticoes': 0
+}
+_circuito_lock = threading.Lock()
+
+def _circuito_liberar():
+  """Deixa a requisição seguir para a rede ou levanta CircuitoAberto."""
+  with _circuito_lock:
+    if _circuito['estado'] == 'fechado':
+      return
+    agora = time.monotonic()
+    if _circuito['estado'] == 'aberto' and agora >= _circuito['aberto_ate']:
+      _circuito.update({'estado': 'meio-aberto', 'teste_em_andamento': False})
+    if _circuito['estado'] == 'meio-aberto' and not _circuito['teste_em_andamento']:
+      _circuito['teste_em_andamento'] = True
+      return
+    _circuito['recusadas'] += 1
+    restante = max(0.0, _circuito['aberto_ate'] - agora)
+  raise CircuitoAberto(f"servidor indisponível, nova tentativa em {restante:.0f}s")
+
+def _circuito_liberado():
+  """Requisição encerrada sem indicar se o servidor está de pé: libera o teste do meio-aberto."""
+  with _circuito_lock:
+    _circuito['teste_em_andamento'] = False
+
+def _circuito_sucesso():
+  with _circuito_lock:
+    if _circuito['estado'] != 'fechado':
+      print("[PROXY] Circuito fechado: o servidor voltou a responder")
+    _circuito.update({'estado': 'fechado', 'falhas': 0, 'espera': CIRCUITO_ESPERA, 'teste_em_andamento': False})
+
+def _circuito_falha():
+  with _circuito_lock:
+    _circuito['falhas'] += 1
+    if _circuito['estado'] == 'meio-aberto':
+      # O teste falhou: reabre esperando mais
+      _circuito['espera'] = min(_circuito['espera'] * 2, CIRCUITO_ESPERA_MAXIMA)
+    elif _circuito['estado'] == 'aberto' or _circuito['falhas'] < CIRCUITO_FALHAS:
+      return
+    _circuito.update({
+      'estado': 'aberto',
+      'aberto_ate': time.monotonic() + _circuito['espera'],
+      'teste_em_andamento': False,
+      'aberturas': _circuito['aberturas'] + 1
+    })
+    print(f"[PROXY] Circuito aberto após {_circuito['falhas']} falhas: "
+          f"requisições recusadas por {_circuito['espera']:.0f}s")
+
+def estado_circuito():
+  """
+  Estado do circuit breaker para a interface:
+  {'estado', 'falhas', 'reabre_em' (segundos), 'aberturas', 'recusadas', 'repeticoes'}.
+  """
+  with _circuito_lock:
+    return {
+      'estado': _circuito['estado'],
+      'falhas': _circuito['falhas'],
+      'reabre_em': max(0.0, _circuito['aberto_ate'] - time.monotonic()) if _circuito['estado'] == 'aberto' else 0.0,
+      'aberturas': _circuito['aberturas'],
+      'recusadas': _circuito['recusadas'],
+      'repeticoes': _circuito['repeticoes']
+    }
+
+def _requisicao_http(metodo, caminho, corpo=None, headers=None, query=None, circuito=True):
+  """
+  Executa uma requisição passando pelo circuit breaker; leituras (GET) com
+  falha transitória são repetidas com backoff exponencial e jitter.
+  Retorna (status, headers, corpo_bytes). Erros de rede são propagados
+  (CircuitoAberto, subclasse de ConnectionError, com o circuito aberto).
+  circuito=False executa uma única vez, fora do circuit breaker.
+  """
+  if not circuito:
+    return _executar_requisicao(metodo, caminho, corpo, headers, query)
+  
+  tentativas = max(1, RETRY_TENTATIVAS) if metodo == 'GET' else 1
+  for tentativa in range(tentativas):
+    _circuito_liberar()
+    try:
+      resposta = _executar_requisicao(metodo, caminho, corpo, headers, query)
+    except (ConnectionError, http.client.HTTPException):
+      _circuito_falha()
+      if tentativa + 1 == tentativas:
+        raise
+    except socket.timeout:
+      # Servidor lento, mas presente: não repete nem conta como falha
+      _circuito_liberado()
+      raise
+    except OSError:
+      # Demais erros de rede: não vale repetir
+      _circuito_falha()
+      raise
+    except Exception:
+      # O servidor respondeu (a falha foi ao tratar a resposta)
+      _circuito_sucesso()
+      raise
+    else:
+      if resposta[0] not in RETRY_STATUS:
+        _circuito_sucesso()
+        return resposta
+      _circuito_falha()
+      if tentativa + 1 == tentativas:
+        return resposta
+    
+    with _circuito_lock:
+      _circuito['repeticoes'] += 1
+    time.sleep(random.uniform(0, min(RETRY_ESPERA_MAXIMA, RETRY_ESPERA_BASE * 2 ** tentativa)))
+
+
+# ---------------------------------------------------------------
+# CACHE DE LEITURA
+# ---------------------------------------------------------------
+
+def _cache_obter(filename):
+  """Retorna a entrada do cache (ou None) e a marca como usada recentemente."""
+  with _cache_lock:
+    entrada = _cache_leituras.get(filename)
+    if entrada is not None:
+      _cache_leituras.move_to_end(filename)
+    return entrada
+
+def _cache_valido(filename):
+  """Retorna a entrada do cache se ainda estiver dentro do TTL do arquivo, senão None."""
+  entrada = _cache_obter(filename)
+  if entrada and time.monotonic() - entrada['validado_em'] < CACHE_TTL_POR_ARQUIVO.get(filename, CACHE_TTL_PADRAO):
+    return entrada
+  return None
+
+def _cache_remover(filename):
+  """Remove um arquivo do cache (chamar com _cache_lock adquirido)."""
+  global _cache_bytes
+  entrada = _cache_leituras.pop(filename, None)
+  if entrada is not None:
+    _cache_bytes -= len(entrada['corpo'])
+  return entrada
+
+def _cache_guardar(filename, etag, corpo):
+  """Guarda/atualiza a resposta de um arquivo, respeitando CACHE_MAX_BYTES."""
+  global _cache_bytes
+  if len(corpo) > CACHE_MAX_BYTES:
+    return
+  with _cache_lock:
+    _cache_remover(filename)
+    _cache_leituras[filename] = {'etag': etag, 'corpo': corpo, 'validado_em': time.monotonic()}
+    _cache_bytes += len(corpo)
+    
+    # Despeja os menos usados até caber no orçamento
+    while _cache_bytes > CACHE_MAX_BYTES:
+      antigo = next(iter(_cache_leituras))
+      _cache_remover(antigo)
+      _cache_stats['despejos'] += 1
+
+def invalidar_cache(filename=None):
+  """Invalida um arquivo do cache de leitura, com suas projeções (ou todo o cache)."""
+  with _cache_lock:
+    if filename:
+      nomes = [n for n in _cache_leituras if n == filename or n.startswith(filename + '?')]
+    else:
+      nomes = list(_cache_leituras)
+    for nome in nomes:
+      if _cache_remover(nome) is not None:
+        _cache_stats['invalidacoes'] += 1
+  _expirar_replica(filename)
+
+def estatisticas_cache():
+  """Retorna um dicionário com as estatísticas do cache de leitura."""
+  with _cache_lock:
+    leituras = _cache_stats['hits'] + _cache_stats['revalidacoes'] + _cache_stats['misses']
+    return {
+      **_cache_stats,
+      'taxa_acerto': (_cache_stats['hits'] + _cache_stats['revalidacoes']) / leituras if leituras else 0.0,
+      'arquivos': len(_cache_leituras),
+      'bytes': _cache_bytes,
+      'limite_bytes': CACHE_MAX_BYTES,
+      'replicas': dict(_replicas_stats)
+    }
+
+def imprimir_estatisticas_cache():
+  """Imprime as estatísticas do cache e retorna o texto formatado."""
+  stats = estatisticas_cache()
+  circuito = estado_circuito()
+  texto = (
+    f"Hits (sem rede): {stats['hits']}\n"
+    f"Revalidações (304): {stats['revalidacoes']}\n"
+    f"Misses (download): {stats['misses']}\n"
+    f"Taxa de acerto: {stats['taxa_acerto']:.1%}\n"
+    f"Invalidações: {stats['invalidacoes']} | Despejos: {stats['despejos']}\n"
+    f"Arquivos em cache: {stats['arquivos']} ({stats['bytes'] / 1024:.1f} KB de {stats['limite_bytes'] / 1024:.0f} KB)\n"
+    f"Réplicas: {stats['replicas']['completas']} cargas completas | {stats['replicas']['deltas']} deltas "
+    f"({stats['replicas']['operacoes']} operações) | {stats['replicas']['divergencias']} divergências\n"
+    f"Conexão: circuito {circuito['estado']} | {circuito['repeticoes']} repetições | "
+    f"{circuito['aberturas']} aberturas | {circuito['recusadas']} requisições recusadas sem rede"
+  )
+  print("[CACHE] Estatísticas do cache de leitura:\n" + texto)
+  return texto
+
+
+# ---------------------------------------------------------------
+# RÉPLICAS LOCAIS (DELTA SYNC)
+# ---------------------------------------------------------------
+# Coleções grandes e muito relidas ficam numa cópia local. Depois da
+# primeira carga, cada atualização pede a /api/delta só as operações feitas
+# desde a versão da cópia e as reaplica aqui: o tráfego é proporcional ao
+# que mudou, não ao tamanho do arquivo. O ETag enviado pelo servidor confere
+# o resultado; se divergir, a cópia é recarregada inteira.
+
+ARQUIVOS_REPLICADOS = set(CONFIG_CLIENT.get('arquivos_replicados', ['registros_aula.json', 'notas.json']))
+
+# { filename: {'versao', 'epoch', 'etag', 'dados', 'validado_em'} }
+# 'dados' nunca é alterado no lugar (cada delta gera uma lista nova), então
+# pode ser lido fora do lock. _replicas_lock protege só o dicionário; a
+# requisição roda sem ele, sob o lock do próprio arquivo (_replicas_busca),
+# que evita duas buscas simultâneas do mesmo arquivo.
+_replicas = {}
+_replicas_lock = threading.Lock()
+_replicas_busca = {}
+# Expirações pedidas (por arquivo) enquanto uma busca estava em andamento
+_replicas_expiradas = {}
+_replicas_stats = {'completas': 0, 'deltas': 0, 'operacoes': 0, 'divergencias': 0}
+# Arquivos cujo servidor não oferece /api/delta (usam o cache comum)
+_replicas_indisponiveis = set()
+
+def _expirar_replica(filename=None):
+  """Força a próxima leitura a buscar o delta (a cópia local é mantida)."""
+  with _replicas_lock:
+    for nome in set(_replicas) | set(_replicas_busca):
+      if filename is None or nome == filename:
+        if nome in _replicas:
+          _replicas[nome]['validado_em'] = 0
+        _replicas_expiradas[nome] = _replicas_expiradas.get(nome, 0) + 1
+
+def _registro_coincide(registro, match):
+  return isinstance(registro, dict) and all(registro.get(k) == v for k, v in match.items())
+
+def _aplicar_operacao(registros, op):
+  """Aplica uma operação por registro exatamente como o servidor (apply_record_operation)."""
+  tipo = op['op']
+  
+  if tipo == 'insert':
+    return registros + [op['record']]
+  
+  if tipo == 'upsert':
+    registro = op['record']
+    chaves = {k: registro.get(k) for k in op['keys'] if registro.get(k) is not None}
+    resultado = []
+    substituido = False
+    for r in registros:
+      if isinstance(r, dict) and any(r.get(k) == v for k, v in chaves.items()):
+        if not substituido:
+          resultado.append(registro)
+          substituido = True
+        continue
+      resultado.append(r)
+    if not substituido:
+      resultado.append(registro)
+    return resultado
+  
+  if tipo == 'delete':
+    return [r for r in registros if not _registro_coincide(r, op['match'])]
+  
+  if tipo == 'patch':
+    return [{**r, **op['fields']} if _registro_coincide(r, op['match']) else r for r in registros]
+  
+  raise ValueError(f"Operação desconhecida no delta: {tipo}")
+
+def _etag_dos_dados(dados):
+  """ETag que o servidor calcularia para estes dados (mesma serialização)"""
+  corpo = json.dumps(dados, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+  return '"' + hashlib.sha1(corpo).hexdigest() + '"'
+
+def _carregar_replica(filename):
+  """
+  Dados do arquivo a partir da réplica local (sincronizada por delta).
+  Retorna None se o servidor não oferece /api/delta (quem chama usa o
+  cache comum) e [] em caso de erro, como carregar_dados_do_servidor.
+  """
+  if filename in _replicas_indisponiveis:
+    return None
+  
+  ttl = CACHE_TTL_POR_ARQUIVO.get(filename, CACHE_TTL_PADRAO)
+  with _replicas_lock:
+    busca_lock = _replicas_busca.setdefault(filename, threading.Lock())
+  try:
+    with busca_lock:
+      for tentativa in range(2):
+        with _replicas_lock:
+          replica = _replicas.get(filename)
+          expiracoes = _replicas_expiradas.get(filename, 0)
+          valida = replica is not None and time.monotonic() - replica['validado_em'] < ttl
+        if valida:
+          with _cache_lock:
+            _cache_stats['hits'] += 1
+          # Cópia: quem chama pode alterar a lista retornada
+          return _aplicar_pendentes(filename, copy.deepcopy(replica['dados']))
+        
+        # Requisição sem _replicas_lock: leituras de outros arquivos e a
+        # expiração (após uma gravação) não esperam por ela
+        query = {'since': str(replica['versao']), 'epoch': replica['epoch']} if replica else None
+        status, _, corpo = _requisicao_http('GET', f"/delta/{filename}", query=query)
+        
+        if status == 404:
+          _replicas_indisponiveis.add(filename)
+          return None
+        
+        resposta = json.loads(corpo.decode('utf-8'))
+        if status != 200 or not resposta.get('success'):
+          messagebox.showerror("Erro de Leitura", f"Erro ao ler {filename}: {resposta.get('error', f'HTTP {status}')}")
+          return []
+        
+        if resposta['full']:
+          dados = resposta['data']
+          _replicas_stats['completas'] += 1
+        else:
+          dados = replica['dados']
+          for op in resposta['ops']:
+            dados = _aplicar_operacao(dados, op)
+          _replicas_stats['deltas'] += 1
+          _replicas_stats['operacoes'] += len(resposta['ops'])
+          
+          if resposta['ops'] and _etag_dos_dados(dados) != resposta['etag']:
+            # Cópia local divergente: descarta e recarrega o arquivo inteiro
+            _replicas_stats['divergencias'] += 1
+            with _replicas_lock:
+              if _replicas.get(filename) is replica:
+                del _replicas[filename]
+            continue
+        
+        with _replicas_lock:
+          if _replicas.get(filename) is replica:
+            # Expirada durante a busca (gravação feita nesse meio tempo):
+            # guarda a versão nova, mas a próxima leitura pede outro delta
+            expirada = _replicas_expiradas.get(filename, 0) != expiracoes
+            _replicas[filename] = {
+              'versao': resposta['version'],
+              'epoch': resposta['epoch'],
+              'etag': resposta['etag'],
+              'dados': dados,
+              'validado_em': 0 if expirada else time.monotonic()
+            }
+        print(f"[PROXY] Réplica de {filename} atualizada (versão {resposta['version']}, "
+              f"{'completa' if resposta['full'] else str(len(resposta['ops'])) + ' operações'})")
+        _guardar_offline(filename, None, resposta['etag'], dados)
+        return _aplicar_pendentes(filename, copy.deepcopy(dados))
+    return []
+
+  except (OSError, http.client.HTTPException) as e:
+    return _leitura_offline(filename, None, e)
+  except Exception as e:
+    messagebox.showerror("Erro Inesperado", f"Erro desconhecido ao carregar {filename}: {e}")
+  return []
+
+
+# ---------------------------------------------------------------
+# MODO OFFLINE (CÓPIA EM DISCO E FILA DE SAÍDA)
+# ---------------------------------------------------------------
+# Cada leitura bem-sucedida deixa uma cópia do arquivo em disco
+# (PASTA_OFFLINE). Se a rede falhar, as leituras passam a vir dessas
+# cópias e as escritas entram numa fila de saída, também em disco, que
+# sobrevive ao fechamento do programa. Uma thread tenta reconectar a cada
+# OFFLINE_INTERVALO segundos e, quando o servidor volta, reenvia a fila
+# na ordem original.
+#
+# Conflitos: uma escrita completa vai com 'If-Match' (ETag da versão sobre
+# a qual foi feita; para arquivos sem cópia em disco, como os de usuários,
+# vale o ETag da última versão completa recebida, guardado em bases.json);
+# se outro usuário alterou o arquivo nesse meio tempo,
+# o servidor recusa (412) e a escrita vai para conflitos.json, sem
+# sobrescrever o trabalho alheio. Operações por registro só conflitam se o
+# registro não existe mais (patch) ou se já há outro igual (insert único).
+
+PASTA_OFFLINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             CONFIG_CLIENT.get('pasta_offline', 'dados_offline'))
+OFFLINE_INTERVALO = CONFIG_CLIENT.get('offline_intervalo', 5)
+FILA_SAIDA_PATH = os.path.join(PASTA_OFFLINE, 'fila_saida.json')
+CONFLITOS_PATH = os.path.join(PASTA_OFFLINE, 'conflitos.json')
+BASES_PATH = os.path.join(PASTA_OFFLINE, 'bases.json')
+
+_offline = {'ativo': False, 'desde': None, 'thread': None, 'enviando': None, 'conflitos_avisados': 0}
+# RLock: a visão local de um arquivo é montada dentro de _enfileirar_escrita
+_offline_lock = threading.RLock()
+# ETag de cada cópia já gravada em disco (evita regravar o mesmo conteúdo)
+_etags_offline = {}
+_sincronizar = threading.Event()
+
+def _ler_json_disco(caminho, padrao):
+  try:
+    with open(caminho, 'r', encoding='utf-8') as f:
+      return json.load(f)
+  except (OSError, ValueError):
+    return padrao
+
+def _gravar_json_disco(caminho, dados):
+  """Grava de forma atômica (arquivo temporário + rename)."""
+  os.makedirs(PASTA_OFFLINE, exist_ok=True)
+  temporario = caminho + '.tmp'
+  with open(temporario, 'w', encoding='utf-8') as f:
+    json.dump(dados, f, ensure_ascii=False)
+  os.replace(temporario, caminho)
+
+_fila_saida = _ler_json_disco(FILA_SAIDA_PATH, [])
+_conflitos = _ler_json_disco(CONFLITOS_PATH, [])
+# filename -> ETag da última versão completa conhecida do servidor (base das
+# escritas completas feitas offline, inclusive de arquivos sem cópia em disco)
+_bases_offline = _ler_json_disco(BASES_PATH, {})
+# Conflitos de execuções anteriores já foram avisados
+_offline['conflitos_avisados'] = len(_conflitos)
+
+def _caminho_offline(chave):
+  # A chave pode ser uma projeção ('alunos.json?fields=ra,nome')
+  return os.path.join(PASTA_OFFLINE, urllib.parse.quote(chave, safe='.'))
+
+def _pode_guardar_offline(filename, campos):
+  """Arquivos de usuários (com senhas) só são guardados em projeções sem a senha."""
+  if filename not in ARQUIVOS_USUARIO.values():
+    return True
+  return bool(campos) and not any(c.split('.')[0] == 'senha' for c in campos)
+
+def _registrar_base(filename, etag):
+  """Guarda o ETag da versão completa atual do arquivo no servidor."""
+  with _offline_lock:
+    if not etag or _bases_offline.get(filename) == etag:
+      return
+    _bases_offline[filename] = etag
+    try:
+      _gravar_json_disco(BASES_PATH, _bases_offline)
+    except OSError as e:
+      print(f"[OFFLINE] Não foi possível guardar a base de {filename}: {e}")
+
+def _guardar_offline(filename, campos, etag, dados):
+  """Atualiza a cópia em disco de uma leitura (só quando o ETag muda)."""
+  if not campos:
+    _registrar_base(filename, etag)
+  chave = f"{filename}?fields={','.join(campos)}" if campos else filename
+  if not etag or _etags_offline.get(chave) == etag or not _pode_guardar_offline(filename, campos):
+    return
+  try:
+    _gravar_json_disco(_caminho_offline(chave), {'etag': etag, 'salvo_em': datetime.now().isoformat(), 'data': dados})
+    _etags_offline[chave] = etag
+  except OSError as e:
+    print(f"[OFFLINE] Não foi possível guardar a cópia de {chave}: {e}")
+
+def _aplicar_pendentes(filename, dados):
+  """Aplica sobre 'dados' as escritas de 'filename' que ainda estão na fila."""
+  with _offline_lock:
+    for item in _fila_saida:
+      if item['arquivo'] != filename:
+        continue
+      if item['tipo'] == 'write':
+        dados = copy.deepcopy(item['dados'])
+      elif isinstance(dados, list):
+        dados = _aplicar_operacao(dados, item['op'])
+  return dados
+
+def dados_offline(filename, campos=None):
+  """
+  Visão local de um arquivo: a última cópia recebida do servidor mais as
+  escritas ainda na fila (estas não se aplicam a cópias de projeções).
+  Retorna None se não há cópia local.
+  """
+  if campos:
+    copia = _ler_json_disco(_caminho_offline(f"{filename}?fields={','.join(campos)}"), None)
+    if copia is not None:
+      return copia['data']
+    # Sem a projeção, serve o arquivo inteiro (tem todos os campos pedidos)
+  
+  copia = _ler_json_disco(_caminho_offline(filename), None)
+  with _offline_lock:
+    # Sem cópia, só uma escrita completa pendente define o conteúdo
+    if copia is None and not any(i['arquivo'] == filename and i['tipo'] == 'write' for i in _fila_saida):
+      return None
+    return _aplicar_pendentes(filename, copia['data'] if copia else [])
+
+def _tem_pendentes(filename):
+  with _offline_lock:
+    return any(item['arquivo'] == filename for item in _fila_saida)
+
+def esta_offline():
+  """True enquanto o servidor estiver inacessível."""
+  return _offline['ativo']
+
+def situacao_offline():
+  """Resumo para a interface: {'offline', 'desde', 'pendentes', 'conflitos'}."""
+  with _offline_lock:
+    return {
+      'offline': _offline['ativo'],
+      'desde': _offline['desde'],
+      'pendentes': len(_fila_saida),
+      'conflitos': len(_conflitos)
+    }
+
+def conflitos_novos():
+  """Conflitos registrados desde a última chamada (para avisar o usuário uma vez)."""
+  with _offline_lock:
+    novos = _conflitos[_offline['conflitos_avisados']:]
+    _offline['conflitos_avisados'] = len(_conflitos)
+    return list(novos)
+
+def _entrar_offline(erro):
+  with _offline_lock:
+    if not _offline['ativo']:
+      _offline.update({'ativo': True, 'desde': datetime.now().isoformat()})
+      print(f"[OFFLINE] Servidor inacessível ({erro}). Usando cópias locais; escritas vão para a fila.")
+  _iniciar_sincronizacao()
+
+def _leitura_offline(filename, campos, erro):
+  """
+  Falha de rede numa leitura: entra no modo offline e devolve a cópia
+  local. Sem cópia, informa o erro e retorna [] como antes.
+  """
+  _entrar_offline(erro)
+  dados = dados_offline(filename, campos)
+  if dados is not None:
+    print(f"[OFFLINE] Leitura de {filename} servida pela cópia local")
+    return dados
+  if isinstance(erro, CircuitoAberto):
+    # A falha já foi informada quando o circuito abriu (o título da janela mostra a situação)
+    print(f"[PROXY] Leitura de {filename} recusada: {erro}")
+  elif isinstance(erro, socket.timeout):
+    messagebox.showerror("Erro de Conexão", f"Tempo limite esgotado ({REQUEST_TIMEOUT}s). O servidor está lento ou a rede falhou.")
+  else:
+    messagebox.showerror("Erro de Conexão", f"Não foi possível conectar ao servidor em {SERVER_HOST}:{SERVER_PORT}.\nErro: {erro}")
+  return []
+
+def _salvar_fila():
+  """Persiste a fila de saída (chamar com _offline_lock adquirido)."""
+  try:
+    _gravar_json_disco(FILA_SAIDA_PATH, _fila_saida)
+  except OSError as e:
+    print(f"[OFFLINE] ERRO ao gravar a fila de saída: {e}")
+
+def _enfileirar_escrita(filename, tipo, conteudo):
+  """
+  Coloca uma escrita na fila de saída. Para escritas completas guarda o
+  ETag da visão local atual, que o servidor confere no reenvio (If-Match).
+  Sem visão local (arquivos de usuários) vale o ETag da última versão
+  completa recebida; se houver operações por registro na fila antes desta
+  escrita, o servidor recusa o reenvio como conflito, em vez de
+  sobrescrever o arquivo às cegas.
+  """
+  with _offline_lock:
+    ultima = _fila_saida[-1] if _fila_saida else None
+    # Cópia: quem chamou pode continuar alterando a lista
+    conteudo = copy.deepcopy(conteudo)
+    if (tipo == 'write' and ultima and ultima['tipo'] == 'write' and ultima['arquivo'] == filename
+        and ultima['id'] != _offline['enviando']):
+      # Escritas completas seguidas do mesmo arquivo: só a última importa
+      ultima['dados'] = conteudo
+    else:
+      item = {'id': uuid.uuid4().hex, 'arquivo': filename, 'tipo': tipo, 'criado_em': datetime.now().isoformat()}
+      if tipo == 'write':
+        base = dados_offline(filename)
+        base_etag = _etag_dos_dados(base) if base is not None else _bases_offline.get(filename)
+        item.update({'dados': conteudo, 'base_etag': base_etag})
+      else:
+        item['op'] = conteudo
+      _fila_saida.append(item)
+    _salvar_fila()
+    print(f"[OFFLINE] Escrita em {filename} guardada na fila ({len(_fila_saida)} pendentes)")
+  invalidar_cache(filename)
+  _iniciar_sincronizacao()
+  if not _offline['ativo']:
+    _sincronizar.set()
+
+def _registrar_conflito(item, motivo):
+  with _offline_lock:
+    _conflitos.append({**item, 'motivo': motivo, 'detectado_em': datetime.now().isoformat()})
+    try:
+      _gravar_json_disco(CONFLITOS_PATH, _conflitos)
+    except OSError as e:
+      print(f"[OFFLINE] ERRO ao gravar conflitos: {e}")
+  print(f"[OFFLINE] Conflito em {item['arquivo']}: {motivo}")
+
+def _reenviar(item):
+  """
+  Reenvia uma escrita da fila. Retorna None se foi aplicada, o motivo
+  (texto) se é um conflito definitivo, ou levanta erro para tentar depois.
+  """
+  filename = item['arquivo']
+  if item['tipo'] == 'write':
+    headers = {'Content-Type': 'application/json'}
+    if item.get('base_etag'):
+      headers['If-Match'] = item['base_etag']
+    corpo_envio = json.dumps({'data': item['dados']}).encode('utf-8')
+    status, _, corpo = _requisicao_http('POST', f"/write/{filename}", corpo_envio, headers)
+    if status == 200:
+      _registrar_base(filename, _etag_dos_dados(item['dados']))
+      return None
+    if status == 412:
+      return "o arquivo foi alterado por outro usuário enquanto você estava offline"
+  else:
+    op = item['op']
+    status, _, corpo = _requisicao_http('POST', f"/records/{filename}", json.dumps(op).encode('utf-8'),
+                                        {'Content-Type': 'application/json'})
+    if status == 200:
+      if op['op'] == 'patch' and not json.loads(corpo.decode('utf-8')).get('affected'):
+        return "o registro alterado não existe mais no servidor"
+      return None
+    if status == 409:
+      # O mesmo registro já está lá: é o reenvio de um insert já aplicado
+      if json.loads(corpo.decode('utf-8')).get('existing') == op.get('record'):
+        return None
+      return "já existe um registro com os mesmos dados únicos"
+  
+  if status == 408 or status >= 500:
+    raise OSError(f"servidor respondeu HTTP {status}")
+  return _mensagem_erro(corpo, f'HTTP {status}')
+
+def sincronizar_fila():
+  """
+  Envia a fila de saída na ordem. Retorna True se a fila ficou vazia e
+  False se a conexão falhou no meio (o restante fica para depois).
+  """
+  enviadas = 0
+  while True:
+    with _offline_lock:
+      if not _fila_saida:
+        break
+      item = _fila_saida[0]
+      _offline['enviando'] = item['id']
+    
+    try:
+      motivo = _reenviar(item)
+    except (OSError, http.client.HTTPException) as e:
+      _entrar_offline(e)
+      return False
+    finally:
+      _offline['enviando'] = None
+    
+    if motivo:
+      _registrar_conflito(item, motivo)
+    with _offline_lock:
+      if _fila_saida and _fila_saida[0] is item:
+        _fila_saida.pop(0)
+        _salvar_fila()
+    invalidar_cache(item['arquivo'])
+    enviadas += 1
+  
+  with _offline_lock:
+    if _offline['ativo']:
+      print(f"[OFFLINE] Conexão restabelecida ({enviadas} escritas enviadas)")
+    _offline.update({'ativo': False, 'desde': None})
+  return True
+
+def _servidor_responde():
+  try:
+    status, _, _ = _requisicao_http('GET', '/list')
+    return status < 500
+  except (OSError, http.client.HTTPException):
+    return False
+
+def _loop_sincronizacao():
+  while True:
+    _sincronizar.wait(OFFLINE_INTERVALO)
+    _sincronizar.clear()
+    with _offline_lock:
+      pendente = bool(_fila_saida)
+    if not (pendente or _offline['ativo']):
+      continue
+    if _offline['ativo'] and not _servidor_responde():
+      continue
+    sincronizar_fila()
+
+def _iniciar_sincronizacao():
+  """Inicia (uma vez) a thread que reconecta e esvazia a fila de saída."""
+  with _offline_lock:
+    if _offline['thread'] is None:
+      _offline['thread'] = threading.Thread(target=_loop_sincronizacao, daemon=True)
+      _offline['thread'].start()
+
+# Escritas que ficaram na fila da última execução
+if _fila_saida:
+  _iniciar_sincronizacao()
+  _sincronizar.set()
 
 
 # ---------------------------------------------------------------
 # FUNÇÕES CORE DE COMUNICAÇÃO HTTP
 # ---------------------------------------------------------------
 
-def carregar_dados_do_servidor(filename):
-  """Realiza um GET (Leitura) para o Servidor Proxy."""
-  url = f"{BASE_URL}/read/{filename}"
+def carregar_dados_do_servidor(filename, campos=None):
+  """
+  Realiza um GET (Leitura) para o Servidor Proxy (com cache local).
+  'campos' (ex.: ['usuario', 'nome'] ou ['atividades.nome']) pede ao
+  servidor apenas esses campos de cada registro; cada projeção tem sua
+  própria entrada no cache.
+  Sem conexão, serve a cópia local (modo offline), já com as escritas
+  que ainda estão na fila de saída.
+  """
+  if _offline['ativo']:
+    dados = dados_offline(filename, campos)
+    if dados is not None:
+      return dados
+  
+  if not campos and filename in ARQUIVOS_REPLICADOS:
+    dados = _carregar_replica(filename)
+    if dados is not None:
+      return dados
+  
   try:
-    # SOLUÇÃO para Forefront TMG: Usa urllib sem ProxyHandler
-    proxy_handler = urllib.request.ProxyHandler({})
-    opener = urllib.request.build_opener(proxy_handler)
+    query = {'fields': ','.join(campos)} if campos else None
+    chave = f"{filename}?fields={query['fields']}" if campos else filename
+    anterior = _cache_obter(chave)
+    ttl = CACHE_TTL_POR_ARQUIVO.get(filename, CACHE_TTL_PADRAO)
     
-    req = urllib.request.Request(url)
-    response = opener.open(req, timeout=REQUEST_TIMEOUT)
+    if anterior and time.monotonic() - anterior['validado_em'] < ttl:
+      # Dentro do TTL: serve do cache sem acessar a rede
+      with _cache_lock:
+        _cache_stats['hits'] += 1
+      return json.loads(anterior['corpo']).get('data', [])
+    
+    headers = {'If-None-Match': anterior['etag']} if anterior else {}
+    status, resp_headers, corpo = _requisicao_http('GET', f"/read/{filename}", headers=headers, query=query)
+    
+    if status == 304 and anterior:
+      # 304: o arquivo não mudou, reaproveita o último corpo recebido
+      etag, response_data = anterior['etag'], anterior['corpo']
+      with _cache_lock:
+        _cache_stats['revalidacoes'] += 1
+    elif status == 200:
+      response_data = corpo.decode('utf-8')
+      etag = resp_headers.get('ETag')
+      with _cache_lock:
+        _cache_stats['misses'] += 1
+    else:
+      messagebox.showerror("Erro de Leitura", f"Erro ao ler {filename}: {_mensagem_erro(corpo, f'HTTP {status}')}")
+      return []
     
-    response_data = response.read().decode('utf-8')
+    # Sempre decodifica o corpo: quem chama pode alterar a lista retornada
     data = json.loads(response_data)
     
     if data.get('success'):
+      if etag:
+        _cache_guardar(chave, etag, response_data)
+        _guardar_offline(filename, campos, etag, data.get('data', []))
       print(f"[PROXY] Leitura bem-sucedida: {filename}")
+      if not campos and _tem_pendentes(filename):
+        return _aplicar_pendentes(filename, data.get('data', []))
       return data.get('data', [])
     else:
       messagebox.showerror("Erro de Leitura", f"Erro ao ler {filename}: {data.get('error', 'Resposta inesperada do servidor')}")
       return []
 
-  except urllib.error.URLError as e:
-    if 'timed out' in str(e).lower():
-      messagebox.showerror("Erro de Conexão", f"Tempo limite esgotado ({REQUEST_TIMEOUT}s). O servidor está lento ou a rede falhou.")
-    else:
-      messagebox.showerror("Erro de Conexão", f"Não foi possível conectar ao servidor em {SERVER_HOST}:{SERVER_PORT}.\nErro: {e}")
-    return []
+  except (OSError, http.client.HTTPException) as e:
+    return _leitura_offline(filename, campos, e)
   except Exception as e:
     messagebox.showerror("Erro Inesperado", f"Erro desconhecido ao carregar {filename}: {e}")
     return []
 
+def carregar_varios(*filenames):
+  """
+  Carrega vários arquivos numa única requisição (/api/read-many), todos
+  do mesmo instante no servidor. Retorna uma lista com os dados de cada
+  arquivo, na mesma ordem dos nomes recebidos.
+  
+  Se todos estiverem dentro do TTL do cache, não acessa a rede; se algum
+  estiver vencido, todos são recarregados juntos (visão consistente).
+  Arquivos replicados (ARQUIVOS_REPLICADOS) ficam fora do lote: vêm da
+  réplica sincronizada por delta, a única cópia local deles.
+  """
+  if not filenames:
+    return []
+  if _offline['ativo'] or any(_tem_pendentes(f) for f in filenames):
+    # Cópias locais e escritas pendentes: arquivo a arquivo
+    return [carregar_dados_do_servidor(f) for f in filenames]
+  
+  replicados = {f for f in filenames if f in ARQUIVOS_REPLICADOS and f not in _replicas_indisponiveis}
+  if replicados:
+    comuns = [f for f in filenames if f not in replicados]
+    dados = dict(zip(comuns, carregar_varios(*comuns)))
+    return [dados[f] if f in dados else carregar_dados_do_servidor(f) for f in filenames]
+  
+  entradas = [_cache_valido(f) for f in filenames]
+  if all(entradas):
+    with _cache_lock:
+      _cache_stats['hits'] += len(filenames)
+    return [json.loads(e['corpo']).get('data', []) for e in entradas]
+  
+  nomes = ', '.join(filenames)
+  try:
+    status, _, corpo = _requisicao_http('GET', '/read-many', query={'files': ','.join(filenames)})
+    
+    if status == 404:
+      # Servidor sem /api/read-many: uma requisição por arquivo
+      return [carregar_dados_do_servidor(f) for f in filenames]
+    
+    resposta = json.loads(corpo.decode('utf-8'))
+    if status != 200 or not resposta.get('success'):
+      messagebox.showerror("Erro de Leitura", f"Erro ao ler {nomes}: {resposta.get('error', f'HTTP {status}')}")
+      return [[] for _ in filenames]
+    
+    documentos = resposta.get('documents', {})
+    etags = resposta.get('etags', {})
+    resultado = []
+    for filename in filenames:
+      data = documentos.get(filename, [])
+      if etags.get(filename):
+        # Mesmo formato de corpo do /api/read, para o cache servir os dois
+        corpo_arquivo = '{"success": true, "data": ' + json.dumps(data, ensure_ascii=False) + '}'
+        _cache_guardar(filename, etags[filename], corpo_arquivo)
+        _guardar_offline(filename, None, etags[filename], data)
+      resultado.append(data)
+    
+    with _cache_lock:
+      _cache_stats['misses'] += len(filenames)
+    print(f"[PROXY] Leitura múltipla bem-sucedida: {nomes}")
+    return resultado
+
+  except (OSError, http.client.HTTPException) as e:
+    _entrar_offline(e)
+    return [carregar_dados_do_servidor(f) for f in filenames]
+  except Exception as e:
+    messagebox.showerror("Erro Inesperado", f"Erro desconhecido ao carregar {nomes}: {e}")
+  return [[] for _ in filenames]
+
+def consultar_registros(filename, igual=None, contem=None, faixa=None, ordem=None, limite=None, inicio=0, campos=None):
+  """
+  Filtra, ordena e pagina os registros no servidor (/api/query) e baixa só
+  o resultado. Os parâmetros seguem consulta_registros, por exemplo:
+    consultar_registros('pedidos.json', igual={'status': 'Pendente'}, ordem=['-data'])
+  Se o servidor não oferece a consulta (ou está inacessível), aplica-a
+  sobre o arquivo inteiro.
+  """
+  consulta = {'igual': igual, 'contem': contem, 'faixa': faixa, 'ordem': ordem, 'limite': limite, 'inicio': inicio}
+  # Igualdade a uma lista vazia de valores não encontra nada (e não iria na URL)
+  if any(isinstance(v, (list, tuple, set)) and not v for v in (igual or {}).values()):
+    return []
+  if _offline['ativo'] or _tem_pendentes(filename):
+    return consulta_registros.aplicar_consulta(carregar_dados_do_servidor(filename), **consulta)
+  try:
+    query = consulta_registros.parametros_consulta(campos=campos, **consulta)
+    status, _, corpo = _requisicao_http('GET', f"/query/{filename}", query=query)
+    
+    if status == 404:
+      # Servidor sem /api/query: filtra localmente
+      return consulta_registros.aplicar_consulta(carregar_dados_do_servidor(filename), **consulta)
+    
+    resposta = json.loads(corpo.decode('utf-8'))
+    if status != 200 or not resposta.get('success'):
+      messagebox.showerror("Erro de Leitura", f"Erro ao consultar {filename}: {resposta.get('error', f'HTTP {status}')}")
+      return []
+    
+    print(f"[PROXY] Consulta bem-sucedida: {filename} ({len(resposta.get('data', []))} de {resposta.get('total')})")
+    return resposta.get('data', [])
+
+  except (OSError, http.client.HTTPException) as e:
+    return consulta_registros.aplicar_consulta(_leitura_offline(filename, None, e), **consulta)
+  except Exception as e:
+    messagebox.showerror("Erro Inesperado", f"Erro desconhecido ao consultar {filename}: {e}")
+  return []
+
+def _paginar_localmente(registros, limite, cursor, chave, consulta):
+  """Paginação sobre a visão local; um cursor do servidor encerra a lista (não vale aqui)."""
+  if cursor and not str(cursor).isdigit():
+    return [], None, 0
+  return consulta_registros.paginar(registros, limite, cursor, chave, **consulta)
+
+def consultar_pagina(filename, limite, cursor=None, chave=None, campos=None, **consulta):
+  """
+  Uma página de uma consulta (/api/query com cursor). Retorna
+  (registros, próximo cursor ou None, total encontrado). O cursor marca o
+  último registro entregue, então as páginas seguem estáveis mesmo que o
+  arquivo mude entre elas. 'chave' (campo ou lista de campos juntos únicos,
+  ex.: 'id' ou ['ra_aluno', 'atividade_id']) desempata a ordenação; sem ela
+  o servidor não devolve cursor e só a primeira página é entregue.
+  Em caso de falha retorna ([], None, 0).
+  """
+  if any(isinstance(v, (list, tuple, set)) and not v for v in (consulta.get('igual') or {}).values()):
+    return [], None, 0
+  if _offline['ativo'] or _tem_pendentes(filename):
+    return _paginar_localmente(carregar_dados_do_servidor(filename), limite, cursor, chave, consulta)
+  try:
+    query = consulta_registros.parametros_consulta(limite=limite, campos=campos, **consulta)
+    if cursor:
+      query['cursor'] = cursor
+    if chave:
+      query['key'] = chave if isinstance(chave, str) else ','.join(chave)
+    status, _, corpo = _requisicao_http('GET', f"/query/{filename}", query=query)
+    
+    if status == 404:
+      # Servidor sem /api/query: pagina sobre o arquivo inteiro
+      return consulta_registros.paginar(carregar_dados_do_servidor(filename), limite, cursor, chave, **consulta)
+    
+    resposta = json.loads(corpo.decode('utf-8'))
+    if status != 200 or not resposta.get('success'):
+      messagebox.showerror("Erro de Leitura", f"Erro ao consultar {filename}: {resposta.get('error', f'HTTP {status}')}")
+      return [], None, 0
+    
+    return resposta.get('data', []), resposta.get('next_cursor'), resposta.get('total', 0)
+
+  except (OSError, http.client.HTTPException) as e:
+    return _paginar_localmente(_leitura_offline(filename, None, e), limite, cursor, chave, consulta)
+  except Exception as e:
+    messagebox.showerror("Erro Inesperado", f"Erro desconhecido ao consultar {filename}: {e}")
+  return [], None, 0
+
 def salvar_dados_no_servidor(filename, data):
-  """Realiza um POST (Escrita) para o Servidor Proxy (usando a fila)."""
-  url = f"{BASE_URL}/write/{filename}"
+  """
+  Realiza um POST (Escrita) para o Servidor Proxy (usando a fila).
+  Sem conexão (ou com escritas anteriores ainda pendentes, para manter a
+  ordem) a escrita vai para a fila de saída e é enviada depois.
+  """
+  if _offline['ativo'] or _fila_saida:
+    _enfileirar_escrita(filename, 'write', data)
+    return True
   payload = {'data': data}
   
   try:
-    # SOLUÇÃO para Forefront TMG: Usa urllib sem ProxyHandler
-    proxy_handler = urllib.request.ProxyHandler({})
-    opener = urllib.request.build_opener(proxy_handler)
-    
     # Codifica o payload como JSON
     json_data = json.dumps(payload).encode('utf-8')
     
-    # Cria a requisição POST
-    req = urllib.request.Request(url, data=json_data, headers={'Content-Type': 'application/json'})
-    response = opener.open(req, timeout=REQUEST_TIMEOUT)
-    
-    response_data = response.read().decode('utf-8')
-    result = json.loads(response_data)
+    # A cópia local deixa de valer, mesmo se a escrita falhar
+    invalidar_cache(filename)
+    status, _, corpo = _requisicao_http('POST', f"/write/{filename}", json_data, {'Content-Type': 'application/json'})
+    result = json.loads(corpo.decode('utf-8'))
     
-    if result.get('success'):
+    if status == 200 and result.get('success'):
       print(f"[PROXY] Escrita bem-sucedida: {filename}")
+      # O servidor passa a ter exatamente estes dados: base de uma próxima escrita offline
+      _registrar_base(filename, _etag_dos_dados(data))
       return True
     else:
       error_msg = result.get('error', 'Falha desconhecida no servidor.')
       messagebox.showerror("Erro de Escrita", f"Falha ao salvar {filename}: {error_msg}")
       return False
 
-  except urllib.error.URLError as e:
-    if 'timed out' in str(e).lower():
-      messagebox.showerror("Erro de Conexão", f"Tempo limite esgotado ({REQUEST_TIMEOUT}s) durante a escrita. O servidor está sobrecarregado.")
-    else:
-      messagebox.showerror("Erro de Conexão", f"Não foi possível conectar ao servidor em {SERVER_HOST}:{SERVER_PORT}.\nErro: {e}")
-    return False
+  except (OSError, http.client.HTTPException) as e:
+    # Se a escrita chegou a ser aplicada, o reenvio é reconhecido pelo servidor (If-Match)
+    _entrar_offline(e)
+    _enfileirar_escrita(filename, 'write', data)
+    return True
   except Exception as e:
     messagebox.showerror("Erro Inesperado", f"Erro desconhecido ao salvar {filename}: {e}")
     return False
 
 
+def alterar_registros_no_servidor(filename, operacao):
+  """
+  Realiza um POST para /api/records (alteração de registros individuais).
+  Envia apenas a operação (insert/upsert/delete/patch), não a coleção.
+  Retorna o dicionário de resposta do servidor ou None em caso de falha.
+  Um conflito de unicidade (HTTP 409) também retorna o dicionário, com
+  'conflict': True, sem exibir mensagem: quem chamou decide o que fazer.
+  Sem conexão a operação vai para a fila de saída; o resultado é
+  calculado sobre a cópia local, com 'offline': True.
+  """
+  if _offline['ativo'] or _fila_saida:
+    return _alterar_offline(filename, operacao)
+  try:
+    json_data = json.dumps(operacao).encode('utf-8')
+    invalidar_cache(filename)
+    status, _, corpo = _requisicao_http('POST', f"/records/{filename}", json_data, {'Content-Type': 'application/json'})
+    
+    if status == 409:
+      return json.loads(corpo.decode('utf-8'))
+    
+    if status != 200:
+      messagebox.showerror("Erro de Escrita", f"Falha ao alterar {filename}: {_mensagem_erro(corpo, f'HTTP {status}')}")
+      return None
+    
+    result = json.loads(corpo.decode('utf-8'))
+    print(f"[PROXY] Operação '{operacao.get('op')}' bem-sucedida: {filename} ({result.get('affected', 0)} registros)")
+    return result
+
+  except (OSError, http.client.HTTPException) as e:
+    _entrar_offline(e)
+    return _alterar_offline(filename, operacao)
+  except Exception as e:
+    messagebox.showerror("Erro Inesperado", f"Erro desconhecido ao alterar {filename}: {e}")
+    return None
+
+def _alterar_offline(filename, operacao):
+  """Aplica a operação na visão local e a coloca na fila de saída."""
+  registros = dados_offline(filename)
+  if registros is None:
+    # Sem cópia do arquivo: confere ao menos as escritas pendentes deste cliente
+    registros = _aplicar_pendentes(filename, [])
+  if operacao.get('unique'):
+    chave = [str(operacao['record'].get(c)) for c in operacao['unique']]
+    existente = next((r for r in registros if isinstance(r, dict)
+                      and [str(r.get(c)) for c in operacao['unique']] == chave), None)
+    if existente is not None:
+      return {'success': False, 'conflict': True, 'error': 'Registro duplicado', 'existing': existente}
+  
+  if operacao['op'] in ('delete', 'patch'):
+    afetados = sum(1 for r in registros if _registro_coincide(r, operacao['match']))
+  else:
+    afetados = 1
+  _enfileirar_escrita(filename, 'records', operacao)
+  return {'success': True, 'affected': afetados, 'offline': True}
+
+
 # ---------------------------------------------------------------
 # FUNÇÕES DE APLICAÇÃO (WRAPPER)
 # ---------------------------------------------------------------
@@ -198,6 +1314,19 @@ def salvar_respostas_alunos(dados):
   """Salva 'respostas_alunos.json'"""
   return salvar_dados_no_servidor('respostas_alunos.json', dados)
 
+def inserir_resposta_aluno(resposta):
+  """
+  Acrescenta uma única resposta em 'respostas_alunos.json', apenas se o
+  aluno ainda não respondeu a atividade (verificado atomicamente no servidor).
+  Retorna o resultado do servidor ({'success'...} ou {'conflict': True,
+  'existing': {...}}) ou None em caso de falha.
+  """
+  return alterar_registros_no_servidor('respostas_alunos.json', {
+    'op': 'insert',
+    'record': resposta,
+    'unique': ['ra_aluno', 'atividade_id']
+  })
+
 
 # ---------------------------------------------------------------
 # FUNÇÕES DE LÓGICA DE USUÁRIO (ABSTRAÍDAS)
@@ -207,9 +1336,8 @@ def salvar_respostas_alunos(dados):
 
 def carregar_todos_usuarios():
   """Combina dados de diferentes arquivos para login/gestão de usuários."""
-  alunos = carregar_alunos()
-  professores = carregar_professores()
-  admins = carregar_admin() # ATUALIZADO
+  # Uma única requisição para os três arquivos
+  alunos, professores, admins = carregar_varios('alunos.json', 'professores.json', 'admin.json')
   
   for user in alunos: user['tipo'] = 'aluno'
   for user in professores: user['tipo'] = 'professor'
@@ -217,70 +1345,101 @@ def carregar_todos_usuarios():
   
   return alunos + professores + admins
 
+# Arquivo de cada tipo de usuário
+ARQUIVOS_USUARIO = {
+  'aluno': 'alunos.json',
+  'professor': 'professores.json',
+  'admin': 'admin.json'
+}
+
 def salvar_usuario_por_tipo(usuario):
   """Função adaptada para salvar o usuário no arquivo correto via proxy."""
   tipo = usuario.get('tipo')
-  
-  # 1. Carrega todos os usuários do tipo em questão
-  if tipo == 'aluno':
-    todos = carregar_alunos()
-  elif tipo == 'professor':
-    todos = carregar_professores()
-  elif tipo == 'admin':
-    todos = carregar_admin() # ATUALIZADO
-  else:
+  filename = ARQUIVOS_USUARIO.get(tipo)
+  if not filename:
     messagebox.showerror("Erro de Salvar", "Tipo de usuário não reconhecido.")
     return False
-    
-  # 2. Atualiza/Substitui o usuário na lista
-  # Lógica de app_gui.py: alunos são únicos por 'ra' ou 'usuario', outros por 'usuario'
-  if tipo == 'aluno':
-    # Remove o antigo (se existir) baseado no 'usuario' OU 'ra'
-    todos = [u for u in todos if (u.get('usuario') != usuario.get('usuario') and 
-                   u.get('ra') != usuario.get('ra'))]
-  else:
-    todos = [u for u in todos if u.get('usuario') != usuario.get('usuario')] # Remove o antigo
   
-  todos.append(usuario) # Adiciona o novo
+  # Lógica de app_gui.py: alunos são únicos por 'ra' ou 'usuario', outros por 'usuario'
+  chaves = ['usuario', 'ra'] if tipo == 'aluno' else ['usuario']
   
-  # 3. Salva a lista completa de volta ao servidor
-  if tipo == 'aluno':
-    return salvar_alunos(todos)
-  elif tipo == 'professor':
-    return salvar_professores(todos)
-  elif tipo == 'admin':
-    return salvar_admin(todos) # ATUALIZADO
+  # O servidor substitui o registro antigo (ou acrescenta) na sua cópia em memória
+  result = alterar_registros_no_servidor(filename, {'op': 'upsert', 'record': usuario, 'keys': chaves})
+  return bool(result and result.get('success'))
+
+def alterar_campos_usuario(usuario_login, tipo, campos):
+  """
+  Altera só os campos informados do registro do usuário (patch), sem
+  baixar nem reenviar o arquivo. Retorna True se o registro foi alterado.
+  """
+  filename = ARQUIVOS_USUARIO.get(tipo)
+  if not filename:
+    messagebox.showerror("Erro de Salvar", "Tipo de usuário não reconhecido.")
+    return False
   
-  return False
+  result = alterar_registros_no_servidor(
+    filename, {'op': 'patch', 'match': {'usuario': usuario_login}, 'fields': campos})
+  return bool(result and result.get('success') and result.get('affected'))
 
 def remover_usuario_por_tipo(usuario_login, tipo, ra_aluno=None):
   """Função adaptada para remover o usuário do arquivo correto via proxy."""
-  # 1. Carrega todos os usuários do tipo em questão
-  if tipo == 'aluno':
-    todos = carregar_alunos()
-  elif tipo == 'professor':
-    todos = carregar_professores()
-  elif tipo == 'admin':
-    todos = carregar_admin() # ATUALIZADO
-  else:
+  filename = ARQUIVOS_USUARIO.get(tipo)
+  if not filename:
     messagebox.showerror("Erro ao Remover", "Tipo de usuário não reconhecido.")
     return False
-    
-  # 2. Remove o usuário da lista (lógica do app_gui.py)
+  
+  # Remove o usuário da lista (lógica do app_gui.py)
   if tipo == 'aluno' and ra_aluno:
-    todos_filtrados = [u for u in todos if u.get('ra') != ra_aluno]
+    match = {'ra': ra_aluno}
   else:
-    todos_filtrados = [u for u in todos if u.get('usuario') != usuario_login]
+    match = {'usuario': usuario_login}
   
-  # 3. Salva a lista filtrada de volta ao servidor
-  if tipo == 'aluno':
-    return salvar_alunos(todos_filtrados)
-  elif tipo == 'professor':
-    return salvar_professores(todos_filtrados)
-  elif tipo == 'admin':
-    return salvar_admin(todos_filtrados) # ATUALIZADO
+  result = alterar_registros_no_servidor(filename, {'op': 'delete', 'match': match})
+  return bool(result and result.get('success'))
+
+def autenticar_usuario(login, senha):
+  """
+  Login indexado no servidor: só o registro do usuário trafega, nunca a
+  base inteira. Retorna {'usuario': dict ou None, 'verificado': bool,
+  'migrar_senha': bool}, ou None em falha de conexão (já informada).
   
-  return False
+  'verificado' False significa que a senha ainda deve ser conferida no
+  cliente (servidor antigo, sem os endpoints de autenticação).
+  """
+  nao_encontrado = {'usuario': None, 'verificado': True, 'migrar_senha': False}
+  try:
+    json_data = json.dumps({'login': login, 'senha': senha}).encode('utf-8')
+    status, _, corpo = _requisicao_http('POST', '/auth/login', json_data, {'Content-Type': 'application/json'})
+    
+    if status == 200:
+      resposta = json.loads(corpo.decode('utf-8'))
+      return {'usuario': resposta.get('usuario'), 'verificado': True,
+              'migrar_senha': bool(resposta.get('migrar_senha'))}
+    if status == 401:
+      return nao_encontrado
+    
+    if status == 501:
+      # Servidor sem bcrypt e senha criptografada: o hash nunca é enviado ao
+      # cliente, então não há como conferir a senha
+      messagebox.showerror("Erro de Login", "O servidor não consegue conferir esta senha (bcrypt não instalado no servidor).\nContate o administrador.")
+      return None
+    
+    if status == 404:
+      # Servidor antigo, sem os endpoints de autenticação
+      usuario = next((u for u in carregar_todos_usuarios()
+                      if u['usuario'] == login or u.get('ra') == login), None)
+      return {'usuario': usuario, 'verificado': usuario is None, 'migrar_senha': False}
+    
+    messagebox.showerror("Erro de Login", f"Falha ao autenticar: {_mensagem_erro(corpo, f'HTTP {status}')}")
+    return None
+
+  except socket.timeout:
+    messagebox.showerror("Erro de Conexão", f"Tempo limite esgotado ({REQUEST_TIMEOUT}s). O servidor está lento ou a rede falhou.")
+  except (OSError, http.client.HTTPException) as e:
+    messagebox.showerror("Erro de Conexão", f"Não foi possível conectar ao servidor em {SERVER_HOST}:{SERVER_PORT}.\nErro: {e}")
+  except Exception as e:
+    messagebox.showerror("Erro Inesperado", f"Erro desconhecido ao autenticar: {e}")
+  return None
 
 def checar_primeiro_admin():
   """Verifica se há algum administrador cadastrado."""
@@ -294,16 +1453,227 @@ def checar_primeiro_admin():
 
 def gerar_mapa_professores():
   """Gera o mapa de login → nome do professor (usado pelo app_gui)"""
-  professores = carregar_professores()
+  # Só login e nome: sem baixar os hashes de senha
+  professores = carregar_dados_do_servidor('professores.json', ['usuario', 'nome'])
   return {p['usuario']: p.get('nome', p['usuario']) for p in professores}
 
-def verificar_atividade_ja_respondida(atividade_id, ra_aluno):
-  """Verifica se um aluno específico já respondeu uma atividade específica."""
-  respostas = carregar_respostas_alunos() # Usa a nova função
+def carregar_atividades_respondidas(ra_aluno):
+  """
+  Retorna {atividade_id (str): data_resposta} com tudo o que o aluno já
+  respondeu, consultando o índice do servidor (sem baixar as respostas).
+  """
+  def a_partir_do_arquivo():
+    respondidas = {}
+    for resposta in carregar_respostas_alunos():
+      if str(resposta.get('ra_aluno')) == str(ra_aluno):
+        respondidas.setdefault(str(resposta.get('atividade_id')), resposta.get('data_resposta', 'Data não disponível'))
+    return respondidas
   
-  for resposta in respostas:
-    if (str(resposta.get('ra_aluno')) == str(ra_aluno) and 
-      str(resposta.get('atividade_id')) == str(atividade_id)):
-      return True, resposta.get('data_resposta', 'Data não disponível')
+  if _offline['ativo'] or _tem_pendentes('respostas_alunos.json'):
+    return a_partir_do_arquivo()
+  try:
+    status, _, corpo = _requisicao_http('GET', f"/respostas/aluno/{urllib.parse.quote(str(ra_aluno), safe='')}")
+    
+    if status == 404:
+      # Servidor sem o índice: monta o conjunto a partir do arquivo completo
+      return a_partir_do_arquivo()
+    
+    if status != 200:
+      messagebox.showerror("Erro de Leitura", f"Erro ao consultar respostas: {_mensagem_erro(corpo, f'HTTP {status}')}")
+      return {}
+    
+    return json.loads(corpo.decode('utf-8')).get('respondidas', {})
+
+  except (OSError, http.client.HTTPException) as e:
+    _entrar_offline(e)
+    return a_partir_do_arquivo()
+  except Exception as e:
+    messagebox.showerror("Erro Inesperado", f"Erro desconhecido ao consultar respostas: {e}")
+  return {}
+
+def carregar_boletim(ra_aluno):
+  """
+  Boletim do aluno mantido pelo servidor: {materia_id (str): {'bimestres',
+  'media_final', 'situacao'}}. Retorna None se o servidor não oferece o
+  boletim (o chamador calcula a partir de notas.json) ou em caso de falha.
+  Sem conexão também retorna None: o cálculo usa a cópia local das notas.
+  """
+  if _offline['ativo'] or _tem_pendentes('notas.json'):
+    return None
+  try:
+    status, _, corpo = _requisicao_http('GET', f"/boletim/{urllib.parse.quote(str(ra_aluno), safe='')}")
+    
+    if status == 404:
+      return None
+    if status != 200:
+      messagebox.showerror("Erro de Leitura", f"Erro ao consultar boletim: {_mensagem_erro(corpo, f'HTTP {status}')}")
+      return None
+    
+    return json.loads(corpo.decode('utf-8')).get('materias', {})
+
+  except (OSError, http.client.HTTPException) as e:
+    _entrar_offline(e)
+  except Exception as e:
+    messagebox.showerror("Erro Inesperado", f"Erro desconhecido ao consultar boletim: {e}")
+  return None
+
+# Mapa RA -> turma compartilhado pelas telas, refeito só quando turmas.json muda
+_mapa_aluno_turma = {'etag': None, 'mapa': {}}
+
+def _mapa_turmas(turmas):
+  mapa = {}
+  for turma in turmas:
+    for ra in turma.get('alunos', []):
+      mapa.setdefault(str(ra).strip(), turma)
+  return mapa
+
+def obter_mapa_aluno_turma():
+  """
+  Mapa RA (texto, sem espaços) -> turma. Enquanto turmas.json estiver no
+  TTL do cache não há requisição; depois disso só é refeito se o ETag mudar.
+  """
+  entrada = _cache_valido('turmas.json')
+  if entrada is None or entrada['etag'] != _mapa_aluno_turma['etag']:
+    turmas = carregar_turmas()
+    entrada = _cache_obter('turmas.json')
+    etag = entrada['etag'] if entrada else None
+    if etag is None or etag != _mapa_aluno_turma['etag']:
+      _mapa_aluno_turma.update({'etag': etag, 'mapa': _mapa_turmas(turmas)})
+  return _mapa_aluno_turma['mapa']
+
+def buscar_turma_do_aluno(ra_aluno):
+  """
+  Turma de um aluno (ou None). Usa o mapa local se turmas.json está no
+  cache; senão consulta o índice do servidor sem baixar turmas.json.
+  """
+  ra = str(ra_aluno).strip()
+  entrada = _cache_valido('turmas.json')
+  if entrada is not None and entrada['etag'] == _mapa_aluno_turma['etag']:
+    return _mapa_aluno_turma['mapa'].get(ra)
+  if _offline['ativo'] or _tem_pendentes('turmas.json'):
+    return _mapa_turmas(carregar_turmas()).get(ra)
   
-  return False, None
\ No newline at end of file
+  try:
+    status, _, corpo = _requisicao_http('GET', f"/turmas/aluno/{urllib.parse.quote(ra, safe='')}")
+    
+    if status == 404:
+      # Servidor sem o índice: usa o mapa montado a partir de turmas.json
+      return obter_mapa_aluno_turma().get(ra)
+    if status != 200:
+      messagebox.showerror("Erro de Leitura", f"Erro ao consultar turma do aluno: {_mensagem_erro(corpo, f'HTTP {status}')}")
+      return None
+    
+    return json.loads(corpo.decode('utf-8')).get('turma')
+
+  except (OSError, http.client.HTTPException) as e:
+    _entrar_offline(e)
+    return _mapa_turmas(carregar_turmas()).get(ra)
+  except Exception as e:
+    messagebox.showerror("Erro Inesperado", f"Erro desconhecido ao consultar turma do aluno: {e}")
+  return None
+
+def verificar_atividade_ja_respondida(atividade_id, ra_aluno):
+  """Verifica se um aluno específico já respondeu uma atividade específica."""
+  data_resposta = carregar_atividades_respondidas(ra_aluno).get(str(atividade_id))
+  if data_resposta is not None:
+    return True, data_resposta
+  return False, None
+
+
+# ---------------------------------------------------------------
+# FEED DE ALTERAÇÕES
+# ---------------------------------------------------------------
+# Uma thread de fundo faz long-poll em /api/changes enquanto houver
+# assinaturas: o servidor só responde quando alguma coleção assinada muda
+# (ou após ~25s sem novidade), então um cliente ocioso quase não gera
+# tráfego. As coleções alteradas saem do cache e os assinantes são avisados.
+
+ALTERACOES_ESPERA = 25
+ALTERACOES_PAUSA_ERRO = 5
+
+# {id: (conjunto de arquivos, callback)}
+_assinaturas = {}
+_assinaturas_lock = threading.Lock()
+_feed_alteracoes = {'thread': None, 'proximo_id': 1}
+
+def assinar_alteracoes(arquivos, callback):
+  """
+  Chama callback(arquivos_alterados) sempre que algum dos arquivos mudar
+  no servidor. O callback roda na thread do feed (não na da interface).
+  Retorna o identificador usado em cancelar_assinatura.
+  """
+  with _assinaturas_lock:
+    ident = _feed_alteracoes['proximo_id']
+    _feed_alteracoes['proximo_id'] += 1
+    _assinaturas[ident] = (set(arquivos), callback)
+    
+    thread = _feed_alteracoes['thread']
+    if thread is None or not thread.is_alive():
+      thread = threading.Thread(target=_loop_alteracoes, name='feed-alteracoes', daemon=True)
+      _feed_alteracoes['thread'] = thread
+      thread.start()
+  return ident
+
+def cancelar_assinatura(ident):
+  """Remove uma assinatura (a thread termina quando não restar nenhuma)"""
+  with _assinaturas_lock:
+    _assinaturas.pop(ident, None)
+
+def _avisar_assinantes(alterados):
+  with _assinaturas_lock:
+    assinaturas = list(_assinaturas.values())
+  for arquivos, callback in assinaturas:
+    afetados = arquivos & alterados
+    if afetados:
+      try:
+        callback(afetados)
+      except Exception as e:
+        print(f"[PROXY] Erro ao avisar alteração de {', '.join(sorted(afetados))}: {e}")
+
+def _loop_alteracoes():
+  versao = None
+  epoch = None
+  while True:
+    with _assinaturas_lock:
+      arquivos = set().union(*(a for a, _ in _assinaturas.values()))
+      if not arquivos:
+        _feed_alteracoes['thread'] = None
+        return
+    
+    query = {'files': ','.join(sorted(arquivos))}
+    if versao is not None:
+      query.update({'since': str(versao), 'epoch': epoch, 'timeout': str(ALTERACOES_ESPERA)})
+    
+    try:
+      # Fora do circuit breaker: um long-poll que termina por tempo limite é normal
+      status, _, corpo = _requisicao_http('GET', '/changes', query=query, circuito=False)
+      if status == 404:
+        print("[PROXY] Servidor sem feed de alterações: use o botão Atualizar")
+        with _assinaturas_lock:
+          _feed_alteracoes['thread'] = None
+        return
+      resposta = json.loads(corpo.decode('utf-8'))
+      if status != 200 or not resposta.get('success'):
+        raise ValueError(resposta.get('error', f'HTTP {status}'))
+    except Exception as e:
+      # Sem mensagem na tela: o feed é só uma otimização, tenta de novo depois
+      print(f"[PROXY] Feed de alterações indisponível ({e}); nova tentativa em {ALTERACOES_PAUSA_ERRO}s")
+      time.sleep(ALTERACOES_PAUSA_ERRO)
+      continue
+    
+    primeira = versao is None
+    versao, epoch = resposta['version'], resposta['epoch']
+    
+    if resposta.get('reset'):
+      # Servidor reiniciado: tudo o que foi assinado pode ter mudado
+      invalidar_cache()
+      _avisar_assinantes(arquivos)
+    elif resposta.get('changes') and not primeira:
+      alterados = set(resposta['changes'])
+      for filename in alterados:
+        invalidar_cache(filename)
+      print(f"[PROXY] Alterações no servidor: {', '.join(sorted(alterados))}")
+      _avisar_assinantes(alterados)
+    
+    if resposta.get('retry_after'):
+      time.sleep(resposta['retry_after'])
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Consulta de notas e cálculo do boletim, compartilhados pelas telas do aluno
+(notas, boletim bimestral, relatório e estatísticas).
+
+As notas são indexadas uma única vez por (aluno_ra, materia_id, tipo_nota);
+a partir do índice, médias bimestrais, média final e situação de cada
+matéria saem numa só passada, sem varrer notas.json por nota buscada.
+"""
+
+BIMESTRES = (1, 2, 3, 4)
+MEDIA_APROVACAO = 7.0
+MEDIA_RECUPERACAO = 5.0
+
+
+def _chave(aluno_ra, materia_id, tipo_nota):
+    """Chave do índice (RA e ID como texto: há notas gravadas com RA numérico)"""
+    return (str(aluno_ra), str(materia_id), tipo_nota)
+
+
+def indexar_notas(notas):
+    """
+    Monta o índice (aluno_ra, materia_id, tipo_nota) -> valor, numa passada.
+    Se houver notas repetidas para a mesma chave, vale a primeira (como o next() das telas).
+    """
+    indice = {}
+    for nota in notas:
+        chave = _chave(nota.get('aluno_ra'), nota.get('materia_id'), nota.get('tipo_nota'))
+        indice.setdefault(chave, nota.get('valor'))
+    return indice
+
+
+def _numero(valor):
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+
+def situacao(media):
+    """Situação para uma média: 'Aprovado', 'Recuperação', 'Reprovado' ou 'Pendente' (sem média)"""
+    if media is None:
+        return 'Pendente'
+    if media >= MEDIA_APROVACAO:
+        return 'Aprovado'
+    if media >= MEDIA_RECUPERACAO:
+        return 'Recuperação'
+    return 'Reprovado'
+
+
+def calcular_boletim(indice, ra_aluno, materias):
+    """
+    Calcula o boletim do aluno nas matérias informadas.
+    Retorna uma lista (na ordem de 'materias') de dicionários:
+      {'materia_id', 'nome',
+       'bimestres': [{'bimestre', 'np1', 'np2', 'media'}, ...],  (4 itens)
+       'media_final', 'situacao'}
+    'np1'/'np2' são None quando não lançadas; 'media' é None se faltar uma das duas;
+    'media_final' é a média das médias bimestrais disponíveis (None se não houver).
+    """
+    boletim = []
+    for materia in materias:
+        materia_id = materia['id']
+        bimestres = []
+        medias = []
+
+        for bim in BIMESTRES:
+            np1 = indice.get(_chave(ra_aluno, materia_id, f"B{bim}_NP1"))
+            np2 = indice.get(_chave(ra_aluno, materia_id, f"B{bim}_NP2"))
+            media = (np1 + np2) / 2 if _numero(np1) and _numero(np2) else None
+            if media is not None:
+                medias.append(media)
+            bimestres.append({'bimestre': bim, 'np1': np1, 'np2': np2, 'media': media})
+
+        media_final = sum(medias) / len(medias) if medias else None
+        boletim.append({
+            'materia_id': materia_id,
+            'nome': materia.get('nome', ''),
+            'bimestres': bimestres,
+            'media_final': media_final,
+            'situacao': situacao(media_final)
+        })
+    return boletim
+
+
+def boletim_do_aluno(notas, ra_aluno, materias):
+    """Atalho: indexa as notas e calcula o boletim do aluno"""
+    return calcular_boletim(indexar_notas(notas), ra_aluno, materias)
+
+
+def boletim_de_materializado(boletim_servidor, materias):
+    """
+    Monta o boletim (mesmo formato de calcular_boletim) a partir do boletim
+    mantido pelo servidor ({materia_id: {...}}), nas matérias informadas.
+    Matérias sem nenhuma nota aparecem como pendentes.
+    """
+    boletim = []
+    for materia in materias:
+        dados = boletim_servidor.get(str(materia['id']))
+        if dados is None:
+            bimestres = [{'bimestre': bim, 'np1': None, 'np2': None, 'media': None} for bim in BIMESTRES]
+            media_final = None
+        else:
+            bimestres = dados['bimestres']
+            media_final = dados.get('media_final')
+        boletim.append({
+            'materia_id': materia['id'],
+            'nome': materia.get('nome', ''),
+            'bimestres': bimestres,
+            'media_final': media_final,
+            'situacao': situacao(media_final)
+        })
+    return boletim
+
+
+def medias_por_bimestre(boletim):
+    """{bimestre: [médias das matérias com média nesse bimestre]}"""
+    resultado = {bim: [] for bim in BIMESTRES}
+    for linha in boletim:
+        for b in linha['bimestres']:
+            if b['media'] is not None:
+                resultado[b['bimestre']].append(b['media'])
+    return resultado
+
+
+def media(valores):
+    """Média simples de uma lista (None se vazia)"""
+    return sum(valores) / len(valores) if valores else None
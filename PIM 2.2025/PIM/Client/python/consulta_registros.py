@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Consulta (filtro, ordenação e paginação) sobre uma coleção de registros,
+com a mesma semântica de /api/query/<arquivo> no servidor.
+
+No modo rede a consulta roda no servidor e só o resultado é baixado; este
+módulo é usado no modo local e quando o servidor não oferece a consulta.
+
+Parâmetros de uma consulta:
+    igual   {campo: valor ou lista de valores}  igualdade, comparando como texto
+    contem  {'campo1|campo2': termo}            substring em qualquer um dos campos,
+                                                sem diferenciar maiúsculas
+    faixa   {campo: (minimo, maximo)}           intervalo fechado (None = sem limite)
+    ordem   ['-data', 'nome']                   '-' ordena de forma decrescente
+    limite, inicio                              paginação sobre o resultado ordenado
+
+Para listas grandes, paginar() devolve uma página e o cursor da seguinte.
+"""
+
+
+def _texto(valor):
+    """Valor comparável por igualdade (há RAs gravados como número e com espaços)"""
+    return str(valor).strip()
+
+
+def _numero(valor):
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+
+def _chave_faixa(valor):
+    """Números (ou textos numéricos) comparam como número; o resto, como texto"""
+    try:
+        return (0, float(valor))
+    except (TypeError, ValueError):
+        return (1, str(valor))
+
+
+def _chave_ordem(valor):
+    """Números antes de textos, sem erro de comparação entre tipos"""
+    return (0, valor, '') if _numero(valor) else (1, 0, str(valor))
+
+
+def _lista(valores):
+    return valores if isinstance(valores, (list, tuple, set)) else [valores]
+
+
+def corresponde(registro, igual=None, contem=None, faixa=None):
+    """True se o registro atende a todos os filtros"""
+    for campo, valores in (igual or {}).items():
+        if campo not in registro or _texto(registro[campo]) not in {_texto(v) for v in _lista(valores)}:
+            return False
+
+    for campos, termo in (contem or {}).items():
+        termo = str(termo).lower()
+        if not any(termo in str(registro[c]).lower() for c in campos.split('|') if c in registro):
+            return False
+
+    for campo, (minimo, maximo) in (faixa or {}).items():
+        if campo not in registro:
+            return False
+        valor = _chave_faixa(registro[campo])
+        if minimo is not None and valor < _chave_faixa(minimo):
+            return False
+        if maximo is not None and valor > _chave_faixa(maximo):
+            return False
+    return True
+
+
+def ordenar(registros, ordem):
+    """Ordena por várias chaves ('-campo' decrescente); registros sem o campo ficam no fim"""
+    registros = list(registros)
+    # Ordenações estáveis da última chave para a primeira
+    for chave in reversed(ordem or []):
+        decrescente = chave.startswith('-')
+        campo = chave.lstrip('-')
+        registros.sort(
+            key=lambda r: (campo in r if decrescente else campo not in r, _chave_ordem(r.get(campo))),
+            reverse=decrescente
+        )
+    return registros
+
+
+def aplicar_consulta(registros, igual=None, contem=None, faixa=None, ordem=None, limite=None, inicio=0):
+    """Executa a consulta sobre os registros em memória e retorna a página pedida"""
+    resultado = ordenar(
+        (r for r in registros if isinstance(r, dict) and corresponde(r, igual, contem, faixa)), ordem)
+    fim = None if limite is None else inicio + limite
+    return resultado[inicio:fim]
+
+
+def paginar(registros, limite, cursor=None, chave=None, **consulta):
+    """
+    Página de uma consulta em memória: (registros, próximo cursor ou None, total).
+    'chave' (campo ou lista de campos, juntos únicos) desempata a ordenação
+    como no servidor; aqui o cursor é a posição no resultado, pois os dados
+    locais não mudam entre as páginas.
+    """
+    if chave:
+        consulta['ordem'] = list(consulta.get('ordem') or []) + list(_lista(chave))
+    resultado = aplicar_consulta(registros, **consulta)
+    inicio = int(cursor or 0)
+    fim = inicio + limite
+    return resultado[inicio:fim], (str(fim) if fim < len(resultado) else None), len(resultado)
+
+
+def parametros_consulta(igual=None, contem=None, faixa=None, ordem=None, limite=None, inicio=0, campos=None):
+    """Parâmetros da query string de /api/query/<arquivo> para uma consulta"""
+    parametros = {}
+    for campo, valores in (igual or {}).items():
+        parametros[f'eq.{campo}'] = [_texto(v) for v in _lista(valores)]
+    for campos_busca, termo in (contem or {}).items():
+        parametros[f'like.{campos_busca}'] = str(termo)
+    for campo, (minimo, maximo) in (faixa or {}).items():
+        if minimo is not None:
+            parametros[f'min.{campo}'] = str(minimo)
+        if maximo is not None:
+            parametros[f'max.{campo}'] = str(maximo)
+    if ordem:
+        parametros['sort'] = ','.join(ordem)
+    if limite is not None:
+        parametros['limit'] = str(limite)
+    if inicio:
+        parametros['offset'] = str(inicio)
+    if campos:
+        parametros['fields'] = ','.join(campos)
+    return parametros
@@ -11,19 +11,51 @@
     - Gerenciamento de fila de requisições (Escrita)
     - Sincronização de arquivos JSON
     - Controle de concorrência (Locks por arquivo)
+    - Cache em memória dos documentos lidos
+    - Operações por registro (insert/upsert/delete/patch)
+    - Modo de armazenamento com journal (write-ahead log) e compactação
+    - Login indexado (usuario/ra) com verificação de senha no servidor
+    - Boletim materializado a partir de notas.json
 ===============================================================
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 import json
 import os
+import base64
+import bisect
+import functools
+import gzip
+import hashlib
+import hmac
+import io
+import math
+import re
+import zlib
 import threading
 import queue
 import time
+from contextlib import ExitStack
 from datetime import datetime
 import logging
 
+# Servidor WSGI com suporte a HTTP/1.1 keep-alive (opcional).
+# O servidor de desenvolvimento do Flask (werkzeug) sempre responde com
+# 'Connection: close', o que anula o pool de conexões dos clientes.
+try:
+  from waitress import serve as waitress_serve
+  USE_WAITRESS = True
+except ImportError:
+  USE_WAITRESS = False
+
+# bcrypt (opcional): permite verificar a senha no próprio servidor no login
+try:
+  import bcrypt
+  USE_BCRYPT = True
+except ImportError:
+  USE_BCRYPT = False
+
 # ===============================================================
 # CONFIGURAÇÃO DO SERVIDOR
 # ===============================================================
@@ -74,13 +106,130 @@ os.makedirs(DATA_DIR, exist_ok=True)
 logger.info(f"[DIR] Diretório de dados configurado: {os.path.abspath(DATA_DIR)}")
 # --- FIM DA CORREÇÃO DE CAMINHO ABSOLUTO ---
 
+# Modo de armazenamento:
+# - 'snapshot': cada escrita reescreve o arquivo inteiro (+ cópia .backup)
+# - 'journal':  cada escrita acrescenta a alteração em <arquivo>.journal;
+#               a compactação periódica grava o snapshot de forma atômica
+STORAGE_MODE = CONFIG.get('storage_mode', 'snapshot')
+if STORAGE_MODE not in ('snapshot', 'journal'):
+  logger.warning(f"[WARN] storage_mode '{STORAGE_MODE}' inválido. Usando 'snapshot'.")
+  STORAGE_MODE = 'snapshot'
+
+
+# ===============================================================
+# COMPRESSÃO (gzip)
+# ===============================================================
+
+# Respostas e corpos menores que isso não são comprimidos (não compensa)
+GZIP_MIN_BYTES = int(CONFIG.get('gzip_min_bytes', 1024))
+GZIP_LEVEL = int(CONFIG.get('gzip_level', 6))
+# Limite do corpo descomprimido de uma requisição (proteção contra "gzip bomb")
+MAX_REQUEST_BYTES = int(CONFIG.get('max_request_bytes', 64 * 1024 * 1024))
+# Sufixo do ETag da representação gzip: um ETag forte identifica os bytes
+# enviados, então o corpo comprimido não pode repetir o da versão sem gzip
+GZIP_ETAG_SUFFIX = '-gzip'
+ETAG_PATTERN = re.compile(r'(?:W/)?"[^"]*"|\*')
+
+def _etag_base(tag):
+  """ETag da versão sem gzip (sem 'W/' e sem o sufixo de gzip)"""
+  if tag.startswith('W/'):
+    tag = tag[2:]
+  if tag.endswith(GZIP_ETAG_SUFFIX + '"'):
+    tag = tag[:-len(GZIP_ETAG_SUFFIX) - 1] + '"'
+  return tag
+
+def parse_etags(header):
+  """Lista de ETags de um If-None-Match/If-Match ('*' inclusive), já sem gzip/'W/'"""
+  return [_etag_base(tag) for tag in ETAG_PATTERN.findall(header or '')]
+
+def etag_matches(header, etag):
+  """True se o cabeçalho contém o ETag (em qualquer representação) ou '*'"""
+  tags = parse_etags(header)
+  return '*' in tags or etag in tags
+
+def gunzip_limited(data, limit):
+  """Descomprime um corpo gzip; ValueError se passar de 'limit' bytes ou estiver truncado"""
+  decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+  body = decompressor.decompress(data, limit + 1)
+  if len(body) > limit:
+    raise ValueError(f"corpo descomprimido maior que {limit} bytes")
+  if not decompressor.eof:
+    raise ValueError("corpo gzip incompleto")
+  return body
+
+def gzip_request_middleware(wsgi_app):
+  """
+  Aceita corpos de requisição com 'Content-Encoding: gzip': descomprime
+  antes do Flask, então as rotas (request.json) não mudam.
+  """
+  def middleware(environ, start_response):
+    if environ.get('HTTP_CONTENT_ENCODING', '').strip().lower() == 'gzip':
+      try:
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+        body = gunzip_limited(environ['wsgi.input'].read(length), MAX_REQUEST_BYTES)
+      except (ValueError, zlib.error) as e:
+        error = Response(json.dumps({'success': False, 'error': f"Corpo gzip inválido: {e}"}),
+                         status=400, mimetype='application/json')
+        return error(environ, start_response)
+      environ['wsgi.input'] = io.BytesIO(body)
+      environ['CONTENT_LENGTH'] = str(len(body))
+      del environ['HTTP_CONTENT_ENCODING']
+    return wsgi_app(environ, start_response)
+  return middleware
+
+app.wsgi_app = gzip_request_middleware(app.wsgi_app)
+
+@app.after_request
+def compress_response(response):
+  """Comprime respostas JSON grandes quando o cliente envia 'Accept-Encoding: gzip'"""
+  # Anuncia que o servidor aceita corpos gzip (RFC 7694)
+  response.headers['Accept-Encoding'] = 'gzip'
+  
+  if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+      or 'Content-Encoding' in response.headers
+      or 'gzip' not in request.headers.get('Accept-Encoding', '').lower()):
+    return response
+  
+  body = response.get_data()
+  if len(body) < GZIP_MIN_BYTES:
+    return response
+  
+  # mtime=0: o mesmo corpo sempre gera os mesmos bytes
+  response.set_data(gzip.compress(body, GZIP_LEVEL, mtime=0))
+  response.headers['Content-Encoding'] = 'gzip'
+  etag = response.headers.get('ETag', '')
+  if etag.endswith('"') and not etag.endswith(GZIP_ETAG_SUFFIX + '"'):
+    response.headers['ETag'] = etag[:-1] + GZIP_ETAG_SUFFIX + '"'
+  response.vary.add('Accept-Encoding')
+  return response
+
 
 # ===============================================================
 # SISTEMA DE FILA E LOCKS
 # ===============================================================
 
-# Fila para requisições de escrita (evita concorrência)
-write_queue = queue.Queue()
+# Filas de escrita: uma por worker. Cada arquivo sempre cai no mesmo
+# worker (ordem preservada por arquivo) e arquivos diferentes podem ser
+# gravados em paralelo
+WRITE_WORKERS = max(1, int(CONFIG.get('write_workers', 4)))
+write_queues = [queue.Queue() for _ in range(WRITE_WORKERS)]
+
+# Escritas pendentes por arquivo (enfileiradas e ainda não concluídas)
+pending_writes = {}
+pending_lock = threading.Lock()
+
+def get_write_queue(filename):
+  """Fila do worker responsável pelo arquivo (hash estável do nome)"""
+  return write_queues[zlib.crc32(filename.encode('utf-8')) % WRITE_WORKERS]
+
+def _pending_add(filename, delta):
+  """Atualiza o contador de escritas pendentes de um arquivo"""
+  with pending_lock:
+    total = pending_writes.get(filename, 0) + delta
+    if total > 0:
+      pending_writes[filename] = total
+    else:
+      pending_writes.pop(filename, None)
 
 # Locks por arquivo para sincronização
 file_locks = {}
@@ -90,9 +239,254 @@ def get_file_lock(filename):
   """Obtém ou cria um lock para um arquivo específico"""
   with lock_manager:
     if filename not in file_locks:
-      file_locks[filename] = threading.Lock()
+      # RLock: o cache de documentos chama load_json já segurando o lock
+      file_locks[filename] = threading.RLock()
     return file_locks[filename]
 
+# ===============================================================
+# CACHE DE DOCUMENTOS (LEITURA)
+# ===============================================================
+
+# Cache por arquivo: objeto já decodificado + bytes serializados do 'data'
+# { filename: {'data': ..., 'body': b'...', 'etag': '"..."', 'stat': (mtime_ns, size)} }
+document_cache = {}
+cache_lock = threading.Lock()
+cache_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+def _file_signature(filepath):
+  """Retorna (mtime_ns, tamanho) do arquivo ou None se não existir"""
+  try:
+    st = os.stat(filepath)
+    return (st.st_mtime_ns, st.st_size)
+  except OSError:
+    return None
+
+def _document_signature(filename):
+  """Assinatura do documento: snapshot + journal (se existir)"""
+  filepath = os.path.join(DATA_DIR, filename)
+  return (_file_signature(filepath), _file_signature(journal_path(filename)))
+
+def _serialize(data):
+  return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _body_etag(body):
+  # ETag derivado do conteúdo: muda a cada save_json ou edição externa
+  return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+def document_etag(data):
+  """ETag que um documento com estes dados teria"""
+  return _body_etag(_serialize(data))
+
+def _build_cache_entry(data, signature):
+  """Monta a entrada de cache (corpo serializado + ETag) para um documento"""
+  body = _serialize(data)
+  return {'data': data, 'body': body, 'etag': _body_etag(body), 'stat': signature}
+
+def store_cache(filename, data):
+  """
+  Grava no cache o novo estado de um documento (write-through).
+  Deve ser chamado segurando o lock do arquivo, logo após persistir.
+  """
+  entry = _build_cache_entry(data, _document_signature(filename))
+  with cache_lock:
+    document_cache[filename] = entry
+  return entry
+
+def invalidate_cache(filename):
+  """Remove um arquivo do cache de documentos"""
+  with cache_lock:
+    if document_cache.pop(filename, None) is not None:
+      cache_stats['invalidations'] += 1
+
+def get_cached_document(filename):
+  """
+  Retorna a entrada de cache do arquivo, recarregando do disco apenas
+  quando o arquivo mudou (mtime/tamanho) ou ainda não foi lido.
+  O objeto 'data' retornado é compartilhado: não deve ser modificado.
+  """
+  file_lock = get_file_lock(filename)
+  
+  with file_lock:
+    signature = _document_signature(filename)
+    
+    with cache_lock:
+      entry = document_cache.get(filename)
+      if entry is not None and entry['stat'] == signature:
+        cache_stats['hits'] += 1
+        return entry
+      cache_stats['misses'] += 1
+    
+    # Miss: decodifica do disco uma única vez e guarda o corpo serializado
+    entry = _build_cache_entry(load_document(filename), signature)
+    
+    with cache_lock:
+      previous = document_cache.get(filename)
+      document_cache[filename] = entry
+    
+    # Arquivo editado fora do servidor: também conta como alteração
+    if previous is not None and previous['etag'] != entry['etag']:
+      note_change(filename)
+    return entry
+
+def get_cached_documents(filenames):
+  """
+  Entradas de cache de vários arquivos num mesmo instante consistente:
+  todos os locks são adquiridos (em ordem alfabética, evitando deadlock)
+  antes de ler, então nenhuma escrita acontece no meio da leitura.
+  """
+  with ExitStack() as stack:
+    for filename in sorted(set(filenames)):
+      stack.enter_context(get_file_lock(filename))
+    return {filename: get_cached_document(filename) for filename in filenames}
+
+# ---------------------------------------------------------------
+# Projeção de campos (?fields=) sobre os documentos do cache
+# ---------------------------------------------------------------
+
+# (arquivo, campos) -> {'source': etag do documento, 'body', 'etag'}
+projection_cache = {}
+PROJECTION_CACHE_MAX = 64
+
+def parse_projection(fields):
+  """
+  Converte 'id,nome,atividades.nome' numa árvore de campos:
+  {'id': True, 'nome': True, 'atividades': {'nome': True}}.
+  'campo.*' (ou só 'campo') inclui o valor inteiro do campo.
+  """
+  spec = {}
+  for path in fields:
+    node = spec
+    parts = path.split('.')
+    for i, part in enumerate(parts):
+      if i == len(parts) - 1 or parts[i + 1] == '*':
+        node[part] = True
+        break
+      child = node.get(part)
+      if child is True:
+        break # o campo inteiro já foi pedido
+      node = node.setdefault(part, {})
+  return spec
+
+def project(value, spec):
+  """Aplica a árvore de campos a um valor (listas são projetadas item a item)"""
+  if spec is True:
+    return value
+  if isinstance(value, list):
+    return [project(v, spec) for v in value]
+  if not isinstance(value, dict):
+    return value
+  return {k: project(value[k], sub) for k, sub in spec.items() if k in value}
+
+def normalize_fields(raw):
+  """Lista ordenada e sem repetições dos caminhos pedidos em ?fields="""
+  return sorted({f.strip() for f in raw.split(',') if f.strip()})
+
+def get_projected_document(filename, fields):
+  """
+  Corpo serializado e ETag do documento projetado em 'fields', guardados
+  até o documento mudar (o ETag do original faz parte da chave de validade).
+  """
+  entry = get_cached_document(filename)
+  key = (filename, ','.join(fields))
+  
+  with cache_lock:
+    cached = projection_cache.get(key)
+    if cached is not None and cached['source'] == entry['etag']:
+      return cached
+  
+  data = project(entry['data'], parse_projection(fields))
+  projected = _build_cache_entry(data, None)
+  projected['source'] = entry['etag']
+  
+  with cache_lock:
+    projection_cache.pop(key, None)
+    if len(projection_cache) >= PROJECTION_CACHE_MAX:
+      projection_cache.pop(next(iter(projection_cache)))
+    projection_cache[key] = projected
+  return projected
+
+# ===============================================================
+# FEED DE ALTERAÇÕES (/api/changes)
+# ===============================================================
+
+# Versão global, incrementada a cada alteração confirmada; cada coleção
+# guarda a versão da sua última alteração. As versões recomeçam do zero a
+# cada início do servidor, por isso acompanham um 'epoch' próprio
+CHANGES_EPOCH = f"{int(time.time() * 1000):x}"
+CHANGES_MAX_WAIT = 25 # segundos (abaixo do timeout de leitura dos clientes)
+CHANGES_HEARTBEAT = 15 # segundos entre comentários keep-alive no SSE
+# Cada espera ocupa uma thread HTTP: no máximo metade delas fica esperando
+CHANGES_MAX_WAITERS = max(1, int(CONFIG.get('http_threads', 16)) // 2)
+
+change_feed = {'version': 0, 'collections': {}, 'waiters': 0}
+change_cond = threading.Condition()
+
+# Histórico recente das operações por registro de cada coleção, para o
+# /api/delta: {arquivo: {'floor': versão, 'entries': [(versão, op), ...]}}.
+# O histórico está completo para qualquer versão >= 'floor'; antes disso
+# (ou após uma escrita completa/edição externa) o cliente recebe o arquivo inteiro
+DELTA_LOG_MAX_OPS = int(CONFIG.get('delta_log_max_ops', 1000))
+delta_logs = {}
+
+def note_change(filename, ops=None):
+  """
+  Registra que a coleção mudou (com as operações aplicadas, se houver)
+  e acorda quem está esperando. Deve ser chamado segurando o lock do arquivo.
+  """
+  with change_cond:
+    change_feed['version'] += 1
+    version = change_feed['version']
+    change_feed['collections'][filename] = version
+    
+    log = delta_logs.setdefault(filename, {'floor': 0, 'entries': []})
+    if ops is None or any(op.get('op') not in RECORD_OPERATIONS for op in ops):
+      # Escrita completa ou edição externa: o histórico recomeça aqui
+      log['floor'] = version
+      log['entries'] = []
+    else:
+      log['entries'].extend((version, op) for op in ops)
+      excess = len(log['entries']) - DELTA_LOG_MAX_OPS
+      if excess > 0:
+        # Descarta as versões mais antigas inteiras (nunca metade de uma versão)
+        cut = log['entries'][excess - 1][0]
+        log['entries'] = [e for e in log['entries'] if e[0] > cut]
+        log['floor'] = cut
+    
+    change_cond.notify_all()
+
+def changes_since(since, filenames=None):
+  """Coleções alteradas depois da versão 'since' (chamar segurando change_cond)"""
+  return {
+    name: version for name, version in change_feed['collections'].items()
+    if version > since and (not filenames or name in filenames)
+  }
+
+def wait_for_changes(since, filenames, timeout):
+  """
+  Espera até alguma das coleções mudar depois de 'since' ou o tempo acabar.
+  Retorna (versão atual, {arquivo: versão}) - vazio se nada mudou.
+  """
+  deadline = time.monotonic() + timeout
+  with change_cond:
+    while True:
+      changed = changes_since(since, filenames)
+      remaining = deadline - time.monotonic()
+      if changed or remaining <= 0:
+        return change_feed['version'], changed
+      change_cond.wait(remaining)
+
+def acquire_change_waiter():
+  """Reserva uma vaga de espera (False se todas estão ocupadas)"""
+  with change_cond:
+    if change_feed['waiters'] >= CHANGES_MAX_WAITERS:
+      return False
+    change_feed['waiters'] += 1
+    return True
+
+def release_change_waiter():
+  with change_cond:
+    change_feed['waiters'] -= 1
+
 # ===============================================================
 # FUNÇÕES DE MANIPULAÇÃO DE ARQUIVOS JSON
 # ===============================================================
@@ -123,8 +517,15 @@ def load_json(filename):
       logger.error(f"[ERRO] Erro ao carregar {filename}: {e}")
       return []
 
-def save_json(filename, data):
-  """Salva arquivo JSON com tratamento de erros e backup"""
+def save_json(filename, data, ops=None):
+  """
+  Salva arquivo JSON com tratamento de erros e backup.
+  No modo 'journal', apenas registra as alterações ('ops', ou a substituição
+  do documento inteiro) no journal; o snapshot é gravado na compactação.
+  """
+  if STORAGE_MODE == 'journal':
+    return journal_append(filename, ops or [{'op': 'replace', 'data': data}], data)
+  
   filepath = os.path.join(DATA_DIR, filename)
   file_lock = get_file_lock(filename)
   
@@ -142,6 +543,10 @@ def save_json(filename, data):
       with open(filepath, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
       
+      # O estado recém-gravado já está em memória: vai direto para o cache,
+      # sem reler e decodificar o arquivo na próxima leitura
+      store_cache(filename, data)
+      
       logger.info(f"[SAVE] Arquivo salvo: {filename} ({len(data) if isinstance(data, list) else 'objeto'} registros)")
       return True
     except Exception as e:
@@ -150,53 +555,1068 @@ def save_json(filename, data):
       if os.path.exists(filepath + '.backup'):
         os.replace(filepath + '.backup', filepath)
         logger.warning(f"[WARN] Backup de {filename} restaurado.")
+      invalidate_cache(filename)
+      return False
+
+# ===============================================================
+# JOURNAL (WRITE-AHEAD LOG) E COMPACTAÇÃO
+# ===============================================================
+#
+# Formato de <arquivo>.journal (uma linha JSON por entrada):
+#   {"base": "<sha1 do snapshot>"}          <- cabeçalho
+#   {"ts": "...", "op": {"op": "upsert", ...}}
+#   {"ts": "...", "op": {"op": "replace", "data": [...]}}
+#
+# O cabeçalho identifica o snapshot sobre o qual o journal deve ser
+# reaplicado. A compactação grava o novo snapshot (temp + fsync + rename)
+# e só depois apaga o journal; se cair entre as duas etapas, o hash do
+# snapshot não confere mais com o cabeçalho e o journal é descartado.
+
+journal_entries = {}      # filename -> entradas no journal desde a compactação
+snapshot_hashes = {}      # filename -> (assinatura, sha1) do snapshot em disco
+storage_stats = {'appends': 0, 'compactions': 0, 'recovered': 0}
+compaction_event = threading.Event()
+
+def journal_path(filename):
+  """Caminho do journal de um arquivo"""
+  return os.path.join(DATA_DIR, filename + '.journal')
+
+def _snapshot_hash(filename):
+  """sha1 do conteúdo atual do snapshot (None se não existir)"""
+  filepath = os.path.join(DATA_DIR, filename)
+  signature = _file_signature(filepath)
+  if signature is None:
+    return None
+  
+  memo = snapshot_hashes.get(filename)
+  if memo and memo[0] == signature:
+    return memo[1]
+  
+  with open(filepath, 'rb') as f:
+    digest = hashlib.sha1(f.read()).hexdigest()
+  snapshot_hashes[filename] = (signature, digest)
+  return digest
+
+def load_document(filename):
+  """Carrega o snapshot e reaplica o journal pendente (se houver)"""
+  data = load_json(filename)
+  path = journal_path(filename)
+  if not os.path.exists(path):
+    journal_entries.pop(filename, None)
+    return data
+  
+  with open(path, 'r', encoding='utf-8') as f:
+    lines = f.read().splitlines()
+  
+  try:
+    base = json.loads(lines[0]).get('base') if lines else None
+  except (json.JSONDecodeError, AttributeError):
+    base = '?'
+  
+  if not lines or base != _snapshot_hash(filename):
+    # Journal de um snapshot anterior (compactação interrompida após o
+    # rename, ou snapshot editado manualmente): não é reaplicado, mas é
+    # guardado à parte, pois pode conter escritas confirmadas aos clientes
+    orphan_path = path + '.orphan'
+    if os.path.exists(orphan_path):
+      # Não sobrescrever um journal órfão anterior ainda não conferido
+      orphan_path = f"{path}.{datetime.now().strftime('%Y%m%d%H%M%S')}.orphan"
+    os.replace(path, orphan_path)
+    logger.warning(f"[JOURNAL] Journal de {filename} não corresponde ao snapshot. "
+                   f"{max(len(lines) - 1, 0)} entradas guardadas em {os.path.basename(orphan_path)}.")
+    journal_entries.pop(filename, None)
+    return data
+  
+  aplicadas = 0
+  for numero, line in enumerate(lines[1:], start=2):
+    try:
+      op = json.loads(line)['op']
+    except (json.JSONDecodeError, KeyError, TypeError):
+      # Última linha incompleta (queda durante a escrita): ignora o resto
+      logger.warning(f"[JOURNAL] Entrada inválida em {filename}.journal (linha {numero}). Ignorando o restante.")
+      break
+    
+    if op.get('op') == 'replace':
+      data = op.get('data')
+    else:
+      data, _ = apply_record_operation(data, op)
+    aplicadas += 1
+  
+  journal_entries[filename] = aplicadas
+  logger.info(f"[JOURNAL] {filename}: {aplicadas} entradas reaplicadas sobre o snapshot")
+  return data
+
+def journal_append(filename, ops, data):
+  """
+  Acrescenta as alterações 'ops' ao journal do arquivo com um único fsync
+  e atualiza o cache com o novo estado 'data'.
+  """
+  path = journal_path(filename)
+  file_lock = get_file_lock(filename)
+  
+  with file_lock:
+    try:
+      linhas = []
+      if not os.path.exists(path):
+        linhas.append(json.dumps({'base': _snapshot_hash(filename)}))
+        journal_entries[filename] = 0
+      ts = datetime.now().isoformat()
+      linhas.extend(json.dumps({'ts': ts, 'op': op}, ensure_ascii=False) for op in ops)
+      
+      with open(path, 'a', encoding='utf-8', newline='\n') as f:
+        f.write('\n'.join(linhas) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+      
+      journal_entries[filename] = journal_entries.get(filename, 0) + len(ops)
+      storage_stats['appends'] += 1
+      store_cache(filename, data)
+      
+      logger.info(f"[JOURNAL] {len(ops)} alteração(ões) em {filename} ({journal_entries[filename]} entradas pendentes)")
+      
+      if journal_entries[filename] >= CONFIG.get('journal_max_entries', 200):
+        compaction_event.set()
+      return True
+    except Exception as e:
+      logger.error(f"[ERRO] Erro ao gravar journal de {filename}: {e}")
+      invalidate_cache(filename)
       return False
 
+def write_snapshot(filename, data):
+  """Grava o snapshot de forma atômica: arquivo temporário + fsync + rename"""
+  filepath = os.path.join(DATA_DIR, filename)
+  tmp_path = filepath + '.tmp'
+  conteudo = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+  
+  with open(tmp_path, 'wb') as f:
+    f.write(conteudo)
+    f.flush()
+    os.fsync(f.fileno())
+  os.replace(tmp_path, filepath)
+  
+  snapshot_hashes[filename] = (_file_signature(filepath), hashlib.sha1(conteudo).hexdigest())
+
+def compact_journal(filename):
+  """Incorpora o journal ao snapshot e remove o journal"""
+  path = journal_path(filename)
+  file_lock = get_file_lock(filename)
+  
+  with file_lock:
+    if not os.path.exists(path):
+      return False
+    try:
+      entry = get_cached_document(filename)
+      if not os.path.exists(path):
+        # O journal não correspondia ao snapshot e foi guardado como órfão
+        return False
+      write_snapshot(filename, entry['data'])
+      os.remove(path)
+      
+      journal_entries[filename] = 0
+      storage_stats['compactions'] += 1
+      store_cache(filename, entry['data'])
+      logger.info(f"[COMPACT] Snapshot de {filename} gravado e journal compactado")
+      return True
+    except Exception as e:
+      logger.error(f"[ERRO] Erro ao compactar {filename}: {e}")
+      return False
+
+def compact_all_journals():
+  """Compacta todos os journals existentes no diretório de dados"""
+  compactados = 0
+  for name in os.listdir(DATA_DIR):
+    if name.endswith('.json.journal') and compact_journal(name[:-len('.journal')]):
+      compactados += 1
+  return compactados
+
+def compaction_worker():
+  """Thread de compactação periódica (ou quando um journal fica grande)"""
+  intervalo = CONFIG.get('compaction_interval', 30)
+  logger.info(f"[COMPACT] Compactação periódica a cada {intervalo}s")
+  
+  while True:
+    compaction_event.wait(timeout=intervalo)
+    compaction_event.clear()
+    try:
+      for filename, pendentes in list(journal_entries.items()):
+        if pendentes > 0:
+          compact_journal(filename)
+    except Exception as e:
+      logger.error(f"[ERRO COMPACT] Erro na compactação: {e}")
+
+def recover_journals():
+  """
+  Recuperação na inicialização: reaplica os journals pendentes sobre os
+  snapshots (independente do modo atual) e remove temporários órfãos.
+  """
+  for name in os.listdir(DATA_DIR):
+    if name.endswith('.json.tmp'):
+      os.remove(os.path.join(DATA_DIR, name))
+      logger.warning(f"[RECOVERY] Temporário órfão removido: {name}")
+  
+  recuperados = compact_all_journals()
+  storage_stats['recovered'] = recuperados
+  if recuperados:
+    logger.info(f"[RECOVERY] {recuperados} journal(s) reaplicado(s) na inicialização")
+
+# ===============================================================
+# OPERAÇÕES POR REGISTRO
+# ===============================================================
+
+RECORD_OPERATIONS = ('insert', 'upsert', 'delete', 'patch')
+
+def _record_matches(record, match):
+  """True se o registro tem todos os campos/valores de 'match'"""
+  return isinstance(record, dict) and all(record.get(k) == v for k, v in match.items())
+
+def validate_record_operation(op):
+  """Valida a estrutura de uma operação. Retorna mensagem de erro ou None"""
+  if not isinstance(op, dict):
+    return 'Operação deve ser um objeto JSON'
+  
+  tipo = op.get('op')
+  if tipo not in RECORD_OPERATIONS:
+    return f"Operação inválida: {tipo}. Use uma de {', '.join(RECORD_OPERATIONS)}"
+  
+  if tipo in ('insert', 'upsert') and not isinstance(op.get('record'), dict):
+    return "Campo 'record' (objeto) é obrigatório"
+  
+  if 'unique' in op:
+    unique = op.get('unique')
+    if tipo != 'insert':
+      return "Campo 'unique' só é aceito em insert"
+    if not isinstance(unique, list) or not unique or not all(isinstance(k, str) for k in unique):
+      return "Campo 'unique' deve ser uma lista de nomes de campos"
+  
+  if tipo == 'upsert':
+    keys = op.get('keys')
+    if not isinstance(keys, list) or not keys:
+      return "Campo 'keys' (lista de campos) é obrigatório para upsert"
+  
+  if tipo in ('delete', 'patch'):
+    if not isinstance(op.get('match'), dict) or not op.get('match'):
+      return "Campo 'match' (objeto) é obrigatório"
+  
+  if tipo == 'patch' and not isinstance(op.get('fields'), dict):
+    return "Campo 'fields' (objeto) é obrigatório para patch"
+  
+  return None
+
+def apply_record_operation(records, op):
+  """
+  Aplica uma operação sobre uma lista de registros sem modificá-la.
+  Retorna (nova_lista, quantidade_de_registros_afetados).
+  
+  - insert: acrescenta 'record' ao final (a unicidade de 'unique' é
+    verificada antes, em commit_batch)
+  - upsert: substitui o primeiro registro que coincide em QUALQUER campo
+    de 'keys' (ex.: alunos por 'usuario' ou 'ra'), removendo duplicatas;
+    se nenhum coincidir, acrescenta
+  - delete: remove os registros que coincidem com 'match'
+  - patch: atualiza 'fields' nos registros que coincidem com 'match'
+  """
+  tipo = op['op']
+  
+  if tipo == 'insert':
+    return records + [op['record']], 1
+  
+  if tipo == 'upsert':
+    record = op['record']
+    chaves = {k: record.get(k) for k in op['keys'] if record.get(k) is not None}
+    result = []
+    substituido = False
+    for r in records:
+      if isinstance(r, dict) and any(r.get(k) == v for k, v in chaves.items()):
+        if not substituido:
+          result.append(record)
+          substituido = True
+        continue
+      result.append(r)
+    if not substituido:
+      result.append(record)
+    return result, 1
+  
+  if tipo == 'delete':
+    result = [r for r in records if not _record_matches(r, op['match'])]
+    return result, len(records) - len(result)
+  
+  # patch: copia os registros alterados para não tocar no cache compartilhado
+  result = []
+  afetados = 0
+  for r in records:
+    if _record_matches(r, op['match']):
+      r = {**r, **op['fields']}
+      afetados += 1
+    result.append(r)
+  return result, afetados
+
+# Índices de unicidade para insert com 'unique':
+# (arquivo, campos) -> {'etag': ..., 'keys': {chave: registro}}
+unique_indexes = {}
+
+def _unique_key(record, fields):
+  """Chave de unicidade de um registro (valores como texto, como no cliente)"""
+  return tuple(str(record.get(f)) for f in fields)
+
+def build_unique_index(records, fields):
+  """Monta o índice chave -> registro (vale o primeiro registro de cada chave)"""
+  index = {}
+  for r in records:
+    if isinstance(r, dict):
+      index.setdefault(_unique_key(r, fields), r)
+  return index
+
+def take_unique_index(filename, fields, entry):
+  """
+  Retira o índice de unicidade para ser atualizado dentro de um lote.
+  Reaproveita o índice guardado se ele corresponde ao ETag atual; senão
+  reconstrói. Deve ser chamado segurando o lock do arquivo.
+  """
+  stored = unique_indexes.pop((filename, fields), None)
+  if stored is not None and stored['etag'] == entry['etag']:
+    return stored['keys']
+  return build_unique_index(entry['data'], fields)
+
 # ===============================================================
-# WORKER THREAD - PROCESSADOR DE FILA
+# WORKER THREAD - PROCESSADOR DE FILA (GROUP COMMIT)
 # ===============================================================
 
-def queue_worker():
-  """Worker thread que processa a fila de requisições de escrita"""
-  logger.info("[WORKER] Worker thread iniciado")
+# Histogramas simples: limites superiores dos buckets (o último é +inf)
+HISTOGRAM_BUCKETS = {
+  'queue_depth': [1, 2, 5, 10, 20, 50, 100],
+  'batch_size': [1, 2, 5, 10, 20, 50, 100],
+  'commit_latency_ms': [1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+}
+histograms = {
+  name: {'counts': [0] * (len(buckets) + 1), 'count': 0, 'sum': 0.0}
+  for name, buckets in HISTOGRAM_BUCKETS.items()
+}
+histograms_lock = threading.Lock()
+
+def observe(name, value):
+  """Registra um valor no histograma 'name'"""
+  buckets = HISTOGRAM_BUCKETS[name]
+  indice = next((i for i, limite in enumerate(buckets) if value <= limite), len(buckets))
+  with histograms_lock:
+    h = histograms[name]
+    h['counts'][indice] += 1
+    h['count'] += 1
+    h['sum'] += value
+
+def _histograms_status():
+  """Histogramas formatados para o /api/status"""
+  with histograms_lock:
+    resultado = {}
+    for name, h in histograms.items():
+      buckets = HISTOGRAM_BUCKETS[name]
+      # Lista de pares [faixa, contagem] para manter a ordem dos buckets
+      faixas = [[f'<={limite}', n] for limite, n in zip(buckets, h['counts'])]
+      faixas.append([f'>{buckets[-1]}', h['counts'][-1]])
+      resultado[name] = {
+        'buckets': faixas,
+        'count': h['count'],
+        'avg': round(h['sum'] / h['count'], 3) if h['count'] else 0.0
+      }
+    return resultado
+
+def commit_batch(filename, tasks):
+  """
+  Aplica em ordem todas as tarefas de um mesmo arquivo sobre a cópia em
+  memória e persiste apenas o estado final, com uma única escrita.
+  Retorna a lista de resultados (um por tarefa, na mesma ordem).
+  """
+  with get_file_lock(filename):
+    entry = get_cached_document(filename)
+    state = entry['data']
+    ops = []
+    results = []
+    # Posições (em results) das tarefas que alteraram o documento
+    alterados = []
+    # Índices de unicidade usados no lote, mantidos em dia a cada insert
+    unicos = {}
+    
+    for task in tasks:
+      if task.get('operation') == 'records':
+        if not isinstance(state, list):
+          results.append({'success': False, 'error': f'{filename} não é uma lista de registros'})
+          continue
+        op = task['op']
+        
+        if op.get('unique'):
+          campos = tuple(op['unique'])
+          if campos not in unicos:
+            unicos[campos] = (take_unique_index(filename, campos, entry) if state is entry['data']
+                              else build_unique_index(state, campos))
+          chave = _unique_key(op['record'], campos)
+          existente = unicos[campos].get(chave)
+          if existente is not None:
+            results.append({'success': False, 'conflict': True, 'error': 'Registro duplicado', 'existing': existente})
+            continue
+          unicos[campos][chave] = op['record']
+        
+        state, afetados = apply_record_operation(state, op)
+        if afetados:
+          alterados.append(len(results))
+          ops.append(op)
+          if op['op'] != 'insert':
+            # delete/upsert/patch podem mudar as chaves: reconstruir se preciso
+            unicos.clear()
+        results.append({'success': True, 'affected': afetados})
+      else:
+        # If-Match: a escrita foi preparada sobre uma versão que não é mais a atual
+        if task.get('if_match'):
+          atual = entry['etag'] if state is entry['data'] else document_etag(state)
+          if not etag_matches(task['if_match'], atual):
+            if document_etag(task.get('data')) == atual:
+              # Reenvio de uma escrita já aplicada (a resposta anterior se perdeu)
+              results.append(True)
+            else:
+              results.append({'success': False, 'conflict': True, 'etag': atual,
+                              'error': 'O arquivo foi alterado por outro usuário'})
+            continue
+        # Escrita completa: o que veio antes no lote deixa de importar
+        state = task.get('data')
+        ops = [{'op': 'replace', 'data': state}]
+        unicos.clear()
+        alterados.append(len(results))
+        results.append(True)
+    
+    if not ops:
+      for campos, keys in unicos.items():
+        unique_indexes[(filename, campos)] = {'etag': entry['etag'], 'keys': keys}
+      return results
+    
+    inicio = time.perf_counter()
+    ok = save_json(filename, state, ops)
+    observe('commit_latency_ms', (time.perf_counter() - inicio) * 1000)
+    
+    if ok:
+      note_change(filename, ops)
+      if unicos or filename == GRADES_FILE:
+        etag = get_cached_document(filename)['etag']
+        # Os índices já refletem o novo estado: associá-los ao novo ETag
+        for campos, keys in unicos.items():
+          unique_indexes[(filename, campos)] = {'etag': etag, 'keys': keys}
+        if filename == GRADES_FILE:
+          try:
+            update_boletim_view(ops, state, entry['etag'], etag)
+          except Exception as e:
+            # O boletim se reconstrói na próxima consulta
+            logger.error(f"[ERRO] Falha ao atualizar boletim: {e}")
+      return results
+    # Falha de I/O: nenhuma alteração do lote foi persistida. Só as tarefas
+    # que alteraram o documento falham; conflitos e recusas continuam valendo
+    for i in alterados:
+      results[i] = {'success': False, 'error': 'Falha ao salvar arquivo (Erro de I/O)'} if isinstance(results[i], dict) else False
+    return results
+
+def queue_worker(write_queue, worker_id):
+  """
+  Worker thread que processa uma fila de requisições de escrita.
+  A cada ciclo drena tudo o que já está na fila e agrupa por arquivo,
+  de modo que N escritas pendentes no mesmo arquivo viram uma só.
+  """
+  logger.info(f"[WORKER] Worker thread {worker_id} iniciado")
   
   while True:
     try:
       # Aguardar requisição na fila
       task = write_queue.get(timeout=1)
       
-      if task is None: # Sinal de parada
-        break
+      # Drenar o restante da fila (sem bloquear)
+      tasks = [task]
+      while tasks[-1] is not None:
+        try:
+          tasks.append(write_queue.get_nowait())
+        except queue.Empty:
+          break
       
-      operation = task.get('operation')
-      filename = task.get('filename')
-      data = task.get('data')
-      callback = task.get('callback')
+      parar = tasks[-1] is None # Sinal de parada
+      if parar:
+        tasks.pop()
+      observe('queue_depth', len(tasks))
       
-      logger.info(f"[PROC] Processando: {operation} em {filename}")
+      # Agrupar por arquivo mantendo a ordem de chegada
+      por_arquivo = {}
+      for t in tasks:
+        por_arquivo.setdefault(t.get('filename'), []).append(t)
       
-      # Executar operação de escrita segura
-      result = save_json(filename, data)
+      for filename, lote in por_arquivo.items():
+        logger.info(f"[PROC] Processando lote de {len(lote)} escrita(s) em {filename}")
+        observe('batch_size', len(lote))
+        
+        try:
+          results = commit_batch(filename, lote)
+        except Exception as e:
+          logger.error(f"[ERRO WORKER] Erro ao processar {filename}: {e}")
+          results = [
+            {'success': False, 'error': str(e)} if t.get('operation') == 'records' else False
+            for t in lote
+          ]
+        
+        # Callbacks com resultado
+        _pending_add(filename, -len(lote))
+        for t, result in zip(lote, results):
+          if t.get('callback'):
+            t['callback'](result)
       
-      # Callback com resultado
-      if callback:
-        callback(result)
+      for _ in range(len(tasks) + parar):
+        write_queue.task_done()
       
-      write_queue.task_done()
+      if parar:
+        break
       
     except queue.Empty:
       continue
     except Exception as e:
       logger.error(f"[ERRO WORKER] Erro no worker: {e}")
 
-# Iniciar worker thread
-worker_thread = threading.Thread(target=queue_worker, daemon=True)
-worker_thread.start()
+# Recuperar journals pendentes antes de aceitar requisições
+recover_journals()
+
+# Iniciar worker threads (uma por fila)
+worker_threads = [
+  threading.Thread(target=queue_worker, args=(q, i), daemon=True)
+  for i, q in enumerate(write_queues)
+]
+for worker_thread in worker_threads:
+  worker_thread.start()
+
+# Iniciar thread de compactação (apenas no modo journal)
+if STORAGE_MODE == 'journal':
+  compaction_thread = threading.Thread(target=compaction_worker, daemon=True)
+  compaction_thread.start()
+
+# ===============================================================
+# ÍNDICES DE USUÁRIOS (LOGIN)
+# ===============================================================
+
+# Arquivos de usuários, na ordem em que o login os consulta
+USER_FILES = (
+  ('alunos.json', 'aluno'),
+  ('professores.json', 'professor'),
+  ('admin.json', 'admin')
+)
+USER_INDEX_KEYS = ('usuario', 'ra')
+
+# arquivo -> {'etag': ..., 'usuario': {valor: registro}, 'ra': {valor: registro}}
+user_indexes = {}
+user_indexes_lock = threading.Lock()
+
+def get_user_index(filename):
+  """
+  Índice hash (usuario/ra -> registro) de um arquivo de usuários.
+  Reconstruído apenas quando o ETag do documento muda; como o cache é
+  write-through, toda escrita aparece no índice já na busca seguinte.
+  """
+  entry = get_cached_document(filename)
+  
+  with user_indexes_lock:
+    index = user_indexes.get(filename)
+    if index is not None and index['etag'] == entry['etag']:
+      return index
+    
+    index = {'etag': entry['etag']}
+    for key in USER_INDEX_KEYS:
+      index[key] = {}
+    for record in entry['data']:
+      for key in USER_INDEX_KEYS:
+        value = record.get(key)
+        # Em caso de duplicidade vale o primeiro registro do arquivo
+        if value is not None:
+          index[key].setdefault(str(value), record)
+    
+    user_indexes[filename] = index
+    return index
+
+def find_user(login):
+  """
+  Localiza um usuário pelo 'usuario' ou 'ra' sem varrer os arquivos.
+  Retorna (registro, tipo) ou (None, None). O registro é compartilhado
+  com o cache: não deve ser modificado.
+  """
+  for filename, tipo in USER_FILES:
+    index = get_user_index(filename)
+    record = index['usuario'].get(login) or index['ra'].get(login)
+    if record is not None:
+      return record, record.get('tipo', tipo)
+  return None, None
+
+def public_user(record, tipo):
+  """Cópia do registro para enviar ao cliente, sem o hash da senha"""
+  usuario = {k: v for k, v in record.items() if k != 'senha'}
+  usuario['tipo'] = tipo
+  return usuario
+
+# ===============================================================
+# ÍNDICE ALUNO -> TURMA
+# ===============================================================
+
+CLASSES_FILE = 'turmas.json'
+
+# {'etag': ..., 'por_ra': {ra: turma}}
+class_index = {'etag': None, 'por_ra': {}}
+class_index_lock = threading.Lock()
+
+def get_class_index():
+  """
+  Índice reverso RA -> turma sobre turmas.json (RAs normalizados como
+  texto sem espaços). Reconstruído apenas quando o ETag muda; se um RA
+  aparece em mais de uma turma, vale a primeira.
+  """
+  entry = get_cached_document(CLASSES_FILE)
+  
+  with class_index_lock:
+    if class_index['etag'] == entry['etag']:
+      return class_index['por_ra']
+    
+    por_ra = {}
+    for turma in entry['data']:
+      if isinstance(turma, dict):
+        for ra in turma.get('alunos', []):
+          por_ra.setdefault(str(ra).strip(), turma)
+    
+    class_index['etag'] = entry['etag']
+    class_index['por_ra'] = por_ra
+    return por_ra
+
+# ===============================================================
+# ÍNDICE DE RESPOSTAS DOS ALUNOS
+# ===============================================================
+
+ANSWERS_FILE = 'respostas_alunos.json'
+
+# {'etag': ..., 'por_aluno': {ra_aluno: {atividade_id: data_resposta}}}
+answer_index = {'etag': None, 'por_aluno': {}}
+answer_index_lock = threading.Lock()
+
+def get_answer_index():
+  """
+  Índice ra_aluno -> {atividade_id: data_resposta} das respostas.
+  Como os índices de usuários, só é reconstruído quando o ETag muda.
+  As chaves são strings (o cliente compara ids como texto).
+  """
+  entry = get_cached_document(ANSWERS_FILE)
+  
+  with answer_index_lock:
+    if answer_index['etag'] == entry['etag']:
+      return answer_index['por_aluno']
+    
+    por_aluno = {}
+    for resposta in entry['data']:
+      if not isinstance(resposta, dict):
+        continue
+      respondidas = por_aluno.setdefault(str(resposta.get('ra_aluno')), {})
+      respondidas.setdefault(str(resposta.get('atividade_id')), resposta.get('data_resposta', 'Data não disponível'))
+    
+    answer_index['etag'] = entry['etag']
+    answer_index['por_aluno'] = por_aluno
+    return por_aluno
+
+# ===============================================================
+# BOLETIM MATERIALIZADO (notas.json)
+# ===============================================================
+
+GRADES_FILE = 'notas.json'
+BIMESTRES = (1, 2, 3, 4)
+
+# 'notas': ra -> lista de notas do aluno (partição de notas.json)
+# 'boletins': ra -> {materia_id: {'bimestres': [...], 'media_final', 'situacao'}}
+boletim_view = {'etag': None, 'notas': {}, 'boletins': {}}
+boletim_lock = threading.Lock()
+boletim_stats = {'rebuilds': 0, 'incremental_updates': 0, 'students_recomputed': 0}
+
+def _situacao(media):
+  """Mesma regra das telas do cliente (7.0 aprovado, 5.0 recuperação)"""
+  if media is None:
+    return 'Pendente'
+  if media >= 7.0:
+    return 'Aprovado'
+  if media >= 5.0:
+    return 'Recuperação'
+  return 'Reprovado'
+
+def _is_number(value):
+  return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def compute_student_boletim(notas):
+  """
+  Boletim de um aluno a partir das suas notas, numa passada.
+  Para notas repetidas (mesma matéria e tipo) vale a primeira.
+  """
+  valores = {}
+  for nota in notas:
+    valores.setdefault((str(nota.get('materia_id')), nota.get('tipo_nota')), nota.get('valor'))
+  
+  boletim = {}
+  for materia_id in dict.fromkeys(m for m, _ in valores):
+    bimestres = []
+    medias = []
+    for bim in BIMESTRES:
+      np1 = valores.get((materia_id, f"B{bim}_NP1"))
+      np2 = valores.get((materia_id, f"B{bim}_NP2"))
+      media = (np1 + np2) / 2 if _is_number(np1) and _is_number(np2) else None
+      if media is not None:
+        medias.append(media)
+      bimestres.append({'bimestre': bim, 'np1': np1, 'np2': np2, 'media': media})
+    media_final = sum(medias) / len(medias) if medias else None
+    boletim[materia_id] = {'bimestres': bimestres, 'media_final': media_final, 'situacao': _situacao(media_final)}
+  return boletim
+
+def _rebuild_boletim_view(state, etag):
+  """
+  Reparticiona notas.json por aluno e recalcula só os alunos cuja
+  partição mudou (escritas completas do arquivo chegam como 'replace').
+  Deve ser chamado segurando boletim_lock.
+  """
+  particoes = {}
+  for nota in state if isinstance(state, list) else []:
+    if isinstance(nota, dict):
+      particoes.setdefault(str(nota.get('aluno_ra')), []).append(nota)
+  
+  antigas = boletim_view['notas']
+  boletins = {}
+  for ra, notas in particoes.items():
+    if ra in boletim_view['boletins'] and antigas.get(ra) == notas:
+      boletins[ra] = boletim_view['boletins'][ra]
+    else:
+      boletins[ra] = compute_student_boletim(notas)
+      boletim_stats['students_recomputed'] += 1
+  
+  boletim_view.update({'etag': etag, 'notas': particoes, 'boletins': boletins})
+  boletim_stats['rebuilds'] += 1
+
+def _op_student(op):
+  """RA do único aluno afetado por uma operação de registro, ou None se não dá para saber"""
+  if op.get('op') == 'insert':
+    return str(op['record'].get('aluno_ra'))
+  if op.get('op') in ('delete', 'patch') and 'aluno_ra' in op.get('match', {}):
+    if 'aluno_ra' in op.get('fields', {}):
+      return None # a nota muda de aluno
+    return str(op['match']['aluno_ra'])
+  return None
+
+def update_boletim_view(ops, state, old_etag, new_etag):
+  """
+  Atualiza o boletim após um commit em notas.json (chamado pelo worker,
+  segurando o lock do arquivo). Operações de registro com RA conhecido
+  recalculam apenas a partição daquele aluno; o resto reparticiona.
+  """
+  with boletim_lock:
+    alunos = [_op_student(op) for op in ops]
+    if boletim_view['etag'] != old_etag or None in alunos:
+      _rebuild_boletim_view(state, new_etag)
+      return
+    
+    for op, ra in zip(ops, alunos):
+      notas, _ = apply_record_operation(boletim_view['notas'].get(ra, []), op)
+      if notas:
+        boletim_view['notas'][ra] = notas
+      else:
+        boletim_view['notas'].pop(ra, None)
+    
+    for ra in set(alunos):
+      if ra in boletim_view['notas']:
+        boletim_view['boletins'][ra] = compute_student_boletim(boletim_view['notas'][ra])
+      else:
+        boletim_view['boletins'].pop(ra, None)
+      boletim_stats['students_recomputed'] += 1
+    
+    boletim_view['etag'] = new_etag
+    boletim_stats['incremental_updates'] += 1
+
+def get_student_boletim(ra):
+  """Boletim materializado de um aluno ({} se não há notas)"""
+  with get_file_lock(GRADES_FILE):
+    entry = get_cached_document(GRADES_FILE)
+    with boletim_lock:
+      # Primeira consulta ou notas.json alterado fora do servidor
+      if boletim_view['etag'] != entry['etag']:
+        _rebuild_boletim_view(entry['data'], entry['etag'])
+      return boletim_view['boletins'].get(ra, {})
+
+# ===============================================================
+# CONSULTAS (/api/query)
+# ===============================================================
+
+QUERY_OPERATORS = ('eq', 'like', 'min', 'max')
+# Parâmetros que não mudam o conjunto de registros encontrados
+QUERY_PAGING_PARAMS = ('limit', 'offset', 'cursor', 'fields')
+# Demais parâmetros aceitos sem operador (qualquer outro é erro de digitação)
+QUERY_PARAMS = ('sort', 'key') + QUERY_PAGING_PARAMS
+QUERY_CACHE_MAX = 32
+
+# (arquivo, assinatura da consulta) -> {'etag', 'records': [...], 'keys': [...]}
+query_cache = {}
+query_cache_lock = threading.Lock()
+
+# (arquivo, campo) -> {'etag': ..., 'index': {valor (texto): [posições]}}
+field_indexes = {}
+field_indexes_lock = threading.Lock()
+
+def _query_text(value):
+  """Valor comparável por igualdade (há RAs gravados como número e com espaços)"""
+  return str(value).strip()
+
+def _range_key(value):
+  """Números (ou textos numéricos) comparam como número; o resto, como texto"""
+  try:
+    return (0, float(value))
+  except (TypeError, ValueError):
+    return (1, str(value))
+
+def _sort_key(value):
+  """Números antes de textos, sem erro de comparação entre tipos"""
+  return (0, value, '') if _is_number(value) else (1, 0, str(value))
+
+def get_field_index(filename, field):
+  """
+  Índice de igualdade valor -> posições dos registros (na ordem do arquivo),
+  montado na primeira consulta pelo campo e refeito só quando o ETag muda.
+  Retorna (entrada do cache, índice) do mesmo instante.
+  """
+  entry = get_cached_document(filename)
+  key = (filename, field)
+  
+  with field_indexes_lock:
+    index = field_indexes.get(key)
+    if index is not None and index['etag'] == entry['etag']:
+      return entry, index['index']
+    
+    positions = {}
+    if isinstance(entry['data'], list):
+      for i, record in enumerate(entry['data']):
+        if isinstance(record, dict) and field in record:
+          positions.setdefault(_query_text(record[field]), []).append(i)
+    
+    field_indexes[key] = {'etag': entry['etag'], 'index': positions}
+    return entry, positions
+
+def parse_query(args):
+  """
+  Converte os parâmetros da URL numa consulta. Lança ValueError para
+  parâmetros ou operadores desconhecidos, limit/offset inválidos e cursores
+  de outra ordenação.
+  """
+  query = {'eq': {}, 'like': [], 'min': {}, 'max': {}, 'sort': [], 'limit': None, 'offset': 0,
+           'key': [k.strip() for k in args.get('key', '').split(',') if k.strip()], 'cursor': None}
+  
+  for name in args:
+    if '.' not in name:
+      if name not in QUERY_PARAMS:
+        raise ValueError(f"Parâmetro desconhecido: '{name}'")
+      continue
+    op, field = name.split('.', 1)
+    if op not in QUERY_OPERATORS or not field:
+      raise ValueError(f"Filtro inválido: '{name}'")
+    if op == 'eq':
+      query['eq'][field] = {_query_text(v) for v in args.getlist(name)}
+    elif op == 'like':
+      query['like'].append((field.split('|'), args.get(name, '').lower()))
+    else:
+      query[op][field] = _range_key(args.get(name))
+  
+  for key in (k.strip() for k in args.get('sort', '').split(',')):
+    if key:
+      query['sort'].append((key.lstrip('-'), key.startswith('-')))
+  
+  for param in ('limit', 'offset'):
+    value = args.get(param)
+    if value is not None:
+      if not value.isdigit():
+        raise ValueError(f"'{param}' deve ser um inteiro não negativo")
+      query[param] = int(value)
+  
+  if args.get('cursor'):
+    # Sem campos únicos para desempate a posição do cursor não é estável
+    if not query['key']:
+      raise ValueError("'cursor' exige 'key' (campos únicos para desempate)")
+    query['cursor'] = decode_cursor(args.get('cursor'), query)
+  
+  # Mesmos filtros/ordem = mesmo resultado ordenado (compartilhado entre as páginas)
+  query['signature'] = repr(sorted(
+    (name, tuple(args.getlist(name))) for name in args if name not in QUERY_PAGING_PARAMS
+  ))
+  return query
+
+def _query_matches(record, query):
+  """True se o registro atende a todos os filtros da consulta"""
+  for field, values in query['eq'].items():
+    if field not in record or _query_text(record[field]) not in values:
+      return False
+  
+  for fields, term in query['like']:
+    if not any(term in str(record[f]).lower() for f in fields if f in record):
+      return False
+  
+  for field, bound in query['min'].items():
+    if field not in record or _range_key(record[field]) < bound:
+      return False
+  for field, bound in query['max'].items():
+    if field not in record or _range_key(record[field]) > bound:
+      return False
+  return True
+
+def _record_sort_key(record, query):
+  """
+  Chave completa de ordenação de um registro: os campos de 'sort' e, para
+  desempate, os campos de 'key' (juntos únicos, ex.: id ou ra_aluno,atividade_id).
+  Cada parte é (sem o campo?, valor) para que ausentes fiquem no fim.
+  """
+  fields = [field for field, _ in query['sort']] + query['key']
+  return [[field not in record, _sort_key(record.get(field))] for field in fields]
+
+def _key_wrapper(query):
+  """Converte chaves de ordenação em objetos comparáveis (com os sentidos de 'sort')"""
+  directions = [descending for _, descending in query['sort']] + [False] * len(query['key'])
+  
+  def compare(a, b):
+    for (missing_a, value_a), (missing_b, value_b), descending in zip(a, b, directions):
+      if missing_a != missing_b:
+        return 1 if missing_a else -1
+      if value_a != value_b:
+        order = -1 if value_a < value_b else 1
+        return -order if descending else order
+    return 0
+  
+  return functools.cmp_to_key(compare)
+
+def _cursor_spec(query):
+  """Ordenação que dá sentido a um cursor: campos de 'sort' (com sentido) e de 'key'"""
+  return [('-' if descending else '') + field for field, descending in query['sort']] + ['key:' + k for k in query['key']]
+
+def encode_cursor(parts, query):
+  """Cursor opaco: a chave de ordenação do último registro entregue e a ordenação que a gerou"""
+  raw = json.dumps({'spec': _cursor_spec(query), 'after': parts},
+                   ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+  return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor, query):
+  """
+  Chave de ordenação de um cursor. ValueError se inválido ou gerado por
+  outra ordenação (sort/key): a posição não valeria para esta consulta.
+  """
+  try:
+    decoded = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    spec, parts = decoded['spec'], decoded['after']
+    # O JSON devolve listas; os valores de _sort_key são comparados como tuplas
+    parts = [[bool(missing), tuple(value)] for missing, value in parts]
+  except (TypeError, ValueError, KeyError, UnicodeError):
+    raise ValueError("Cursor inválido")
+  if spec != _cursor_spec(query) or len(parts) != len(spec):
+    raise ValueError("Cursor não corresponde à ordenação da consulta")
+  return parts
+
+def get_query_results(filename, query):
+  """
+  Registros encontrados pela consulta, já ordenados, com suas chaves de
+  ordenação. Guardados até o documento mudar: as páginas seguintes da
+  mesma consulta não refazem filtro nem ordenação.
+  Com filtro de igualdade, os candidatos vêm do índice do primeiro campo
+  (sem varrer a coleção); os demais filtros são conferidos só neles.
+  """
+  if query['eq']:
+    field, values = next(iter(query['eq'].items()))
+    entry, index = get_field_index(filename, field)
+  else:
+    entry, index = get_cached_document(filename), None
+  
+  if not isinstance(entry['data'], list):
+    raise ValueError(f"{filename} não é uma lista de registros")
+  
+  cache_key = (filename, query['signature'])
+  with query_cache_lock:
+    cached = query_cache.get(cache_key)
+    if cached is not None and cached['etag'] == entry['etag']:
+      return cached
+  
+  if index is not None:
+    positions = sorted(p for v in values for p in index.get(v, ()))
+  else:
+    positions = range(len(entry['data']))
+  
+  wrapper = _key_wrapper(query)
+  matches = sorted(
+    (
+      (wrapper(_record_sort_key(record, query)), record)
+      for p, record in ((p, entry['data'][p]) for p in positions)
+      if isinstance(record, dict) and _query_matches(record, query)
+    ),
+    key=lambda pair: pair[0]
+  )
+  results = {
+    'etag': entry['etag'],
+    'keys': [k for k, _ in matches],
+    'records': [r for _, r in matches],
+    'wrapper': wrapper
+  }
+  
+  with query_cache_lock:
+    query_cache.pop(cache_key, None)
+    if len(query_cache) >= QUERY_CACHE_MAX:
+      query_cache.pop(next(iter(query_cache)))
+    query_cache[cache_key] = results
+  return results
+
+def run_query(filename, query):
+  """
+  Executa a consulta e retorna (total encontrado, página, próximo cursor).
+  Com 'cursor' a página começa logo após o último registro entregue, pela
+  chave de ordenação: inserções e remoções entre uma página e outra não
+  fazem registros se repetirem nem serem pulados. Para isso a chave tem de
+  ser única, então o cursor exige 'key'; sem ela a paginação é por
+  'offset'. O próximo cursor é None na última página (ou sem 'limit'/'key').
+  """
+  results = get_query_results(filename, query)
+  keys, records = results['keys'], results['records']
+  
+  start = query['offset']
+  if query['cursor'] is not None:
+    start = bisect.bisect_right(keys, results['wrapper'](query['cursor']))
+  
+  if query['limit'] is None:
+    return len(records), records[start:], None
+  
+  end = start + query['limit']
+  has_next = query['key'] and start < end < len(records)
+  next_cursor = encode_cursor(keys[end - 1].obj, query) if has_next else None
+  return len(records), records[start:end], next_cursor
 
 # ===============================================================
 # ROTAS DA API
 # ===============================================================
 
+def validate_filename(filename):
+  """Valida o nome do arquivo. Retorna uma resposta de erro ou None"""
+  if not filename.endswith('.json'):
+    return jsonify({'error': 'Arquivo deve ter extensão .json'}), 400
+  
+  # Previne path traversal (../, ..\, etc)
+  if '..' in filename or '/' in filename or '\\' in filename:
+    return jsonify({'error': 'Nome de arquivo inválido'}), 400
+  
+  return None
+
+def enqueue_write(task):
+  """
+  Coloca uma tarefa na fila de escrita e aguarda o resultado do worker.
+  Retorna o resultado do callback ou None em caso de timeout.
+  """
+  result_event = threading.Event()
+  result_container = {'result': None}
+  
+  def callback(result):
+    result_container['result'] = result
+    result_event.set()
+  
+  task['callback'] = callback
+  _pending_add(task['filename'], 1)
+  get_write_queue(task['filename']).put(task)
+  
+  if result_event.wait(timeout=CONFIG.get('timeout', 30)):
+    return result_container['result']
+  return None
+
 @app.route('/ping', methods=['GET'])
 def ping():
   """Endpoint para verificar se o servidor está ativo"""
@@ -208,63 +1628,270 @@ def ping():
 
 @app.route('/api/read/<filename>', methods=['GET'])
 def read_file(filename):
-  """Lê um arquivo JSON"""
+  """
+  Lê um arquivo JSON (suporta If-None-Match -> 304 Not Modified).
+  ?fields=id,nome,atividades.nome devolve apenas os campos pedidos.
+  """
   try:
     # Validar nome do arquivo (previne path traversal)
-    if not filename.endswith('.json'):
-      return jsonify({'error': 'Arquivo deve ter extensão .json'}), 400
+    erro = validate_filename(filename)
+    if erro:
+      return erro
     
-    # Previne path traversal (../, ..\, etc)
-    if '..' in filename or '/' in filename or '\\' in filename:
-      return jsonify({'error': 'Nome de arquivo inválido'}), 400
+    # Serve a partir do cache: o 'data' já está serializado, só o
+    # envelope (success/timestamp) é montado a cada requisição
+    fields = normalize_fields(request.args.get('fields', ''))
+    entry = get_projected_document(filename, fields) if fields else get_cached_document(filename)
     
-    data = load_json(filename)
-    return jsonify({
+    # Leitura condicional: o cliente já tem esta versão
+    if etag_matches(request.headers.get('If-None-Match'), entry['etag']):
+      return Response(status=304, headers={'ETag': entry['etag']})
+    
+    envelope = json.dumps({'success': True, 'timestamp': datetime.now().isoformat()})
+    payload = envelope[:-1].encode('utf-8') + b', "data": ' + entry['body'] + b'}'
+    return Response(payload, mimetype='application/json', headers={'ETag': entry['etag']})
+  except Exception as e:
+    logger.error(f"[ERRO] Erro ao ler {filename}: {e}")
+    return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/read-many', methods=['GET'])
+def read_many_files():
+  """
+  Lê vários arquivos JSON numa única requisição, sob um snapshot
+  consistente. Uso: /api/read-many?files=alunos.json,professores.json
+  Resposta: {"success": true, "etags": {...}, "documents": {arquivo: data}}
+  """
+  try:
+    filenames = [f.strip() for f in request.args.get('files', '').split(',') if f.strip()]
+    if not filenames:
+      return jsonify({'success': False, 'error': "Parâmetro 'files' não informado"}), 400
+    
+    for filename in filenames:
+      erro = validate_filename(filename)
+      if erro:
+        return erro
+    
+    entries = get_cached_documents(filenames)
+    
+    # Monta a resposta a partir dos corpos já serializados no cache
+    envelope = json.dumps({
       'success': True,
-      'data': data,
-      'timestamp': datetime.now().isoformat()
+      'timestamp': datetime.now().isoformat(),
+      'etags': {name: entry['etag'] for name, entry in entries.items()}
     })
+    documentos = b','.join(
+      json.dumps(name).encode('utf-8') + b':' + entry['body'] for name, entry in entries.items()
+    )
+    payload = envelope[:-1].encode('utf-8') + b', "documents": {' + documentos + b'}}'
+    return Response(payload, mimetype='application/json')
   except Exception as e:
-    logger.error(f"[ERRO] Erro ao ler {filename}: {e}")
+    logger.error(f"[ERRO] Erro ao ler vários arquivos: {e}")
+    return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/query/<filename>', methods=['GET'])
+def query_records(filename):
+  """
+  Filtra, ordena e pagina os registros de um arquivo no servidor; só o
+  resultado é enviado. Parâmetros:
+    eq.<campo>=valor              igualdade (repetido: qualquer um dos valores)
+    like.<campo>|<campo>=termo    substring em qualquer dos campos (sem maiúsculas)
+    min.<campo>= / max.<campo>=   intervalo fechado
+    sort=-data,nome  limit=20  offset=40  fields=id,nome
+    key=id ou key=ra_aluno,atividade_id (campos únicos que desempatam a ordenação)
+    cursor=<next_cursor da página anterior> (exige key e a mesma sort/key)
+  Parâmetros desconhecidos respondem 400.
+  Resposta: {"success": true, "total": N, "next_cursor": "..." ou null, "data": [...]}
+  (suporta If-None-Match)
+  """
+  try:
+    erro = validate_filename(filename)
+    if erro:
+      return erro
+    
+    try:
+      query = parse_query(request.args)
+      total, records, next_cursor = run_query(filename, query)
+    except ValueError as e:
+      return jsonify({'success': False, 'error': str(e)}), 400
+    
+    fields = normalize_fields(request.args.get('fields', ''))
+    if fields:
+      records = project(records, parse_projection(fields))
+    
+    # Corpo e ETag do resultado (o cliente pode revalidar a mesma consulta)
+    result = _build_cache_entry({'total': total, 'next_cursor': next_cursor, 'data': records}, None)
+    if etag_matches(request.headers.get('If-None-Match'), result['etag']):
+      return Response(status=304, headers={'ETag': result['etag']})
+    
+    envelope = json.dumps({'success': True, 'timestamp': datetime.now().isoformat()})
+    payload = envelope[:-1].encode('utf-8') + b', ' + result['body'][1:]
+    return Response(payload, mimetype='application/json', headers={'ETag': result['etag']})
+  except Exception as e:
+    logger.error(f"[ERRO] Erro na consulta a {filename}: {e}")
+    return jsonify({'success': False, 'error': str(e)}), 500
+
+def _parse_changes_args():
+  """(since ou None, conjunto de arquivos, timeout) de /api/changes e do stream"""
+  since = request.args.get('since', request.headers.get('Last-Event-ID'))
+  if since is not None and not since.isdigit():
+    raise ValueError("'since' deve ser um inteiro não negativo")
+  files = {f.strip() for f in request.args.get('files', '').split(',') if f.strip()}
+  timeout = float(request.args.get('timeout', CHANGES_MAX_WAIT))
+  if not math.isfinite(timeout) or timeout < 0:
+    raise ValueError("'timeout' deve ser um número de segundos não negativo")
+  return (int(since) if since is not None else None), files, min(timeout, CHANGES_MAX_WAIT)
+
+@app.route('/api/changes', methods=['GET'])
+def changes_long_poll():
+  """
+  Long-poll de alterações: /api/changes?since=<versão>&epoch=<epoch>&files=a.json,b.json
+  Responde assim que alguma coleção mudar depois de 'since' (ou após
+  'timeout' segundos, no máximo 25, com 'changes' vazio).
+  Sem 'since', responde na hora com a versão atual (ponto de partida).
+  'reset': true indica que o servidor reiniciou: recarregue tudo.
+  Resposta: {"success": true, "epoch": "...", "version": N, "changes": {arquivo: versão}}
+  """
+  try:
+    since, files, timeout = _parse_changes_args()
+  except ValueError as e:
+    return jsonify({'success': False, 'error': str(e)}), 400
+  
+  epoch = request.args.get('epoch')
+  with change_cond:
+    version = change_feed['version']
+    reset = since is not None and (since > version or (epoch is not None and epoch != CHANGES_EPOCH))
+    if since is None or reset:
+      changes = changes_since(0, files) if reset else {}
+      return jsonify({'success': True, 'epoch': CHANGES_EPOCH, 'version': version, 'changes': changes, 'reset': reset})
+  
+  if not acquire_change_waiter():
+    # Todas as vagas de espera ocupadas: responde já e pede nova tentativa
+    with change_cond:
+      version, changes = change_feed['version'], changes_since(since, files)
+    return jsonify({'success': True, 'epoch': CHANGES_EPOCH, 'version': version, 'changes': changes,
+                    'reset': False, 'retry_after': 5})
+  try:
+    version, changes = wait_for_changes(since, files, timeout)
+  finally:
+    release_change_waiter()
+  return jsonify({'success': True, 'epoch': CHANGES_EPOCH, 'version': version, 'changes': changes, 'reset': False})
+
+@app.route('/api/changes/stream', methods=['GET'])
+def changes_stream():
+  """
+  Alterações como Server-Sent Events: /api/changes/stream?since=<versão>&files=...
+  Cada evento 'change' traz {"epoch", "version", "changes"} e usa a versão
+  como id (reconexões com Last-Event-ID continuam de onde pararam).
+  """
+  try:
+    since, files, _ = _parse_changes_args()
+  except ValueError as e:
+    return jsonify({'success': False, 'error': str(e)}), 400
+  
+  if not acquire_change_waiter():
+    return jsonify({'success': False, 'error': 'Muitas conexões aguardando alterações'}), 503, {'Retry-After': '5'}
+  
+  with change_cond:
+    if since is None or since > change_feed['version']:
+      since = change_feed['version']
+  
+  def events(last):
+    yield f"retry: 3000\nid: {last}\n\n"
+    while True:
+      version, changes = wait_for_changes(last, files, CHANGES_HEARTBEAT)
+      if changes:
+        last = version
+        data = json.dumps({'epoch': CHANGES_EPOCH, 'version': version, 'changes': changes})
+        yield f"id: {version}\nevent: change\ndata: {data}\n\n"
+      else:
+        yield ": keep-alive\n\n"
+  
+  response = Response(events(since), mimetype='text/event-stream',
+                      headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+  # A vaga é liberada quando o servidor fecha a resposta (cliente desconectado,
+  # servidor encerrando), mesmo que o gerador nunca tenha começado a rodar
+  response.call_on_close(release_change_waiter)
+  return response
+
+@app.route('/api/delta/<filename>', methods=['GET'])
+def read_delta(filename):
+  """
+  Alterações de um arquivo desde uma versão, para réplicas no cliente:
+  /api/delta/notas.json?since=<versão>&epoch=<epoch>
+  - "full": false -> "ops": operações (insert/upsert/delete/patch) a aplicar,
+    em ordem, sobre a cópia da versão 'since'
+  - "full": true -> "data": o arquivo inteiro (primeira carga, servidor
+    reiniciado ou histórico já descartado)
+  Ambas trazem "version", "epoch" e o "etag" do estado resultante.
+  """
+  try:
+    erro = validate_filename(filename)
+    if erro:
+      return erro
+    
+    since = request.args.get('since')
+    if since is not None and not since.isdigit():
+      return jsonify({'success': False, 'error': "'since' deve ser um inteiro não negativo"}), 400
+    
+    # Documento, versão e histórico do mesmo instante (escritas seguram o lock do arquivo)
+    with get_file_lock(filename):
+      entry = get_cached_document(filename)
+      with change_cond:
+        version = change_feed['collections'].get(filename, 0)
+        log = delta_logs.get(filename, {'floor': 0, 'entries': []})
+        full = (since is None or request.args.get('epoch') != CHANGES_EPOCH
+                or not log['floor'] <= int(since) <= version)
+        ops = [] if full else [op for v, op in log['entries'] if v > int(since)]
+    
+    envelope = json.dumps({
+      'success': True,
+      'timestamp': datetime.now().isoformat(),
+      'epoch': CHANGES_EPOCH,
+      'version': version,
+      'etag': entry['etag'],
+      'full': full
+    })
+    if full:
+      payload = envelope[:-1].encode('utf-8') + b', "data": ' + entry['body'] + b'}'
+    else:
+      payload = envelope[:-1].encode('utf-8') + b', "ops": ' + json.dumps(ops, ensure_ascii=False).encode('utf-8') + b'}'
+    return Response(payload, mimetype='application/json')
+  except Exception as e:
+    logger.error(f"[ERRO] Erro ao ler alterações de {filename}: {e}")
     return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/write/<filename>', methods=['POST'])
 def write_file(filename):
-  """Escreve em um arquivo JSON (usando fila)"""
+  """
+  Escreve em um arquivo JSON (usando fila).
+  Com 'If-Match: <etag>' só escreve se o arquivo ainda estiver nessa versão;
+  caso contrário responde 412 com o ETag atual (a escrita não é aplicada).
+  """
   try:
     # Validar nome do arquivo (previne path traversal)
-    if not filename.endswith('.json'):
-      return jsonify({'error': 'Arquivo deve ter extensão .json'}), 400
-    
-    # Previne path traversal (../, ..\, etc)
-    if '..' in filename or '/' in filename or '\\' in filename:
-      return jsonify({'error': 'Nome de arquivo inválido'}), 400
+    erro = validate_filename(filename)
+    if erro:
+      return erro
     
     # Obter dados do request
     data = request.json.get('data')
     if data is None:
       return jsonify({'error': 'Dados não fornecidos'}), 400
     
-    # Criar evento para aguardar conclusão
-    result_event = threading.Event()
-    result_container = {'success': False}
-    
-    def callback(success):
-      result_container['success'] = success
-      result_event.set()
-    
-    # Adicionar à fila
-    write_queue.put({
+    # Adicionar à fila e aguardar processamento (timeout configurável)
+    timeout = CONFIG.get('timeout', 30)
+    success = enqueue_write({
       'operation': 'write',
       'filename': filename,
       'data': data,
-      'callback': callback
+      'if_match': request.headers.get('If-Match')
     })
     
-    # Aguardar processamento (timeout configurável)
-    timeout = CONFIG.get('timeout', 30)
-    if result_event.wait(timeout=timeout):
-      if result_container['success']:
+    if isinstance(success, dict):
+      # Conflito de versão (If-Match) ou falha de I/O do lote
+      return jsonify(success), 412 if success.get('conflict') else 500
+    if success is not None:
+      if success:
         return jsonify({
           'success': True,
           'message': f'Arquivo {filename} salvo com sucesso',
@@ -279,6 +1906,156 @@ def write_file(filename):
     logger.error(f"[ERRO] Erro ao escrever {filename}: {e}")
     return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/records/<filename>', methods=['POST'])
+def records_operation(filename):
+  """
+  Altera registros individuais de um arquivo (usando fila), sem que o
+  cliente precise enviar a coleção inteira.
+  
+  Corpo: {"op": "insert", "record": {...}}
+         {"op": "insert", "record": {...}, "unique": ["ra_aluno", "atividade_id"]}
+         {"op": "upsert", "record": {...}, "keys": ["usuario", "ra"]}
+         {"op": "delete", "match": {"ra": "..."}}
+         {"op": "patch",  "match": {"id": 1}, "fields": {"status": "..."}}
+  """
+  try:
+    erro = validate_filename(filename)
+    if erro:
+      return erro
+    
+    op = request.get_json(silent=True)
+    erro = validate_record_operation(op)
+    if erro:
+      return jsonify({'success': False, 'error': erro}), 400
+    
+    result = enqueue_write({
+      'operation': 'records',
+      'filename': filename,
+      'op': op
+    })
+    
+    if result is None:
+      timeout = CONFIG.get('timeout', 30)
+      return jsonify({'success': False, 'error': f'Timeout ({timeout}s) ao processar requisição. Fila cheia?'}), 408
+    if not result.get('success'):
+      # Conflito de unicidade (insert com 'unique') não é erro do servidor
+      return jsonify(result), 409 if result.get('conflict') else 500
+    
+    result['timestamp'] = datetime.now().isoformat()
+    return jsonify(result)
+  
+  except Exception as e:
+    logger.error(f"[ERRO] Erro na operação de registros em {filename}: {e}")
+    return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/auth/login', methods=['POST'])
+def auth_login():
+  """
+  Autentica um usuário sem enviar a base de usuários ao cliente.
+  Corpo: {"login": "<usuario ou ra>", "senha": "..."}
+  Resposta: {"success": true, "usuario": {...sem senha}, "migrar_senha": bool}
+  'migrar_senha' indica senha legada em texto plano, que o cliente deve
+  regravar criptografada. Sem bcrypt no servidor, só senhas em texto plano
+  podem ser conferidas; uma senha criptografada responde 501.
+  """
+  try:
+    body = request.get_json(silent=True) or {}
+    login = str(body.get('login', '')).strip()
+    senha = str(body.get('senha', ''))
+    if not login or not senha:
+      return jsonify({'success': False, 'error': "Campos 'login' e 'senha' são obrigatórios"}), 400
+    
+    record, tipo = find_user(login)
+    autenticado = False
+    migrar_senha = False
+    
+    if record is not None:
+      # 'senha' ausente, nula ou de outro tipo nunca confere (e não derruba o login)
+      senha_armazenada = str(record.get('senha') or '')
+      if senha_armazenada.startswith('$2b$'):
+        if not USE_BCRYPT:
+          logger.error(f"[AUTH] Senha criptografada de {login} não pode ser conferida: bcrypt não instalado")
+          return jsonify({'success': False, 'error': 'bcrypt não instalado no servidor'}), 501
+        try:
+          autenticado = bcrypt.checkpw(senha.encode('utf-8'), senha_armazenada.encode('utf-8'))
+        except ValueError:
+          logger.error(f"[AUTH] Hash de senha inválido para {login}")
+      elif senha_armazenada and hmac.compare_digest(senha_armazenada.encode('utf-8'), senha.encode('utf-8')):
+        autenticado = True
+        migrar_senha = True
+    
+    if not autenticado:
+      logger.warning(f"[AUTH] Falha de login: {login}")
+      return jsonify({'success': False, 'error': 'Credenciais inválidas'}), 401
+    
+    logger.info(f"[AUTH] Login: {login} ({tipo})")
+    return jsonify({
+      'success': True,
+      'usuario': public_user(record, tipo),
+      'migrar_senha': migrar_senha
+    })
+  except Exception as e:
+    logger.error(f"[ERRO] Erro no login: {e}")
+    return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/auth/lookup', methods=['GET'])
+def auth_lookup():
+  """
+  Busca um único usuário pelo 'usuario' ou 'ra' (?login=...), sem a senha:
+  a senha só é conferida no servidor, por /api/auth/login.
+  Resposta: {"success": true, "usuario": {...sem senha} ou null}
+  """
+  try:
+    login = request.args.get('login', '').strip()
+    if not login:
+      return jsonify({'success': False, 'error': "Parâmetro 'login' não informado"}), 400
+    
+    record, tipo = find_user(login)
+    usuario = public_user(record, tipo) if record is not None else None
+    return jsonify({'success': True, 'usuario': usuario})
+  except Exception as e:
+    logger.error(f"[ERRO] Erro na busca de usuário: {e}")
+    return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/turmas/aluno/<ra>', methods=['GET'])
+def student_class(ra):
+  """
+  Turma de um aluno pelo índice reverso RA -> turma.
+  Resposta: {"success": true, "ra": "...", "turma": {...} ou null}
+  """
+  try:
+    turma = get_class_index().get(ra.strip())
+    return jsonify({'success': True, 'ra': ra, 'turma': turma})
+  except Exception as e:
+    logger.error(f"[ERRO] Erro ao consultar turma de {ra}: {e}")
+    return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/respostas/aluno/<ra_aluno>', methods=['GET'])
+def answered_activities(ra_aluno):
+  """
+  Atividades já respondidas por um aluno, numa única consulta ao índice.
+  Resposta: {"success": true, "ra_aluno": "...", "respondidas": {atividade_id: data_resposta}}
+  """
+  try:
+    respondidas = get_answer_index().get(ra_aluno, {})
+    return jsonify({'success': True, 'ra_aluno': ra_aluno, 'respondidas': respondidas})
+  except Exception as e:
+    logger.error(f"[ERRO] Erro ao consultar respostas de {ra_aluno}: {e}")
+    return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/boletim/<ra>', methods=['GET'])
+def student_boletim(ra):
+  """
+  Boletim de um aluno (médias bimestrais, média final e situação por
+  matéria), mantido pelo servidor a cada escrita em notas.json.
+  Resposta: {"success": true, "ra": "...", "materias": {materia_id: {...}}}
+  """
+  try:
+    return jsonify({'success': True, 'ra': ra, 'materias': get_student_boletim(ra)})
+  except Exception as e:
+    logger.error(f"[ERRO] Erro ao consultar boletim de {ra}: {e}")
+    return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/list', methods=['GET'])
 def list_files():
   """Lista todos os arquivos JSON disponíveis"""
@@ -292,14 +2069,38 @@ def list_files():
   except Exception as e:
     return jsonify({'success': False, 'error': str(e)}), 500
 
+def _cache_status():
+  """Resumo do cache de documentos para o /api/status"""
+  with cache_lock:
+    total = cache_stats['hits'] + cache_stats['misses']
+    return {
+      'hits': cache_stats['hits'],
+      'misses': cache_stats['misses'],
+      'invalidations': cache_stats['invalidations'],
+      'hit_ratio': round(cache_stats['hits'] / total, 3) if total else 0.0,
+      'entries': len(document_cache),
+      'bytes': sum(len(e['body']) for e in document_cache.values())
+    }
+
 @app.route('/api/status', methods=['GET'])
 def server_status():
   """Retorna status detalhado do servidor"""
   try:
     return jsonify({
       'status': 'running',
-      'queue_size': write_queue.qsize(),
+      'queue_size': sum(q.qsize() for q in write_queues),
+      'write_workers': WRITE_WORKERS,
+      'pending_writes': dict(pending_writes),
       'active_locks': len(file_locks),
+      'cache': _cache_status(),
+      'write_metrics': _histograms_status(),
+      'storage': {
+        'mode': STORAGE_MODE,
+        'journal_entries': {k: v for k, v in journal_entries.items() if v},
+        **storage_stats
+      },
+      'boletim': {'students': len(boletim_view['boletins']), **boletim_stats},
+      'changes': {'epoch': CHANGES_EPOCH, 'version': change_feed['version'], 'waiters': change_feed['waiters']},
       'config': {k: v for k, v in CONFIG.items() if k not in ['allowed_client_ip']}, # Não expõe configurações sensíveis
  'timestamp': datetime.now().isoformat()
     })
@@ -320,25 +2121,43 @@ if __name__ == '__main__':
     print(f"[PORTA] Porta: {CONFIG['port']}")
     print(f"[DIR] Diretório de dados: {DATA_DIR}")
     print(f"[CONEX] Máximo de conexões: {CONFIG.get('max_connections', 'Não especificado')}")
+    print(f"[DISCO] Modo de armazenamento: {STORAGE_MODE}")
     print()
     print("[SUCESSO] Servidor iniciado com sucesso!")
-    print("[THREAD] Worker thread ativo para processar fila")
+    print(f"[THREAD] {WRITE_WORKERS} worker thread(s) ativo(s) para processar as filas")
     print()
     print("[STOP] Pressione Ctrl+C para parar o servidor")
     print("-----------------------------------------------------------")
     print()
     
     try:
-        app.run(
-            host=CONFIG['host'],
-            port=CONFIG['port'],
-            debug=CONFIG.get('debug', False),
-            threaded=True
-        )
+        if USE_WAITRESS and not CONFIG.get('debug', False):
+            # HTTP/1.1 com keep-alive: os clientes reaproveitam a conexão TCP
+            # (pool em client_proxy_io). Conexões ociosas são fechadas após o timeout
+            print("[HTTP] Servidor waitress (keep-alive ativo)")
+            waitress_serve(
+                app,
+                host=CONFIG['host'],
+                port=CONFIG['port'],
+                threads=CONFIG.get('http_threads', 16),
+                channel_timeout=CONFIG.get('keepalive_timeout', 60)
+            )
+        else:
+            print("[HTTP] Servidor de desenvolvimento Flask (sem keep-alive). Instale 'waitress' para ativar.")
+            app.run(
+                host=CONFIG['host'],
+                port=CONFIG['port'],
+                debug=CONFIG.get('debug', False),
+                threaded=True
+            )
     except KeyboardInterrupt:
         print("\n\n[ENCERRAR] Encerrando servidor...")
-        write_queue.put(None)  # Sinal para parar worker
-        worker_thread.join(timeout=5)
+        for q in write_queues:
+            q.put(None)  # Sinal para parar cada worker
+        for worker_thread in worker_threads:
+            worker_thread.join(timeout=5)
+        if STORAGE_MODE == 'journal':
+            compact_all_journals()  # Deixa os snapshots atualizados
         print("[SUCESSO] Servidor encerrado com sucesso!")
     except Exception as e:
         logger.error(f"[ERRO FATAL] Erro fatal: {e}")
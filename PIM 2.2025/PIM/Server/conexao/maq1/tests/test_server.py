@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do servidor com o cliente de teste do Flask.
+
+O server.py lê config_server.json e a pasta DATA ao lado de si mesmo, então
+cada teste copia o server.py para uma pasta temporária com a configuração
+desejada e o importa de lá: nenhum arquivo do servidor real é tocado.
+
+Uso (na pasta do server.py):
+  python -m unittest discover -s tests
+"""
+import importlib.util
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+SERVER_PY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'server.py')
+
+_instancias = 0
+
+def carregar_servidor(pasta, **config):
+  """
+  Importa uma instância nova do servidor usando 'pasta' como diretório
+  base (config_server.json e DATA/). Importar de novo sobre a mesma pasta
+  equivale a reiniciar o servidor: a recuperação dos journals roda.
+  """
+  global _instancias
+  _instancias += 1
+
+  shutil.copy(SERVER_PY, os.path.join(pasta, 'server.py'))
+  configuracao = {'data_dir': './DATA', 'timeout': 10, 'write_workers': 2,
+                  'storage_mode': 'snapshot', 'compaction_interval': 3600}
+  configuracao.update(config)
+  with open(os.path.join(pasta, 'config_server.json'), 'w', encoding='utf-8') as f:
+    json.dump(configuracao, f)
+
+  # O server.log é criado na pasta atual
+  anterior = os.getcwd()
+  os.chdir(pasta)
+  try:
+    spec = importlib.util.spec_from_file_location(f'server_teste_{_instancias}', os.path.join(pasta, 'server.py'))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+  finally:
+    os.chdir(anterior)
+  return modulo
+
+
+class ServidorTestCase(unittest.TestCase):
+  """Pasta temporária com DATA/ e os arquivos iniciais de ARQUIVOS"""
+  ARQUIVOS = {}
+  CONFIG = {}
+
+  def setUp(self):
+    self.pasta = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.pasta, ignore_errors=True)
+    os.makedirs(os.path.join(self.pasta, 'DATA'))
+    for nome, dados in self.ARQUIVOS.items():
+      self.gravar_arquivo(nome, dados)
+    self.servidor = carregar_servidor(self.pasta, **self.CONFIG)
+    self.cliente = self.servidor.app.test_client()
+
+  def caminho(self, nome):
+    return os.path.join(self.pasta, 'DATA', nome)
+
+  def gravar_arquivo(self, nome, dados):
+    with open(self.caminho(nome), 'w', encoding='utf-8') as f:
+      json.dump(dados, f)
+
+  def ler_arquivo(self, nome):
+    with open(self.caminho(nome), 'r', encoding='utf-8') as f:
+      return json.load(f)
+
+  def alterar(self, nome, op, cliente=None):
+    resposta = (cliente or self.cliente).post(f'/api/records/{nome}', json=op)
+    return resposta.status_code, resposta.get_json()
+
+  def ler(self, nome, cliente=None):
+    resposta = (cliente or self.cliente).get(f'/api/read/{nome}')
+    self.assertEqual(resposta.status_code, 200)
+    return resposta.get_json()['data']
+
+
+class JournalTest(ServidorTestCase):
+  ARQUIVOS = {'pedidos.json': [{'id': 1, 'status': 'Pendente'}]}
+  CONFIG = {'storage_mode': 'journal', 'journal_max_entries': 1000}
+
+  def test_reaplica_journal_apos_queda(self):
+    self.assertEqual(self.alterar('pedidos.json', {'op': 'insert', 'record': {'id': 2, 'status': 'Pendente'}})[0], 200)
+    self.assertEqual(self.alterar('pedidos.json', {'op': 'patch', 'match': {'id': 1},
+                                                   'fields': {'status': 'Aprovado'}})[0], 200)
+    esperado = [{'id': 1, 'status': 'Aprovado'}, {'id': 2, 'status': 'Pendente'}]
+
+    # As escritas estão só no journal; o snapshot ainda é o original
+    journal = self.caminho('pedidos.json.journal')
+    self.assertTrue(os.path.exists(journal))
+    self.assertEqual(self.ler_arquivo('pedidos.json'), [{'id': 1, 'status': 'Pendente'}])
+
+    # Queda durante a escrita de uma entrada: última linha incompleta
+    with open(journal, 'a', encoding='utf-8') as f:
+      f.write('{"ts": "2025-01-01T00:00:00", "op": {"op": "insert", "rec')
+
+    reiniciado = carregar_servidor(self.pasta, **self.CONFIG)
+
+    # A recuperação reaplica as entradas completas, grava o snapshot e apaga o journal
+    self.assertFalse(os.path.exists(journal))
+    self.assertEqual(self.ler_arquivo('pedidos.json'), esperado)
+    self.assertEqual(self.ler('pedidos.json', reiniciado.app.test_client()), esperado)
+
+  def test_journal_de_outro_snapshot_nao_e_reaplicado(self):
+    self.assertEqual(self.alterar('pedidos.json', {'op': 'insert', 'record': {'id': 2}})[0], 200)
+
+    # Snapshot trocado depois do journal (ex.: edição manual): o cabeçalho não confere
+    self.gravar_arquivo('pedidos.json', [{'id': 9}])
+    reiniciado = carregar_servidor(self.pasta, **self.CONFIG)
+
+    self.assertEqual(self.ler('pedidos.json', reiniciado.app.test_client()), [{'id': 9}])
+    self.assertFalse(os.path.exists(self.caminho('pedidos.json.journal')))
+    self.assertTrue(os.path.exists(self.caminho('pedidos.json.journal.orphan')))
+
+
+class ConsultaCursorTest(ServidorTestCase):
+  ARQUIVOS = {'alunos.json': [{'ra': str(ra), 'serie': ra % 3} for ra in range(1, 13)]}
+
+  def pagina(self, cursor=None, **parametros):
+    query = {'sort': 'serie', 'key': 'ra', 'limit': '4', **parametros}
+    if cursor:
+      query['cursor'] = cursor
+    resposta = self.cliente.get('/api/query/alunos.json', query_string=query)
+    return resposta.status_code, resposta.get_json()
+
+  def test_insercao_entre_paginas_nao_repete_nem_pula(self):
+    status, primeira = self.pagina()
+    self.assertEqual(status, 200)
+    self.assertEqual(primeira['total'], 12)
+    vistos = [r['ra'] for r in primeira['data']]
+
+    # Registros antes e depois do cursor, inseridos entre uma página e outra
+    self.assertEqual(self.alterar('alunos.json', {'op': 'insert', 'record': {'ra': '0', 'serie': 0}})[0], 200)
+    self.assertEqual(self.alterar('alunos.json', {'op': 'insert', 'record': {'ra': '99', 'serie': 2}})[0], 200)
+
+    cursor = primeira['next_cursor']
+    while cursor:
+      status, pagina = self.pagina(cursor)
+      self.assertEqual(status, 200)
+      vistos.extend(r['ra'] for r in pagina['data'])
+      cursor = pagina['next_cursor']
+
+    self.assertEqual(len(vistos), len(set(vistos)))
+    self.assertEqual(set(vistos), {str(ra) for ra in range(1, 13)} | {'99'})
+
+  def test_cursor_exige_a_mesma_ordenacao(self):
+    _, primeira = self.pagina()
+    cursor = primeira['next_cursor']
+    self.assertEqual(self.pagina(cursor, sort='-serie')[0], 400)
+    self.assertEqual(self.pagina(cursor, key='')[0], 400)
+    self.assertEqual(self.pagina(cursor)[0], 200)
+
+  def test_parametro_desconhecido(self):
+    resposta = self.cliente.get('/api/query/alunos.json?sotr=serie')
+    self.assertEqual(resposta.status_code, 400)
+
+
+class EscritaCondicionalTest(ServidorTestCase):
+  ARQUIVOS = {'respostas_alunos.json': [], 'materias.json': [{'id': 1, 'nome': 'Matemática'}]}
+
+  def test_insert_unico_duplicado_retorna_409(self):
+    op = {'op': 'insert', 'unique': ['ra_aluno', 'atividade_id'],
+          'record': {'ra_aluno': '10', 'atividade_id': 5, 'data_resposta': '01/01/2025'}}
+    self.assertEqual(self.alterar('respostas_alunos.json', op)[0], 200)
+
+    duplicado = dict(op, record={'ra_aluno': '10', 'atividade_id': 5, 'data_resposta': '02/01/2025'})
+    status, corpo = self.alterar('respostas_alunos.json', duplicado)
+    self.assertEqual(status, 409)
+    self.assertTrue(corpo['conflict'])
+    self.assertEqual(corpo['existing']['data_resposta'], '01/01/2025')
+    self.assertEqual(len(self.ler('respostas_alunos.json')), 1)
+
+  def test_if_match_desatualizado_retorna_412(self):
+    etag = self.cliente.get('/api/read/materias.json').headers['ETag']
+
+    primeira = self.cliente.post('/api/write/materias.json', headers={'If-Match': etag},
+                                 json={'data': [{'id': 1, 'nome': 'Álgebra'}]})
+    self.assertEqual(primeira.status_code, 200)
+
+    # Segunda escrita preparada sobre a mesma versão (já substituída)
+    segunda = self.cliente.post('/api/write/materias.json', headers={'If-Match': etag},
+                                json={'data': [{'id': 1, 'nome': 'Geometria'}]})
+    self.assertEqual(segunda.status_code, 412)
+    self.assertTrue(segunda.get_json()['conflict'])
+    self.assertEqual(self.ler('materias.json'), [{'id': 1, 'nome': 'Álgebra'}])
+
+
+if __name__ == '__main__':
+  unittest.main()
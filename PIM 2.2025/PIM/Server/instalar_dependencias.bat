@@ -20,6 +20,8 @@ pip install python-dateutil
 pip install requests
 pip install werkzeug
 pip install gunicorn
+pip install waitress
+pip install bcrypt
 pip install cryptography
 echo.
 echo =========================================
@@ -33,6 +35,8 @@ echo - python-dateutil (manipulacao de datas)
 echo - requests (requisicoes HTTP)
 echo - werkzeug (utilitarios WSGI)
 echo - gunicorn (servidor de producao)
+echo - waitress (servidor HTTP com keep-alive, usado pelo server.py)
+echo - bcrypt (verificacao de senhas no login pelo servidor)
 echo - cryptography (criptografia)
 echo.
 echo PROXIMO PASSO: